@@ -1,77 +1,381 @@
+import itertools
 import logging
 import time
-from collections.abc import Callable
+import zlib
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import (
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_BYTES,
+    COMPRESSION_ZSTD_LEVEL,
+    LOG_SAMPLE_RATE,
+    MAX_DECOMPRESSED_BODY_BYTES,
+)
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_413_CONTENT_TOO_LARGE,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logger = logging.getLogger('anonify.requests')
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Start timer
-        start_time = time.time()
-
-        # Extract request information
-        method = request.method
-        path = request.url.path
-        query_params = str(request.query_params) if request.query_params else ''
-        client_host = request.client.host if request.client else 'unknown'
-        client_port = request.client.port if request.client else None
-
-        # Log request
-        logger.info(
-            f'Request: {method} {path}',
-            extra={
-                'method': method,
-                'path': path,
-                'query_params': query_params,
-                'client_host': client_host,
-                'client_port': client_port,
-                'request_id': request.headers.get('X-Request-ID', None),
-            },
-        )
-
-        # Process request
+class RequestLoggingMiddleware:
+    """
+    Logs each HTTP request and its response status and processing time.
+
+    A pure ASGI middleware: it only wraps `send` to capture the status code,
+    so requests and streaming bodies pass through untouched. With
+    `sample_rate` N, one in N successful requests is logged; responses with
+    a status of 400 or more and failed requests are always logged. Messages
+    are formatted lazily and skipped entirely when the level is disabled.
+    """
+
+    def __init__(
+        self, app: ASGIApp, sample_rate: int = LOG_SAMPLE_RATE
+    ) -> None:
+        self.app = app
+        self.sample_rate = max(1, sample_rate)
+        self._requests = itertools.count()
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        sampled = next(self._requests) % self.sample_rate == 0
+
+        method = scope['method']
+        path = scope['path']
+        client = scope.get('client')
+        client_host = client[0] if client else 'unknown'
+
+        if sampled and logger.isEnabledFor(logging.INFO):
+            request_id = None
+            for name, value in scope['headers']:
+                if name == b'x-request-id':
+                    request_id = value.decode('latin-1')
+                    break
+
+            logger.info(
+                'Request: %s %s',
+                method,
+                path,
+                extra={
+                    'method': method,
+                    'path': path,
+                    'query_params': scope['query_string'].decode('latin-1'),
+                    'client_host': client_host,
+                    'client_port': client[1] if client else None,
+                    'request_id': request_id,
+                },
+            )
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_status)
         except Exception as e:
-            # Calculate processing time
-            process_time = time.time() - start_time
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    'Request failed: %s %s',
+                    method,
+                    path,
+                    exc_info=True,
+                    extra={
+                        'method': method,
+                        'path': path,
+                        'process_time': round(
+                            time.perf_counter() - start_time, 4
+                        ),
+                        'status_code': 500,
+                        'error': str(e),
+                    },
+                )
+            raise
 
-            # Log error
-            logger.error(
-                f'Request failed: {method} {path}',
-                exc_info=True,
+        log_level = logging.INFO if status_code < 400 else logging.WARNING
+        if (sampled or log_level > logging.INFO) and logger.isEnabledFor(
+            log_level
+        ):
+            logger.log(
+                log_level,
+                'Response: %s %s - %s',
+                method,
+                path,
+                status_code,
                 extra={
                     'method': method,
                     'path': path,
-                    'process_time': round(process_time, 4),
-                    'status_code': 500,
-                    'error': str(e),
+                    'status_code': status_code,
+                    'process_time': round(time.perf_counter() - start_time, 4),
+                    'client_host': client_host,
                 },
             )
-            raise
 
-        # Calculate processing time
-        process_time = time.time() - start_time
 
-        # Extract response information
-        status_code = response.status_code
+# Codings in order of preference; zstd needs the `compression` group.
+CONTENT_CODINGS = ('zstd', 'gzip') if zstandard is not None else ('gzip',)
 
-        # Log response
-        log_level = logging.INFO if status_code < 400 else logging.WARNING
-        logger.log(
-            log_level,
-            f'Response: {method} {path} - {status_code}',
-            extra={
-                'method': method,
-                'path': path,
-                'status_code': status_code,
-                'process_time': round(process_time, 4),
-                'client_host': client_host,
-            },
-        )
-
-        return response
+_COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def negotiate_coding(accept_encoding: str) -> str | None:
+    """Pick the response coding from an Accept-Encoding header, if any."""
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in CONTENT_CODINGS:
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _GzipEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._obj.compress(data) + self._obj.flush(mode)
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        if final:
+            mode = zstandard.COMPRESSOBJ_FLUSH_FINISH
+        else:
+            mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._obj.compress(data) + self._obj.flush(mode)
+
+
+class _GzipDecoder:
+    errors: tuple[type[Exception], ...] = (zlib.error,)
+
+    def __init__(self) -> None:
+        self._obj = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    @property
+    def eof(self) -> bool:
+        return self._obj.eof
+
+    def decode(self, data: bytes, max_length: int) -> bytes:
+        return self._obj.decompress(data, max_length)
+
+
+# A zstd block of 4 bytes can hold 128 KiB of output, so a 64-byte input
+# slice inflates to at most 2 MiB.
+_ZSTD_MAX_RATIO = 128 * 1024 // 4
+_ZSTD_MIN_SLICE = 64
+
+
+class _ZstdDecoder:
+    errors: tuple[type[Exception], ...] = (
+        (zstandard.ZstdError,) if zstandard is not None else ()
+    )
+
+    def __init__(self) -> None:
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    @property
+    def eof(self) -> bool:
+        return self._obj.eof
+
+    def decode(self, data: bytes, max_length: int) -> bytes:
+        # decompressobj has no output bound, so input goes in slices small
+        # enough that one cannot inflate far past `max_length`.
+        if not max_length:
+            return self._obj.decompress(data)
+        step = max(_ZSTD_MIN_SLICE, max_length // _ZSTD_MAX_RATIO)
+        pieces: list[bytes] = []
+        produced = 0
+        for pos in range(0, len(data), step):
+            piece = self._obj.decompress(data[pos : pos + step])
+            pieces.append(piece)
+            produced += len(piece)
+            if produced >= max_length:
+                break
+        return b''.join(pieces)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/zstd compression of request and response bodies.
+
+    Request bodies sent with `Content-Encoding: gzip` or `zstd` are
+    decompressed as they are received, up to `max_request_bytes` once
+    inflated (0 for no limit); other codings get a 415. Responses are
+    compressed with the best coding the client accepts when their type is
+    JSON, NDJSON or text and they are at least `minimum_size` bytes.
+    Streamed responses are compressed chunk by chunk and flushed after
+    each, so clients still receive records as they are produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL,
+        max_request_bytes: int = MAX_DECOMPRESSED_BODY_BYTES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.max_request_bytes = max_request_bytes
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_coding = headers.get('content-encoding', 'identity').lower()
+        if content_coding != 'identity':
+            if content_coding not in CONTENT_CODINGS:
+                response = PlainTextResponse(
+                    f'Unsupported Content-Encoding {content_coding!r}.',
+                    status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    headers={'Accept-Encoding': ', '.join(CONTENT_CODINGS)},
+                )
+                await response(scope, receive, send)
+                return
+            scope = {
+                **scope,
+                'headers': [
+                    (name, value)
+                    for name, value in scope['headers']
+                    if name not in (b'content-encoding', b'content-length')
+                ],
+            }
+            receive = self._decoding_receive(receive, content_coding)
+
+        coding = None
+        if self.minimum_size >= 0:
+            coding = negotiate_coding(headers.get('accept-encoding', ''))
+        if coding is not None:
+            send = self._encoding_send(send, coding)
+
+        await self.app(scope, receive, send)
+
+    def _decoding_receive(self, receive: Receive, coding: str) -> Receive:
+        decoder = _ZstdDecoder() if coding == 'zstd' else _GzipDecoder()
+        limit = self.max_request_bytes
+        size = 0
+        empty = True
+
+        async def decoding_receive() -> Message:
+            nonlocal size, empty
+            message = await receive()
+            if message['type'] != 'http.request':
+                return message
+
+            data = message.get('body', b'')
+            empty = empty and not data
+            try:
+                # One byte over the limit is enough to reject the body.
+                body = decoder.decode(data, limit - size + 1 if limit else 0)
+            except decoder.errors:
+                raise HTTPException(
+                    HTTP_400_BAD_REQUEST, f'Invalid {coding} request body.'
+                ) from None
+            size += len(body)
+            if limit and size > limit:
+                raise HTTPException(
+                    HTTP_413_CONTENT_TOO_LARGE,
+                    f'Decompressed request body exceeds {limit} bytes.',
+                )
+            if not (message.get('more_body', False) or empty or decoder.eof):
+                raise HTTPException(
+                    HTTP_400_BAD_REQUEST, f'Truncated {coding} request body.'
+                )
+            return {**message, 'body': body}
+
+        return decoding_receive
+
+    def _encoding_send(self, send: Send, coding: str) -> Send:
+        start: Message | None = None
+        encoder: _GzipEncoder | _ZstdEncoder | None = None
+        passthrough = False
+
+        async def encoding_send(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if passthrough or message['type'] not in (
+                'http.response.start',
+                'http.response.body',
+            ):
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                # Held back until the first body chunk shows its size.
+                start = message
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start['headers'])
+                if (
+                    'content-encoding' in headers
+                    or not headers.get('content-type', '').startswith(
+                        _COMPRESSIBLE_TYPES
+                    )
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                if coding == 'zstd':
+                    encoder = _ZstdEncoder(self.zstd_level)
+                else:
+                    encoder = _GzipEncoder(self.gzip_level)
+                body = encoder.encode(body, final=not more_body)
+                headers['Content-Encoding'] = coding
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    headers['Content-Length'] = str(len(body))
+                await send(start)
+            else:
+                body = encoder.encode(body, final=not more_body)
+
+            await send({**message, 'body': body})
+
+        return encoding_send
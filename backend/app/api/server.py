@@ -1,19 +1,34 @@
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-from app.api.middleware import RequestLoggingMiddleware
+from app.api.middleware import CompressionMiddleware, RequestLoggingMiddleware
 from app.api.v1.routes import router as api_router
 from app.core import config
 from app.core.logging_config import setup_logging
+from app.services import model_rules
+from app.services.model_service import load_in_background
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 logger = logging.getLogger('anonify')
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if config.MODEL_PRELOAD:
+        # Load models off the event loop so the server can bind right away.
+        load_in_background(model_rules)
+    yield
+
+
 def get_application():
     logger.info('Starting application.')
-    app = FastAPI(title=config.PROJECT_NAME, version=config.VERSION)
+    app = FastAPI(
+        title=config.PROJECT_NAME, version=config.VERSION, lifespan=lifespan
+    )
 
+    app.add_middleware(CompressionMiddleware)
     app.add_middleware(RequestLoggingMiddleware)
 
     app.add_middleware(
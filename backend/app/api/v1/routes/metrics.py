@@ -0,0 +1,13 @@
+from app.core.metrics import registry
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+
+@router.get('', name='metrics', response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        registry.render(),
+        media_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,20 +1,34 @@
 import logging
 
+import anyio
 from app.core.errors import ServiceError, ValidationError
-from app.models.pii import PiiIn, PiiOut
+from app.models.pii import (
+    PiiBatchIn,
+    PiiBatchItemOut,
+    PiiBatchOut,
+    PiiIn,
+    PiiOut,
+    batch_item_include,
+    parse_fields,
+)
 from app.services import (
     html_service,
     removal_service_model,
     removal_service_regex,
+    result_cache,
     validation_service,
 )
-from app.services.orchestrator import Orchestrator
-from fastapi import APIRouter, HTTPException
+from app.services.orchestrator import BatchOrchestrator, Orchestrator
+from app.services.streaming import NdjsonAnonymizer
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from starlette.status import (
     HTTP_200_OK,
     HTTP_400_BAD_REQUEST,
+    HTTP_422_UNPROCESSABLE_CONTENT,
     HTTP_500_INTERNAL_SERVER_ERROR,
 )
+from starlette.types import Receive
 
 logger = logging.getLogger('anonify')
 
@@ -22,10 +36,51 @@ logger = logging.getLogger('anonify')
 router = APIRouter()
 
 
+class NdjsonStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body generator reads the request body.
+
+    StreamingResponse listens for `http.disconnect` by calling `receive()`
+    concurrently, which would swallow request body chunks. Here the body
+    stream itself raises ClientDisconnect when the client goes away.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        await anyio.sleep_forever()
+
+
+def response_fields(
+    fields: str | None = Query(
+        None,
+        description=(
+            'Comma-separated result fields to return, e.g. `cleaned_text` '
+            'or `replaced_count`; all fields by default.'
+        ),
+    ),
+) -> frozenset[str] | None:
+    if fields is None:
+        return None
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e)
+        ) from e
+
+
+def _json(content: str) -> Response:
+    # Already serialized; skips response model validation and encoding.
+    return Response(content, media_type='application/json')
+
+
 @router.post('/clean', name='pii:remover', status_code=HTTP_200_OK)
-def remove_pii(
+async def remove_pii(
     input: PiiIn,
     clean_html: bool = False,
+    restore_html: bool = False,
+    fields: frozenset[str] | None = Depends(response_fields),
 ) -> PiiOut:
     orchestrator = Orchestrator(
         input=input,
@@ -33,10 +88,12 @@ def remove_pii(
         validation_services=[validation_service],
         html_service=html_service,
         clean_html=clean_html,
+        cache=result_cache,
+        restore_html=restore_html,
     )
 
     try:
-        cleaned_result = orchestrator.run_pipeline()
+        cleaned_result = await orchestrator.run_pipeline_async()
     except ValidationError as ve:
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST, detail=ve.message
@@ -46,10 +103,100 @@ def remove_pii(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail=se.message
         ) from se
 
-    return PiiOut(
+    output = PiiOut(
         original_text=input.original_text,
         cleaned_text=cleaned_result.cleaned_text,
         methods=cleaned_result.methods,
         replaced_values=cleaned_result.replaced_values,
         replaced_count=cleaned_result.replaced_count,
     )
+    if fields is None:
+        return output
+    return _json(output.model_dump_json(include=fields))
+
+
+@router.post('/clean/batch', name='pii:remover-batch', status_code=HTTP_200_OK)
+def remove_pii_batch(
+    input: PiiBatchIn,
+    clean_html: bool = False,
+    restore_html: bool = False,
+    fields: frozenset[str] | None = Depends(response_fields),
+) -> PiiBatchOut:
+    orchestrator = BatchOrchestrator(
+        inputs=input.items,
+        clean_services=[removal_service_regex, removal_service_model],
+        validation_services=[validation_service],
+        html_service=html_service,
+        clean_html=clean_html,
+        cache=result_cache,
+        restore_html=restore_html,
+    )
+
+    try:
+        outputs = orchestrator.run_pipeline()
+    except ServiceError as se:
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail=se.message
+        ) from se
+
+    results: list[PiiBatchItemOut] = []
+    for idx, (item, output) in enumerate(
+        zip(input.items, outputs, strict=True)
+    ):
+        if isinstance(output, ValidationError):
+            results.append(
+                PiiBatchItemOut(
+                    index=idx,
+                    status_code=HTTP_400_BAD_REQUEST,
+                    error=output.message,
+                )
+            )
+        elif isinstance(output, ServiceError):
+            results.append(
+                PiiBatchItemOut(
+                    index=idx,
+                    status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+                    error=output.message,
+                )
+            )
+        else:
+            results.append(
+                PiiBatchItemOut(
+                    index=idx,
+                    status_code=HTTP_200_OK,
+                    result=output.model_copy(
+                        update={'original_text': item.original_text}
+                    ),
+                )
+            )
+
+    output = PiiBatchOut(results=results)
+    if fields is None:
+        return output
+    return _json(
+        output.model_dump_json(
+            include={'results': {'__all__': batch_item_include(fields)}}
+        )
+    )
+
+
+@router.post(
+    '/clean/stream', name='pii:remover-stream', status_code=HTTP_200_OK
+)
+async def remove_pii_stream(
+    request: Request,
+    clean_html: bool = False,
+    restore_html: bool = False,
+    fields: frozenset[str] | None = Depends(response_fields),
+) -> NdjsonStreamingResponse:
+    anonymizer = NdjsonAnonymizer(
+        clean_services=[removal_service_regex, removal_service_model],
+        validation_services=[validation_service],
+        html_service=html_service,
+        clean_html=clean_html,
+        cache=result_cache,
+        restore_html=restore_html,
+        fields=fields,
+    )
+
+    return NdjsonStreamingResponse(anonymizer.process_stream(request.stream()))
@@ -1,4 +1,7 @@
+from app.services import model_rules
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
 
 router = APIRouter()
 
@@ -6,3 +9,22 @@ router = APIRouter()
 @router.get('/', name='ping')
 async def ping():
     return {'message': 'pong'}
+
+
+@router.get('/ready', name='ping:ready')
+async def ready() -> JSONResponse:
+    models = {
+        rule.placeholder: str(getattr(rule, 'load_state', 'ready'))
+        for rule in model_rules
+    }
+    errors = {
+        rule.placeholder: rule.load_error
+        for rule in model_rules
+        if getattr(rule, 'load_error', None)
+    }
+    is_ready = all(state == 'ready' for state in models.values())
+
+    return JSONResponse(
+        status_code=HTTP_200_OK if is_ready else HTTP_503_SERVICE_UNAVAILABLE,
+        content={'ready': is_ready, 'models': models, 'errors': errors},
+    )
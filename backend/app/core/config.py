@@ -14,6 +14,109 @@ APP_ENV = 'Development'
 API_PREFIX = '/api/v1'
 
 LOG_LEVEL = config('LOG_LEVEL', cast=str, default='INFO')
+# Log 1 in N successful requests; errors are always logged.
+LOG_SAMPLE_RATE = config('LOG_SAMPLE_RATE', cast=int, default=1)
 AUTH_PASSWORD = config('AUTH_PASSWORD', cast=str, default='ChangeMe123!')
 MAX_TEXT_LENGTH = config('MAX_TEXT_LENGTH', cast=int, default=50000)
 HF_TOKEN = config('HF_TOKEN', cast=str, default='test_token')
+
+NER_BATCH_MAX_SIZE = config('NER_BATCH_MAX_SIZE', cast=int, default=16)
+NER_BATCH_MAX_WAIT_MS = config('NER_BATCH_MAX_WAIT_MS', cast=float, default=5.0)
+NER_CHUNK_MAX_TOKENS = config('NER_CHUNK_MAX_TOKENS', cast=int, default=510)
+NER_CHUNK_OVERLAP_TOKENS = config(
+    'NER_CHUNK_OVERLAP_TOKENS', cast=int, default=64
+)
+
+MODEL_PRELOAD = config('MODEL_PRELOAD', cast=bool, default=True)
+# 'wait' blocks requests until models are loaded, 'fallback' runs regex only.
+MODEL_NOT_READY_POLICY = config(
+    'MODEL_NOT_READY_POLICY', cast=str, default='wait'
+)
+# With 'fallback', a model that failed to load is retried in the background
+# after this many seconds; 'wait' retries on the next request.
+MODEL_LOAD_RETRY_SECONDS = config(
+    'MODEL_LOAD_RETRY_SECONDS', cast=float, default=30.0
+)
+
+# Inference backend per model rule: 'torch', 'onnx', 'onnx-int8', 'remote'
+# or 'stub'.
+MODEL_BACKEND_AB_AI = config('MODEL_BACKEND_AB_AI', cast=str, default='torch')
+MODEL_BACKEND_BERT_BASE = config(
+    'MODEL_BACKEND_BERT_BASE', cast=str, default='torch'
+)
+ONNX_CACHE_DIR = config('ONNX_CACHE_DIR', cast=str, default='.cache/onnx')
+
+# Per model rule, skip NER on sentences without candidate entities: 'off',
+# 'recall' (any capitalized word) or 'balanced' (ignores sentence openers).
+MODEL_PRESCREEN_AB_AI = config('MODEL_PRESCREEN_AB_AI', cast=str, default='off')
+MODEL_PRESCREEN_BERT_BASE = config(
+    'MODEL_PRESCREEN_BERT_BASE', cast=str, default='recall'
+)
+# Optional file of terms (one per line) that make a sentence a candidate in
+# any case.
+PRESCREEN_LEXICON_PATH = config('PRESCREEN_LEXICON_PATH', cast=str, default='')
+
+# 'stub' backend: deterministic NER from a JSON lexicon (or a default
+# pattern), with simulated latency per call and per 1000 characters.
+STUB_NER_LEXICON_PATH = config('STUB_NER_LEXICON_PATH', cast=str, default='')
+STUB_NER_LATENCY_MS = config('STUB_NER_LATENCY_MS', cast=float, default=0.0)
+STUB_NER_LATENCY_MS_PER_KCHAR = config(
+    'STUB_NER_LATENCY_MS_PER_KCHAR', cast=float, default=0.0
+)
+
+# Result cache for /pii/clean; a size of 0 disables it.
+RESULT_CACHE_MAX_BYTES = config(
+    'RESULT_CACHE_MAX_BYTES', cast=int, default=64 * 1024 * 1024
+)
+RESULT_CACHE_TTL_SECONDS = config(
+    'RESULT_CACHE_TTL_SECONDS', cast=float, default=3600.0
+)
+RESULT_CACHE_HASH_ONLY = config(
+    'RESULT_CACHE_HASH_ONLY', cast=bool, default=True
+)
+
+# Regex engine for the regex rules: 're', or 're2' (the `re2` group) for
+# time linear in the text length; patterns RE2 cannot compile use 're'.
+REGEX_ENGINE = config('REGEX_ENGINE', cast=str, default='re')
+
+# Deny list of known names, codenames or hostnames to redact: one term per
+# line, optionally followed by a tab and a label; empty disables it.
+DENYLIST_PATH = config('DENYLIST_PATH', cast=str, default='')
+# Compiled automaton, prebuilt with `main.py build-denylist`; defaults to
+# DENYLIST_PATH + '.automaton', (re)written there when it is stale.
+DENYLIST_COMPILED_PATH = config('DENYLIST_COMPILED_PATH', cast=str, default='')
+DENYLIST_IGNORE_CASE = config('DENYLIST_IGNORE_CASE', cast=bool, default=True)
+DENYLIST_WORD_BOUNDARY = config(
+    'DENYLIST_WORD_BOUNDARY', cast=bool, default=True
+)
+
+# HTML text extraction for clean_html: 'stdlib', 'lxml' or 'selectolax'.
+HTML_PARSER_BACKEND = config('HTML_PARSER_BACKEND', cast=str, default='stdlib')
+
+# Responses of at least this many bytes are compressed when the client
+# accepts gzip or zstd (zstd needs the `compression` group); -1 disables it.
+COMPRESSION_MIN_BYTES = config('COMPRESSION_MIN_BYTES', cast=int, default=1024)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', cast=int, default=6)
+COMPRESSION_ZSTD_LEVEL = config('COMPRESSION_ZSTD_LEVEL', cast=int, default=3)
+# Limit on a gzip or zstd request body once decompressed; 0 for no limit.
+MAX_DECOMPRESSED_BODY_BYTES = config(
+    'MAX_DECOMPRESSED_BODY_BYTES', cast=int, default=256 * 1024 * 1024
+)
+
+MAX_BATCH_ITEMS = config('MAX_BATCH_ITEMS', cast=int, default=1000)
+
+NDJSON_CHUNK_SIZE = config('NDJSON_CHUNK_SIZE', cast=int, default=64)
+NDJSON_MAX_LINE_BYTES = config(
+    'NDJSON_MAX_LINE_BYTES', cast=int, default=1024 * 1024
+)
+
+MODEL_EXECUTOR_WORKERS = config('MODEL_EXECUTOR_WORKERS', cast=int, default=4)
+
+# Model worker tier, used by the 'remote' backend (`main.py model-worker`).
+# The socket's directory must be private to the user; empty means one in
+# $XDG_RUNTIME_DIR or the temp directory. The authkey has no default: both
+# sides refuse to start until it is set.
+MODEL_WORKER_ADDRESS = config('MODEL_WORKER_ADDRESS', cast=str, default='')
+MODEL_WORKER_PROCESSES = config('MODEL_WORKER_PROCESSES', cast=int, default=2)
+MODEL_WORKER_AUTHKEY = config('MODEL_WORKER_AUTHKEY', cast=str, default='')
+MODEL_WORKER_BACKEND = config('MODEL_WORKER_BACKEND', cast=str, default='torch')
@@ -1,13 +1,22 @@
 import atexit
 import datetime as dt
+import enum
 import json
 import logging
 import logging.config
+import math
+import operator
 import pathlib
-from typing import override
+import re
+from typing import Any, override
 
 from app.core.config import APP_ENV, LOG_LEVEL, PROJECT_NAME, VERSION
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger('anonify')
 logger.setLevel(LOG_LEVEL)
 
@@ -105,40 +114,139 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record)
 
 
+# Left to `default=str`, as the json module does, rather than orjson's own
+# serialization.
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def _escape_non_ascii(match: re.Match[str]) -> str:
+    # As json.dumps with ensure_ascii: astral characters as surrogate pairs.
+    code = ord(match.group())
+    if code < 0x10000:
+        return f'\\u{code:04x}'
+    code -= 0x10000
+    return f'\\u{0xD800 | code >> 10:04x}\\u{0xDC00 | code & 0x3FF:04x}'
+
+
+def _orjson_safe(value: Any) -> bool:
+    """Whether orjson gives `value` the same JSON value as the json module."""
+    if isinstance(value, float):
+        # orjson writes NaN and infinities as null.
+        return math.isfinite(value)
+    if isinstance(value, enum.Enum):
+        # orjson writes the value, json.dumps str() unless int or str.
+        return isinstance(value, int | str)
+    if isinstance(value, dict):
+        return all(_orjson_safe(item) for item in value.values())
+    if isinstance(value, list | tuple):
+        return all(_orjson_safe(item) for item in value)
+    return True
+
+
 class MyJSONFormatter(logging.Formatter):
+    """
+    JSON lines formatter.
+
+    `fmt_keys` maps output keys to record attributes; `message`,
+    `timestamp`, `exc_info` and `stack_info` are computed, and any `extra`
+    fields are appended. Attribute lookups are prepared once per formatter,
+    the timestamp prefix is cached per second and records are serialized
+    with orjson when it is installed. Both encoders give the same values,
+    ASCII only; only the whitespace between tokens and the spelling of
+    floats differ. Records orjson would write differently, e.g. with NaN,
+    go to the json module.
+    """
+
+    _COMPUTED = ('message', 'timestamp', 'exc_info', 'stack_info')
+
     def __init__(
         self,
         *,
         fmt_keys: dict[str, str] | None = None,
+        use_orjson: bool = True,
     ):
         super().__init__()
         self.fmt_keys = fmt_keys if fmt_keys is not None else {}
+        self._fields = [
+            (key, val, val in self._COMPUTED, operator.attrgetter(val))
+            for key, val in self.fmt_keys.items()
+        ]
+        # Computed fields not mapped by fmt_keys go after the mapped ones.
+        self._unmapped = [
+            name
+            for name in self._COMPUTED
+            if name not in self.fmt_keys.values()
+        ]
+        self._encode = json.JSONEncoder(default=str).encode
+        self._use_orjson = use_orjson and orjson is not None
+        self._second_cache: tuple[int, str] = (-1, '')
+
+    def _timestamp(self, created: float) -> str:
+        """Same as `datetime.fromtimestamp(created, UTC).isoformat()`."""
+        frac, whole = math.modf(created)
+        micros = round(frac * 1e6)
+        if micros >= 1_000_000:
+            whole += 1
+            micros -= 1_000_000
+        second = int(whole)
+
+        cached_second, prefix = self._second_cache
+        if cached_second != second:
+            prefix = dt.datetime.fromtimestamp(second, tz=dt.UTC).strftime(
+                '%Y-%m-%dT%H:%M:%S'
+            )
+            self._second_cache = (second, prefix)
+
+        if micros:
+            return f'{prefix}.{micros:06d}+00:00'
+        return f'{prefix}+00:00'
 
     @override
     def format(self, record: logging.LogRecord) -> str:
         message = self._prepare_log_dict(record)
-        return json.dumps(message, default=str)
+        if self._use_orjson and _orjson_safe(message):
+            try:
+                encoded = orjson.dumps(
+                    message, default=str, option=_ORJSON_OPTIONS
+                ).decode()
+            except (TypeError, orjson.JSONEncodeError):
+                # e.g. ints above 64 bits; the stdlib handles those.
+                pass
+            else:
+                if encoded.isascii():
+                    return encoded
+                return _NON_ASCII.sub(_escape_non_ascii, encoded)
+        return self._encode(message)
 
     def _prepare_log_dict(self, record: logging.LogRecord):
-        always_fields = {
+        computed = {
             'message': record.getMessage(),
-            'timestamp': dt.datetime.fromtimestamp(
-                record.created, tz=dt.UTC
-            ).isoformat(),
+            'timestamp': self._timestamp(record.created),
+            'exc_info': (
+                self.formatException(record.exc_info)
+                if record.exc_info is not None
+                else None
+            ),
+            'stack_info': (
+                self.formatStack(record.stack_info)
+                if record.stack_info is not None
+                else None
+            ),
         }
-        if record.exc_info is not None:
-            always_fields['exc_info'] = self.formatException(record.exc_info)
 
-        if record.stack_info is not None:
-            always_fields['stack_info'] = self.formatStack(record.stack_info)
+        message = {}
+        for key, val, is_computed, getter in self._fields:
+            value = computed[val] if is_computed else None
+            message[key] = value if value is not None else getter(record)
 
-        message = {
-            key: msg_val
-            if (msg_val := always_fields.pop(val, None)) is not None
-            else getattr(record, val)
-            for key, val in self.fmt_keys.items()
-        }
-        message.update(always_fields)
+        for name in self._unmapped:
+            if (value := computed[name]) is not None:
+                message[name] = value
 
         for key, val in record.__dict__.items():
             if key not in LOG_RECORD_BUILTIN_ATTRS:
@@ -1,3 +1,4 @@
+from app.core.config import MAX_BATCH_ITEMS
 from app.models.core import CoreModel
 from pydantic import Field
 
@@ -15,3 +16,42 @@ class PiiOut(PiiBase):
     methods: list[str] = Field(default_factory=list)
     replaced_values: dict[str, str] = Field(default_factory=dict)
     replaced_count: dict[str, int] = Field(default_factory=dict)
+
+
+class PiiBatchIn(CoreModel):
+    items: list[PiiIn] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class PiiBatchItemOut(CoreModel):
+    index: int
+    status_code: int
+    result: PiiOut | None = None
+    error: str | None = None
+
+
+class PiiBatchOut(CoreModel):
+    results: list[PiiBatchItemOut] = Field(default_factory=list)
+
+
+def parse_fields(value: str) -> frozenset[str]:
+    """Parse a comma-separated list of `PiiOut` field names."""
+    fields = frozenset(
+        filter(None, (name.strip() for name in value.split(',')))
+    )
+    unknown = fields - PiiOut.model_fields.keys()
+    if not fields or unknown:
+        raise ValueError(
+            f'Expected a comma-separated subset of {list(PiiOut.model_fields)}'
+            + (f', got unknown fields {sorted(unknown)}.' if unknown else '.')
+        )
+    return fields
+
+
+def batch_item_include(fields: frozenset[str] | None) -> dict | None:
+    """
+    `include` argument dumping a `PiiBatchItemOut` with only `fields` of its
+    result, or None to keep them all.
+    """
+    if fields is None:
+        return None
+    return {'index': True, 'status_code': True, 'error': True, 'result': fields}
@@ -1,3 +1,9 @@
+from app.core.config import (
+    RESULT_CACHE_HASH_ONLY,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_TTL_SECONDS,
+)
+from app.core.metrics import registry
 from app.services.base import (
     HtmlService,
     PiiRule,
@@ -5,8 +11,11 @@ from app.services.base import (
     ValidationRule,
     ValidationService,
 )
+from app.services.cache import ResultCache
+from app.services.denylist import build_denylist_rule
 from app.services.html_service import HtmlService as hs
 from app.services.model_service import (
+    BaseModelRule,
     ModelRuleAbAi,
     ModelRuleBertBase,
     RemovalServiceModel,
@@ -30,7 +39,9 @@ regex_rules: list[PiiRule] = [
     RegexRuleIpv6(),
     RegexRuleUrl(),
 ]
-model_rules: list[PiiRule] = [
+if (denylist_rule := build_denylist_rule()) is not None:
+    regex_rules.append(denylist_rule)
+model_rules: list[BaseModelRule] = [
     ModelRuleAbAi(),
     ModelRuleBertBase(),
 ]
@@ -41,14 +52,50 @@ validation_rules: list[ValidationRule] = [
 
 # services
 html_service: HtmlService = hs()
-validation_service: ValidationService = ValidationServiceChecker(rules=validation_rules)
+validation_service: ValidationService = ValidationServiceChecker(
+    rules=validation_rules
+)
 removal_service_regex: TextAnonify = RemovalServiceRegex(rules=regex_rules)
 removal_service_model: TextAnonify = RemovalServiceModel(rules=model_rules)
 
+result_cache: ResultCache | None = (
+    ResultCache(
+        max_bytes=RESULT_CACHE_MAX_BYTES,
+        ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+        hash_only=RESULT_CACHE_HASH_ONLY,
+        version=ResultCache.fingerprint([*regex_rules, *model_rules]),
+    )
+    if RESULT_CACHE_MAX_BYTES > 0
+    else None
+)
+
+if result_cache is not None:
+    _cache = result_cache
+    registry.callback(
+        'anonify_cache_hits_total',
+        'counter',
+        'Result cache hits.',
+        lambda: _cache.hits,
+    )
+    registry.callback(
+        'anonify_cache_misses_total',
+        'counter',
+        'Result cache misses.',
+        lambda: _cache.misses,
+    )
+    registry.callback(
+        'anonify_cache_size_bytes',
+        'gauge',
+        'Estimated result cache size.',
+        lambda: _cache.stats()['size_bytes'],
+    )
+
 
 __all__ = [
-    "validation_service",
-    "removal_service_regex",
-    "removal_service_model",
-    "html_service",
+    'model_rules',
+    'validation_service',
+    'removal_service_regex',
+    'removal_service_model',
+    'html_service',
+    'result_cache',
 ]
@@ -1,6 +1,10 @@
+from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Protocol
 
+from app.services.html_service import HtmlDocument
+from app.services.span_plan import Span, SpanPlan
+
 
 @dataclass
 class RuleResult:
@@ -19,17 +23,53 @@ class CleanedTextResult:
     cleaned_text: str
     replaced_values: dict[str, str]
     replaced_count: dict[str, int]
+    # False when some rules were skipped, e.g. a model was not loaded yet.
+    complete: bool = True
+
+
+@dataclass
+class Detection:
+    """Spans a clean service found in a text, before any redaction."""
+
+    method: str
+    spans: list[Span]
+    # False when some rules were skipped, e.g. a model was not loaded yet.
+    complete: bool = True
+
+    def redact(self, text: str) -> CleanedTextResult:
+        """Redact this detection alone, as `TextAnonify.clean` does."""
+        plan = SpanPlan(text)
+        plan.extend(self.spans)
+        cleaned_text, replaced_count, replaced_values = plan.materialize()
+        return CleanedTextResult(
+            method=self.method,
+            cleaned_text=cleaned_text,
+            replaced_values=replaced_values,
+            replaced_count=replaced_count,
+            complete=self.complete,
+        )
 
 
 class HtmlService(Protocol):
     """Protocol for HTML processing service."""
 
+    # Name of the backend `clean` uses, part of the result cache key.
+    parser: str
+
+    def extract(self, html: str) -> HtmlDocument:
+        """Extracts the text of the HTML with a map back to the markup."""
+        ...
+
     def clean(self, html: str) -> str:
-        """Cleans the input HTML and returns the cleaned HTML."""
+        """Returns the text of the input HTML."""
         ...
 
-    def restore(self, text: str) -> str:
-        """Restores the cleaned text back to HTML format."""
+    def restore(
+        self,
+        document: HtmlDocument,
+        replacements: Iterable[tuple[int, int, str]],
+    ) -> str:
+        """Returns the HTML with spans of its text replaced."""
         ...
 
 
@@ -56,10 +96,22 @@ class ValidationRule(Protocol):
 class TextAnonify(Protocol):
     """Protocol for text cleaning services."""
 
+    def detect(self, text: str) -> Detection:
+        """Finds PII spans in the input text without redacting it."""
+        ...
+
+    def detect_many(self, texts: list[str]) -> list[Detection]:
+        """Finds PII spans in several texts, returning results in input order."""
+        ...
+
     def clean(self, text: str) -> CleanedTextResult:
         """Cleans the input text and returns the cleaned text along with the method used."""
         ...
 
+    def clean_many(self, texts: list[str]) -> list[CleanedTextResult]:
+        """Cleans several texts at once, returning results in input order."""
+        ...
+
     def replaced_values(self, text: str) -> dict[str, str]:
         """Returns a dictionary of replaced values in the cleaned text."""
         ...
@@ -77,6 +129,14 @@ class PiiRule(Protocol):
         """Returns the placeholder used for this PII type."""
         ...
 
+    def detect(self, text: str, method: str) -> list[Span]:
+        """Returns the spans this rule matches, with `method` as source."""
+        ...
+
+    def evaluate(self, text: str, method: str) -> RuleResult:
+        """Applies the rule once and returns the text, values and counts."""
+        ...
+
     def apply(self, text: str, method: str) -> str:
         """Applies the PII removal rule to the input text."""
         ...
@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import NER_BATCH_MAX_SIZE, NER_BATCH_MAX_WAIT_MS
+from app.core.metrics import NER_BATCH_SIZE
+
+logger = logging.getLogger('anonify.batching')
+
+Entities = list[dict[str, Any]]
+
+
+@dataclass
+class _PendingText:
+    """A text waiting to be processed along with its caller's future."""
+
+    text: str
+    future: Future[Entities] = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """
+    Collects NER calls from concurrent callers into batched pipeline calls.
+
+    A background worker takes the first queued text, then keeps collecting
+    until either `max_batch_size` texts are queued or `max_wait_ms` has
+    passed, and runs the whole batch through the pipeline at once. Each
+    caller blocks only on its own future and gets back its own entities.
+    """
+
+    def __init__(
+        self,
+        ner: Callable[..., Any],
+        *,
+        max_batch_size: int = NER_BATCH_MAX_SIZE,
+        max_wait_ms: float = NER_BATCH_MAX_WAIT_MS,
+        name: str = '',
+    ) -> None:
+        self._ner = ner
+        self._name = name
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.SimpleQueue[_PendingText] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> Entities:
+        return self.submit(text).result()
+
+    def submit(self, text: str) -> Future[Entities]:
+        """Queue a text and return a future resolving to its entities."""
+        self._ensure_worker()
+        pending = _PendingText(text)
+        self._queue.put(pending)
+        return pending.future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name='ner-micro-batcher', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            self._run_batch(self._collect())
+
+    def _collect(self) -> list[_PendingText]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+
+        while len(batch) < self._max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run_batch(self, batch: list[_PendingText]) -> None:
+        texts = [pending.text for pending in batch]
+        NER_BATCH_SIZE.observe(len(texts), self._name)
+        try:
+            if len(texts) == 1:
+                results = [self._ner(texts[0])]
+            else:
+                results = list(self._ner(texts, batch_size=len(texts)))
+            if len(results) != len(texts):
+                raise RuntimeError(
+                    f'NER returned {len(results)} results for {len(texts)} texts.'
+                )
+        except Exception as e:
+            logger.exception('Batched NER call failed.')
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        for pending, entities in zip(batch, results, strict=True):
+            pending.future.set_result(entities)
+
+
+def batched(
+    ner: Callable[..., Any], name: str = ''
+) -> Callable[[str], Entities]:
+    """Wrap a NER pipeline in a MicroBatcher unless batching is disabled."""
+    if NER_BATCH_MAX_SIZE <= 1:
+        return ner
+    return MicroBatcher(ner, name=name)
+
+
+def run_many(
+    ner: Callable[..., Any],
+    texts: list[str],
+    max_batch_size: int = NER_BATCH_MAX_SIZE,
+) -> list[Entities]:
+    """
+    Run several texts through a NER callable as batched calls.
+
+    The pipeline gets all texts at once but runs at most `max_batch_size`
+    of them per forward pass, one at a time when batching is disabled.
+    """
+    if isinstance(ner, MicroBatcher):
+        futures = [ner.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    if len(texts) == 1:
+        return [ner(texts[0])]
+    batch_size = max(1, min(max_batch_size, len(texts)))
+    return list(ner(texts, batch_size=batch_size))
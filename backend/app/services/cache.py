@@ -0,0 +1,190 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.models.pii import PiiOut
+from app.services.base import PiiRule
+
+
+@dataclass
+class _CacheEntry:
+    """Cached clean result. Holds either values or offsets into the text."""
+
+    cleaned_text: str
+    methods: list[str]
+    replaced_count: dict[str, int]
+    replaced_values: dict[str, str] | None
+    value_offsets: dict[str, tuple[int, int]] | None
+    size: int
+    expires_at: float
+
+
+class ResultCache:
+    """
+    Content-addressed LRU/TTL cache of clean results.
+
+    Entries are keyed by a SHA-256 of the rule-set version, the HTML
+    options (`clean_html`, `restore_html` and the parser backend) and the
+    text handed to the clean services. With `hash_only` the
+    cache keeps no plaintext PII: replaced values are stored as offsets and
+    sliced back out of the caller's text on a hit, so only hashes, redacted
+    text and counts stay in memory.
+    """
+
+    _ENTRY_OVERHEAD = 256
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        *,
+        hash_only: bool = True,
+        version: str = '',
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._hash_only = hash_only
+        self._version = version
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(rules: list[PiiRule]) -> str:
+        """Return a version string that changes whenever the rules change."""
+        digest = hashlib.sha256()
+        for rule in rules:
+            pattern = getattr(rule, 'pattern', None)
+            parts = (
+                type(rule).__qualname__,
+                rule.placeholder,
+                getattr(pattern, 'pattern', ''),
+                getattr(rule, 'backend', ''),
+                getattr(rule, 'prescreen', ''),
+                getattr(rule, 'digest', ''),
+                getattr(rule, 'engine', ''),
+            )
+            digest.update('\0'.join(map(str, parts)).encode())
+            digest.update(b'\1')
+        return digest.hexdigest()[:16]
+
+    def _key(
+        self, text: str, clean_html: bool, restore_html: bool, parser: str
+    ) -> str:
+        digest = hashlib.sha256()
+        options = f'{int(clean_html)}\0{int(restore_html)}\0{parser}'
+        digest.update(f'{self._version}\0{options}\0'.encode())
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(
+        self,
+        text: str,
+        clean_html: bool = False,
+        *,
+        restore_html: bool = False,
+        parser: str = '',
+    ) -> PiiOut | None:
+        key = self._key(text, clean_html, restore_html, parser)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._evict(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        if entry.value_offsets is not None:
+            replaced_values = {
+                k: text[start:end]
+                for k, (start, end) in entry.value_offsets.items()
+            }
+        else:
+            replaced_values = dict(entry.replaced_values or {})
+
+        return PiiOut(
+            original_text=text,
+            cleaned_text=entry.cleaned_text,
+            methods=list(entry.methods),
+            replaced_values=replaced_values,
+            replaced_count=dict(entry.replaced_count),
+        )
+
+    def put(
+        self,
+        text: str,
+        result: PiiOut,
+        clean_html: bool = False,
+        *,
+        restore_html: bool = False,
+        parser: str = '',
+    ) -> None:
+        replaced_values: dict[str, str] | None = None
+        value_offsets: dict[str, tuple[int, int]] | None = None
+
+        if self._hash_only:
+            value_offsets = {}
+            for k, value in result.replaced_values.items():
+                start = text.find(value)
+                if start < 0:
+                    # Cannot be rebuilt from the text, so do not cache it.
+                    return
+                value_offsets[k] = (start, start + len(value))
+        else:
+            replaced_values = dict(result.replaced_values)
+
+        size = self._ENTRY_OVERHEAD + len(result.cleaned_text.encode())
+        size += sum(len(k) + 16 for k in result.replaced_count)
+        if replaced_values is not None:
+            size += sum(len(k) + len(v) for k, v in replaced_values.items())
+        else:
+            size += sum(len(k) + 32 for k in result.replaced_values)
+
+        if size > self._max_bytes:
+            return
+
+        entry = _CacheEntry(
+            cleaned_text=result.cleaned_text,
+            methods=list(result.methods),
+            replaced_count=dict(result.replaced_count),
+            replaced_values=replaced_values,
+            value_offsets=value_offsets,
+            size=size,
+            expires_at=time.monotonic() + self._ttl,
+        )
+
+        key = self._key(text, clean_html, restore_html, parser)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self._max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self._max_bytes,
+            }
@@ -0,0 +1,130 @@
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import NER_CHUNK_MAX_TOKENS, NER_CHUNK_OVERLAP_TOKENS
+
+Entities = list[dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    """A window of the original text and the offset it starts at."""
+
+    text: str
+    offset: int
+
+
+class TokenWindowChunker:
+    """
+    Splits long texts into overlapping token windows for NER models.
+
+    Token boundaries come from the pipeline's fast tokenizer when it exposes
+    offset mappings. Without one (e.g. stub callables) whitespace-separated
+    words are used, with half the window size to account for subwords.
+    Windows never cut a token, so every entity lies whole in at least one
+    window as long as it is shorter than the overlap.
+    """
+
+    _WORD = re.compile(r'\S+')
+
+    def __init__(
+        self,
+        tokenizer: Any = None,
+        *,
+        max_tokens: int = NER_CHUNK_MAX_TOKENS,
+        overlap_tokens: int = NER_CHUNK_OVERLAP_TOKENS,
+    ) -> None:
+        self._tokenizer = (
+            tokenizer if getattr(tokenizer, 'is_fast', False) else None
+        )
+
+        if self._tokenizer is not None:
+            special = self._tokenizer.num_special_tokens_to_add()
+            max_tokens = min(
+                max_tokens, self._tokenizer.model_max_length - special
+            )
+        else:
+            max_tokens //= 2
+
+        self._max_tokens = max(1, max_tokens)
+        self._overlap = min(max(0, overlap_tokens), self._max_tokens // 2)
+
+    def _token_spans(self, text: str) -> list[tuple[int, int]]:
+        if self._tokenizer is None:
+            return [m.span() for m in self._WORD.finditer(text)]
+
+        encoding = self._tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        return [
+            (start, end)
+            for start, end in encoding['offset_mapping']
+            if end > start
+        ]
+
+    def split(self, text: str) -> list[TextChunk]:
+        """Return overlapping windows covering the whole text."""
+        spans = self._token_spans(text)
+        if len(spans) <= self._max_tokens:
+            return [TextChunk(text, 0)]
+
+        chunks: list[TextChunk] = []
+        step = self._max_tokens - self._overlap
+        for first in range(0, len(spans), step):
+            last = min(first + self._max_tokens, len(spans)) - 1
+            start, end = spans[first][0], spans[last][1]
+            chunks.append(TextChunk(text[start:end], start))
+            if last == len(spans) - 1:
+                break
+
+        return chunks
+
+    @staticmethod
+    def merge(
+        text: str,
+        chunk_entities: list[tuple[TextChunk, Entities]],
+        label_key: str = 'entity_group',
+    ) -> Entities:
+        """
+        Map chunk entities back to the original text and merge duplicates.
+
+        Overlapping entities with the same label (the same entity seen in two
+        windows, possibly truncated in one of them) are merged into their
+        union, keeping the highest score.
+        """
+        if len(chunk_entities) == 1 and chunk_entities[0][0].offset == 0:
+            return chunk_entities[0][1]
+
+        shifted: Entities = []
+        for chunk, entities in chunk_entities:
+            for e in entities:
+                if 'start' not in e or 'end' not in e:
+                    continue
+                shifted.append(
+                    {
+                        **e,
+                        'start': int(e['start']) + chunk.offset,
+                        'end': int(e['end']) + chunk.offset,
+                    }
+                )
+
+        shifted.sort(key=lambda e: (e['start'], -e['end']))
+
+        merged: Entities = []
+        last_by_label: dict[Any, dict[str, Any]] = {}
+        for e in shifted:
+            label = e.get(label_key)
+            last = last_by_label.get(label)
+            if last is not None and e['start'] < last['end']:
+                last['end'] = max(last['end'], e['end'])
+                if 'score' in e:
+                    last['score'] = max(last.get('score', 0), e['score'])
+                if 'word' in last:
+                    last['word'] = text[last['start'] : last['end']]
+                continue
+
+            merged.append(e)
+            last_by_label[label] = e
+
+        return merged
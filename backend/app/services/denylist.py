@@ -0,0 +1,450 @@
+import bisect
+import contextlib
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pathlib
+import sys
+import tempfile
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+
+from app.core.config import (
+    DENYLIST_COMPILED_PATH,
+    DENYLIST_IGNORE_CASE,
+    DENYLIST_PATH,
+    DENYLIST_WORD_BOUNDARY,
+)
+from app.services.base import PiiRule, RuleResult
+from app.services.span_plan import Span
+from app.services.utils import TextUtils
+
+logger = logging.getLogger('anonify')
+
+DEFAULT_LABEL = 'DENYLIST'
+
+_MAGIC = b'ANONDL1\n'
+# Arrays of the compiled format, in file order, with their typecodes.
+_ARRAYS = (
+    ('offsets', 'I'),
+    ('chars', 'I'),
+    ('targets', 'I'),
+    ('fail', 'I'),
+    ('terms', 'i'),
+    ('term_links', 'I'),
+    ('lengths', 'I'),
+    ('labels', 'H'),
+)
+
+
+def fold(text: str) -> str:
+    """Case-fold `text` one character to one character, keeping offsets."""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded
+    # A few characters fold to several ('ß' -> 'ss'); those are kept as is.
+    return ''.join(f if len(f := ch.casefold()) == 1 else ch for ch in text)
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def parse_entries(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Yield `(term, label)` pairs from deny list lines.
+
+    Each line is a term, optionally followed by a tab and a label; blank
+    lines and lines starting with '#' are skipped.
+    """
+    for line in lines:
+        term, _, label = line.rstrip('\r\n').partition('\t')
+        term = term.strip()
+        if term and not term.startswith('#'):
+            yield term, label.strip() or DEFAULT_LABEL
+
+
+class DenyList:
+    """
+    Aho-Corasick automaton over the terms of a deny list.
+
+    States are numbered in breadth-first order and stored in flat arrays:
+    the transitions of state `s` are `chars[offsets[s]:offsets[s + 1]]`
+    (sorted code points) and the matching `targets`. `fail` is the failure
+    link, `terms` the index of the term ending in the state (or -1) and
+    `term_links` the nearest state on the failure chain where a term ends.
+    The arrays are written to a compiled file as they are, so loading one
+    is a memory map rather than a rebuild, and matching costs one
+    transition per text character however many terms there are.
+    """
+
+    def __init__(
+        self,
+        arrays: dict[str, 'array[int] | memoryview'],
+        label_names: list[str],
+        *,
+        ignore_case: bool,
+        digest: str = '',
+    ) -> None:
+        for name, _ in _ARRAYS:
+            setattr(self, f'_{name}', arrays[name])
+        self.label_names = label_names
+        self.ignore_case = ignore_case
+        self.digest = digest
+
+        # Most text characters leave the root; a dict keeps that step cheap.
+        start, end = self._offsets[0], self._offsets[1]
+        self._root = dict(
+            zip(self._chars[start:end], self._targets[start:end], strict=True)
+        )
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @classmethod
+    def build(
+        cls,
+        entries: Iterable[tuple[str, str]],
+        *,
+        ignore_case: bool = True,
+        digest: str = '',
+    ) -> 'DenyList':
+        """Build the automaton; the first label of a repeated term wins."""
+        children: list[dict[int, int]] = [{}]
+        terms = array('i', [-1])
+        lengths = array('I')
+        labels = array('H')
+        label_names: list[str] = []
+        label_ids: dict[str, int] = {}
+
+        for term, label in entries:
+            key = fold(term) if ignore_case else term
+            if not key:
+                continue
+            state = 0
+            for code in map(ord, key):
+                nxt = children[state].get(code)
+                if nxt is None:
+                    nxt = children[state][code] = len(children)
+                    children.append({})
+                    terms.append(-1)
+                state = nxt
+            if terms[state] >= 0:
+                continue
+            if label not in label_ids:
+                label_ids[label] = len(label_names)
+                label_names.append(label)
+            terms[state] = len(lengths)
+            lengths.append(len(key))
+            labels.append(label_ids[label])
+
+        # Renumber states breadth-first, so failure links point backwards.
+        order = [0]
+        for state in order:
+            order.extend(
+                children[state][code] for code in sorted(children[state])
+            )
+        number = array('I', bytes(4 * len(order)))
+        for new, old in enumerate(order):
+            number[old] = new
+
+        offsets = array('I', [0])
+        chars = array('I')
+        targets = array('I')
+        fail = array('I', bytes(4 * len(order)))
+        term_links = array('I', bytes(4 * len(order)))
+        new_terms = array('i', (terms[old] for old in order))
+
+        for old in order:
+            for code in sorted(children[old]):
+                chars.append(code)
+                targets.append(number[children[old][code]])
+            offsets.append(len(chars))
+
+        queue = deque(targets[offsets[0] : offsets[1]])
+        while queue:
+            state = queue.popleft()
+            for i in range(offsets[state], offsets[state + 1]):
+                code, child = chars[i], targets[i]
+                link = fail[state]
+                while True:
+                    nxt = cls._step(offsets, chars, targets, link, code)
+                    if nxt is not None or link == 0:
+                        break
+                    link = fail[link]
+                fail[child] = nxt if nxt is not None else 0
+                term_links[child] = (
+                    fail[child]
+                    if new_terms[fail[child]] >= 0
+                    else term_links[fail[child]]
+                )
+                queue.append(child)
+
+        arrays = {
+            'offsets': offsets,
+            'chars': chars,
+            'targets': targets,
+            'fail': fail,
+            'terms': new_terms,
+            'term_links': term_links,
+            'lengths': lengths,
+            'labels': labels,
+        }
+        return cls(arrays, label_names, ignore_case=ignore_case, digest=digest)
+
+    @staticmethod
+    def _step(offsets, chars, targets, state: int, code: int) -> int | None:
+        lo, hi = offsets[state], offsets[state + 1]
+        i = bisect.bisect_left(chars, code, lo, hi)
+        if i < hi and chars[i] == code:
+            return targets[i]
+        return None
+
+    def save(self, path: str) -> None:
+        """Write the compiled automaton atomically to `path`."""
+        header = json.dumps(
+            {
+                'byteorder': sys.byteorder,
+                'digest': self.digest,
+                'ignore_case': self.ignore_case,
+                'labels': self.label_names,
+                'sizes': [len(getattr(self, f'_{n}')) for n, _ in _ARRAYS],
+            }
+        ).encode()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.denylist-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(len(header).to_bytes(4, 'little'))
+                f.write(header)
+                for name, typecode in _ARRAYS:
+                    # Pad so every array starts aligned to its item size.
+                    f.write(b'\0' * (-f.tell() % 8))
+                    values = getattr(self, f'_{name}')
+                    f.write(array(typecode, values).tobytes())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+    @classmethod
+    def open(cls, path: str) -> 'DenyList':
+        """Memory-map a compiled automaton written by `save`."""
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f'{path} is not a compiled deny list.')
+        pos = len(_MAGIC) + 4
+        size = int.from_bytes(data[len(_MAGIC) : pos], 'little')
+        header = json.loads(data[pos : pos + size])
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was compiled on another platform.')
+        pos += size
+
+        view = memoryview(data)
+        arrays: dict[str, memoryview] = {}
+        for (name, typecode), length in zip(
+            _ARRAYS, header['sizes'], strict=True
+        ):
+            pos += -pos % 8
+            end = pos + length * array(typecode).itemsize
+            arrays[name] = view[pos:end].cast(typecode)
+            pos = end
+        return cls(
+            arrays,
+            header['labels'],
+            ignore_case=header['ignore_case'],
+            digest=header['digest'],
+        )
+
+    def find(
+        self, text: str, word_boundary: bool = True
+    ) -> list[tuple[int, int, str]]:
+        """
+        Return the `(start, end, label)` matches in `text`.
+
+        Matches are non-overlapping, leftmost first and then longest. With
+        `word_boundary`, a match must not start or end inside a word.
+        """
+        offsets, chars, targets = self._offsets, self._chars, self._targets
+        fail, terms, term_links = self._fail, self._terms, self._term_links
+        lengths, root = self._lengths, self._root
+        bisect_left = bisect.bisect_left
+        key = fold(text) if self.ignore_case else text
+        size = len(text)
+
+        # The longest acceptable match at each start position. A match
+        # ending at a position can be contained in one that starts earlier,
+        # so every term ending there is kept, not only the longest.
+        longest: dict[int, tuple[int, int]] = {}
+        state = 0
+        for pos, code in enumerate(map(ord, key)):
+            while state:
+                lo, hi = offsets[state], offsets[state + 1]
+                i = bisect_left(chars, code, lo, hi)
+                if i < hi and chars[i] == code:
+                    state = targets[i]
+                    break
+                state = fail[state]
+            else:
+                state = root.get(code, 0)
+                if not state:
+                    continue
+
+            end = pos + 1
+            if (
+                word_boundary
+                and end < size
+                and _is_word(text[end])
+                and _is_word(text[pos])
+            ):
+                continue
+            hit = state if terms[state] >= 0 else term_links[state]
+            while hit:
+                term = terms[hit]
+                start = end - lengths[term]
+                if (
+                    not word_boundary
+                    or start == 0
+                    or not (_is_word(text[start - 1]) and _is_word(text[start]))
+                ):
+                    # Matches come by end, so a later one is a longer one.
+                    longest[start] = (end, term)
+                hit = term_links[hit]
+
+        matches: list[tuple[int, int, str]] = []
+        cursor = 0
+        for start in sorted(longest):
+            end, term = longest[start]
+            if start >= cursor:
+                matches.append(
+                    (start, end, self.label_names[self._labels[term]])
+                )
+                cursor = end
+        return matches
+
+
+def _digest(source: bytes, ignore_case: bool) -> str:
+    digest = hashlib.sha256(source)
+    digest.update(b'\0ignore_case=%d' % ignore_case)
+    return digest.hexdigest()
+
+
+def _build(source: bytes, ignore_case: bool, digest: str) -> DenyList:
+    return DenyList.build(
+        parse_entries(source.decode('utf-8').splitlines()),
+        ignore_case=ignore_case,
+        digest=digest,
+    )
+
+
+def compile_denylist(
+    path: str, *, ignore_case: bool = True, compiled_path: str = ''
+) -> DenyList:
+    """Build the automaton of the deny list at `path` and write it."""
+    source = pathlib.Path(path).read_bytes()
+    denylist = _build(source, ignore_case, _digest(source, ignore_case))
+    denylist.save(compiled_path or f'{path}.automaton')
+    return denylist
+
+
+def load_denylist(
+    path: str, *, ignore_case: bool = True, compiled_path: str = ''
+) -> DenyList:
+    """
+    Load the deny list at `path` through its compiled automaton.
+
+    The compiled file (by default `path` + '.automaton') is used when it was
+    built from the same list and options; otherwise the automaton is built
+    and the file written for the next start, if the location is writable.
+    """
+    source = pathlib.Path(path).read_bytes()
+    digest = _digest(source, ignore_case)
+    compiled_path = compiled_path or f'{path}.automaton'
+
+    try:
+        denylist = DenyList.open(compiled_path)
+        if denylist.digest == digest:
+            return denylist
+    except (OSError, ValueError, KeyError):
+        pass
+
+    denylist = _build(source, ignore_case, digest)
+    try:
+        denylist.save(compiled_path)
+    except OSError as e:
+        logger.warning('Could not write the compiled deny list: %s', e)
+    return denylist
+
+
+class DenyListRule(PiiRule):
+    """
+    Redacts the terms of a deny list, e.g. customer names or hostnames.
+
+    Each term is redacted with its own label from the list, numbered and
+    namespaced like any other rule, e.g. [CUSTOMER_1].
+    """
+
+    def __init__(self, denylist: DenyList, word_boundary: bool = True):
+        self.denylist = denylist
+        self.word_boundary = word_boundary
+
+    @property
+    def placeholder(self) -> str:
+        return DEFAULT_LABEL
+
+    @property
+    def digest(self) -> str:
+        return f'{self.denylist.digest}:{int(self.word_boundary)}'
+
+    def detect(self, text: str, method: str = 'regex') -> list[Span]:
+        return [
+            Span(start, end, label, method)
+            for start, end, label in self.denylist.find(
+                text, self.word_boundary
+            )
+        ]
+
+    def evaluate(self, text: str, method: str = 'regex') -> RuleResult:
+        entities = [
+            {'start': span.start, 'end': span.end, 'entity_group': span.label}
+            for span in self.detect(text, method)
+        ]
+        text, replaced_count, replaced_values = (
+            TextUtils.redact_entities_with_counter(
+                text, entities, method, trim_spans=False
+            )
+        )
+        return RuleResult(text, replaced_values, replaced_count)
+
+    def apply(self, text: str, method: str = 'regex') -> str:
+        return self.evaluate(text, method).text
+
+    def replaced_values(
+        self, text: str, method: str = 'regex'
+    ) -> dict[str, str]:
+        return self.evaluate(text, method).replaced_values
+
+    def replaced_count(
+        self, text: str, method: str = 'regex'
+    ) -> dict[str, int]:
+        return self.evaluate(text, method).replaced_count
+
+
+def build_denylist_rule() -> DenyListRule | None:
+    """Return the configured deny list rule, or None without DENYLIST_PATH."""
+    if not DENYLIST_PATH:
+        return None
+    return DenyListRule(
+        load_denylist(
+            DENYLIST_PATH,
+            ignore_case=DENYLIST_IGNORE_CASE,
+            compiled_path=DENYLIST_COMPILED_PATH,
+        ),
+        word_boundary=DENYLIST_WORD_BOUNDARY,
+    )
@@ -0,0 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import MODEL_EXECUTOR_WORKERS
+
+# Bounded pool for model loading, chunking and unbatched inference, kept
+# apart from the default executor so NER calls cannot starve other
+# threadpool work. Batched inference runs on the MicroBatcher threads and
+# async callers await its futures, so this pool does not cap batch sizes.
+model_executor = ThreadPoolExecutor(
+    max_workers=MODEL_EXECUTOR_WORKERS, thread_name_prefix='model-inference'
+)
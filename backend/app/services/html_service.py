@@ -1,17 +1,346 @@
-from bs4 import BeautifulSoup
+import bisect
+import html
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+from app.core.config import HTML_PARSER_BACKEND
+
+# Elements whose content is not document text, as in BeautifulSoup.get_text.
+_SKIPPED_ELEMENTS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+
+_CDATA_PREFIX = 'CDATA['
+
+# Attributes whose values are text or URLs that can carry PII.
+_TEXT_ATTRIBUTES = frozenset(
+    {
+        'alt',
+        'aria-label',
+        'content',
+        'href',
+        'label',
+        'placeholder',
+        'src',
+        'title',
+        'value',
+    }
+)
+# An attribute of a start tag, as html.parser's tolerant matching finds it.
+_ATTRIBUTE = re.compile(
+    r'((?<=[\'"\s/])[^\s/>][^\s/=>]*)'
+    r'(?:\s*=+\s*(\'[^\']*\'|"[^"]*"|(?![\'"])[^>\s]*))?'
+)
+# Character references html.unescape decodes in any context.
+_REFERENCE = re.compile(r'&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);')
+# Keeps an attribute value apart from the text around it; maps to no markup.
+_SEPARATOR = '\n'
+
+
+@dataclass(slots=True)
+class HtmlDocument:
+    """
+    Text extracted from an HTML document, with a map back to the markup.
+
+    The text is a sequence of segments: segment `i` starts at
+    `text_starts[i]` in the text and comes from
+    `html[html_starts[i]:html_ends[i]]`. Verbatim segments are character
+    data, one text character per markup character; the others are
+    character references and are only ever replaced as a whole.
+
+    With `attributes`, the values of text-carrying attributes such as
+    `href`, `title` and `alt` are segments too, placed before the element's
+    content and set apart by a newline that maps to no markup. Spans in
+    them are replaced like any other text, so no PII survives in the tag.
+    """
+
+    html: str
+    text: str
+    text_starts: list[int] = field(default_factory=list)
+    html_starts: list[int] = field(default_factory=list)
+    html_ends: list[int] = field(default_factory=list)
+    verbatim: list[bool] = field(default_factory=list)
+
+    def _html_start(self, start: int) -> tuple[int, int]:
+        seg = bisect.bisect_right(self.text_starts, start) - 1
+        if self.verbatim[seg]:
+            return seg, self.html_starts[seg] + start - self.text_starts[seg]
+        return seg, self.html_starts[seg]
+
+    def _html_end(self, end: int) -> tuple[int, int]:
+        seg = bisect.bisect_left(self.text_starts, end) - 1
+        if self.verbatim[seg]:
+            return seg, self.html_starts[seg] + end - self.text_starts[seg]
+        return seg, self.html_ends[seg]
+
+    def html_span(self, start: int, end: int) -> tuple[int, int]:
+        """Map a non-empty text span to the markup range it comes from."""
+        return self._html_start(start)[1], self._html_end(end)[1]
+
+    def restore(self, replacements: Iterable[tuple[int, int, str]]) -> str:
+        """
+        Return the HTML with text spans replaced, markup left untouched.
+
+        `replacements` are non-overlapping `(start, end, replacement)`
+        triples in text offsets. A span crossing tags keeps the tags: the
+        replacement goes where the span starts and its remaining text is
+        removed from the following segments.
+        """
+        markup = self.html
+        parts: list[str] = []
+        cursor = 0
+
+        for start, end, replacement in sorted(replacements):
+            if start >= end:
+                continue
+            first, html_start = self._html_start(start)
+            last, html_end = self._html_end(end)
+
+            parts.append(markup[cursor:html_start])
+            parts.append(html.escape(replacement, quote=False))
+            for seg in range(first + 1, last + 1):
+                parts.append(
+                    markup[self.html_ends[seg - 1] : self.html_starts[seg]]
+                )
+            cursor = html_end
+
+        parts.append(markup[cursor:])
+        return ''.join(parts)
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text segments and their markup offsets as it is fed."""
+
+    def __init__(self, markup: str, attributes: bool = False) -> None:
+        super().__init__(convert_charrefs=False)
+        self.document = HtmlDocument(html=markup, text='')
+        self._markup = markup
+        self._attributes = attributes
+        self._line_starts = [0, *(m.end() for m in re.finditer('\n', markup))]
+        self._pieces: list[str] = []
+        self._length = 0
+        self._skip_depth = 0
+
+    def _offset(self) -> int:
+        # Offset in the markup of the construct being handled.
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def _add(
+        self, piece: str, html_start: int, html_end: int, verbatim: bool
+    ) -> None:
+        if not piece or self._skip_depth:
+            return
+        doc = self.document
+        doc.text_starts.append(self._length)
+        doc.html_starts.append(html_start)
+        doc.html_ends.append(html_end)
+        doc.verbatim.append(verbatim)
+        self._pieces.append(piece)
+        self._length += len(piece)
+
+    def _add_reference(self, length: int) -> None:
+        start = self._offset()
+        end = start + length
+        if self._markup.startswith(';', end):
+            end += 1
+        self._add(html.unescape(self._markup[start:end]), start, end, False)
+
+    def _add_attribute_value(self, start: int, end: int) -> None:
+        self._add(_SEPARATOR, start, start, False)
+        cursor = start
+        for ref in _REFERENCE.finditer(self._markup, start, end):
+            self._add(
+                self._markup[cursor : ref.start()], cursor, ref.start(), True
+            )
+            self._add(html.unescape(ref.group()), ref.start(), ref.end(), False)
+            cursor = ref.end()
+        self._add(self._markup[cursor:end], cursor, end, True)
+        self._add(_SEPARATOR, end, end, False)
+
+    def _add_attributes(self, tag: str) -> None:
+        tag_start = self._offset()
+        raw = self.get_starttag_text() or ''
+        for attr in _ATTRIBUTE.finditer(raw, 1 + len(tag)):
+            name, value = attr.group(1).lower(), attr.group(2)
+            if name not in _TEXT_ATTRIBUTES or not value:
+                continue
+            start, end = tag_start + attr.start(2), tag_start + attr.end(2)
+            if value[0] in '\'"':
+                start, end = start + 1, end - 1
+            if start < end:
+                self._add_attribute_value(start, end)
+
+    def handle_starttag(
+        self, tag: str, attrs: list[tuple[str, str | None]]
+    ) -> None:
+        if self._attributes:
+            self._add_attributes(tag)
+        if tag in _SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_ELEMENTS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        start = self._offset()
+        self._add(data, start, start + len(data), True)
+
+    def handle_entityref(self, name: str) -> None:
+        self._add_reference(len(name) + 1)
+
+    def handle_charref(self, name: str) -> None:
+        self._add_reference(len(name) + 2)
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith(_CDATA_PREFIX):
+            content = data[len(_CDATA_PREFIX) :]
+            start = self._offset() + len('<![') + len(_CDATA_PREFIX)
+            self._add(content, start, start + len(content), True)
+
+    def finish(self) -> HtmlDocument:
+        self.close()
+        self.document.text = ''.join(self._pieces)
+        return self.document
+
+
+# Returns the text of an HTML document, without offsets.
+TextExtractor = Callable[[str], str]
+# Builds a text extractor, given the size of the chunks to feed it.
+ParserFactory = Callable[[int], TextExtractor]
+
+_PARSERS: dict[str, ParserFactory] = {}
+
+
+def register_parser(name: str) -> Callable[[ParserFactory], ParserFactory]:
+    """Register an HTML parser backend under a config name."""
+
+    def decorator(factory: ParserFactory) -> ParserFactory:
+        _PARSERS[name] = factory
+        return factory
+
+    return decorator
+
+
+def available_parsers() -> list[str]:
+    return sorted(_PARSERS)
+
+
+def _feed_chunks(markup: str, chunk_size: int) -> Iterable[str]:
+    return (
+        markup[pos : pos + chunk_size]
+        for pos in range(0, len(markup), chunk_size)
+    )
+
+
+def _extract(
+    markup: str, chunk_size: int, attributes: bool = False
+) -> HtmlDocument:
+    parser = _TextExtractor(markup, attributes)
+    for chunk in _feed_chunks(markup, chunk_size):
+        parser.feed(chunk)
+    return parser.finish()
+
+
+@register_parser('stdlib')
+def _stdlib_parser(chunk_size: int) -> TextExtractor:
+    return lambda markup: _extract(markup, chunk_size).text
+
+
+class _TextTarget:
+    """lxml parser target collecting text outside skipped elements."""
+
+    def __init__(self) -> None:
+        self._pieces: list[str] = []
+        self._skip_depth = 0
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        if tag in _SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+
+    def end(self, tag: str) -> None:
+        if tag in _SKIPPED_ELEMENTS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._pieces.append(data)
+
+    def close(self) -> str:
+        return ''.join(self._pieces)
+
+
+@register_parser('lxml')
+def _lxml_parser(chunk_size: int) -> TextExtractor:
+    from lxml import etree
+
+    def extract(markup: str) -> str:
+        # Events go straight to the target; libxml2 builds no tree.
+        parser = etree.HTMLParser(target=_TextTarget(), no_network=True)
+        for chunk in _feed_chunks(markup, chunk_size):
+            parser.feed(chunk)
+        return parser.close()
+
+    return extract
+
+
+@register_parser('selectolax')
+def _selectolax_parser(chunk_size: int) -> TextExtractor:
+    from selectolax.lexbor import LexborHTMLParser
+
+    skipped = list(_SKIPPED_ELEMENTS)
+
+    def extract(markup: str) -> str:
+        tree = LexborHTMLParser(markup)
+        tree.strip_tags(skipped)
+        if tree.root is None:
+            return ''
+        return tree.root.text(deep=True, separator='', strip=False)
+
+    return extract
 
 
 class HtmlService:
-    def __init__(self):
-        self._state = None
+    """
+    Stateless HTML text extraction.
 
-    def clean(self, html: str) -> str:
-        text = BeautifulSoup(html, 'html.parser').get_text()
-        self._state = html
-        return text
+    Documents are fed to the stdlib HTMLParser in chunks and only the text
+    segments and their offsets are kept, no element tree. The returned
+    HtmlDocument carries everything `restore` needs, so one instance is
+    safe to share between concurrent requests.
+
+    `parser` picks the backend used by `clean`: 'stdlib', or 'lxml' and
+    'selectolax' when installed, which are several times faster. They give
+    the same text on well-formed documents but no offsets, so `extract`
+    always uses the stdlib parser, and also extracts the text-carrying
+    attribute values so `restore` can redact them.
+    """
 
-    def restore(self, text: str) -> str:
-        if self._state is None:
-            raise ValueError('No state available to restore HTML.')
+    def __init__(
+        self, parser: str = HTML_PARSER_BACKEND, chunk_size: int = 64 * 1024
+    ) -> None:
+        try:
+            factory = _PARSERS[parser]
+        except KeyError:
+            raise ValueError(
+                f'Unknown HTML parser {parser!r}, '
+                f'expected one of {available_parsers()}.'
+            ) from None
+
+        self.parser = parser
+        self.chunk_size = chunk_size
+        self._clean = factory(chunk_size)
+
+    def extract(self, html: str) -> HtmlDocument:
+        return _extract(html, self.chunk_size, attributes=True)
+
+    def clean(self, html: str) -> str:
+        return self._clean(html)
 
-        return self._state
+    def restore(
+        self,
+        document: HtmlDocument,
+        replacements: Iterable[tuple[int, int, str]],
+    ) -> str:
+        return document.restore(replacements)
@@ -0,0 +1,186 @@
+import logging
+import pathlib
+import platform
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import (
+    HF_TOKEN,
+    MODEL_WORKER_ADDRESS,
+    MODEL_WORKER_AUTHKEY,
+    ONNX_CACHE_DIR,
+    STUB_NER_LATENCY_MS,
+    STUB_NER_LATENCY_MS_PER_KCHAR,
+    STUB_NER_LEXICON_PATH,
+)
+from app.services.model_worker import RemoteNer, default_address
+from app.services.stub_ner import StubNer
+
+logger = logging.getLogger('anonify.models')
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Hugging Face model id and how its token predictions are aggregated."""
+
+    model: str
+    aggregation_strategy: str
+
+
+# Builds a NER callable for a spec. `pipeline` is the transformers pipeline
+# factory, passed in so every backend returns the same entity dicts.
+BackendFactory = Callable[[ModelSpec, Callable[..., Any]], Callable[..., Any]]
+
+_BACKENDS: dict[str, BackendFactory] = {}
+
+
+def register_backend(
+    name: str,
+) -> Callable[[BackendFactory], BackendFactory]:
+    """Register an inference backend factory under a config name."""
+
+    def decorator(factory: BackendFactory) -> BackendFactory:
+        _BACKENDS[name] = factory
+        return factory
+
+    return decorator
+
+
+def available_backends() -> list[str]:
+    return sorted(_BACKENDS)
+
+
+def build_ner(
+    spec: ModelSpec, backend: str, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    """Build the NER callable for `spec` with the given backend."""
+    try:
+        factory = _BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f'Unknown inference backend {backend!r}, '
+            f'expected one of {available_backends()}.'
+        ) from None
+
+    logger.info(f'Building {spec.model} with the {backend} backend.')
+    return factory(spec, pipeline)
+
+
+def _require_transformers(pipeline: Callable[..., Any] | None) -> None:
+    if pipeline is None:
+        raise ImportError(
+            'This backend requires the `prod` dependency group '
+            '(transformers and torch).'
+        )
+
+
+@register_backend('torch')
+def _torch_backend(
+    spec: ModelSpec, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    _require_transformers(pipeline)
+    return pipeline(
+        task='token-classification',
+        model=spec.model,
+        tokenizer=spec.model,
+        token=HF_TOKEN,
+        aggregation_strategy=spec.aggregation_strategy,
+    )
+
+
+def _onnx_pipeline(
+    spec: ModelSpec, pipeline: Callable[..., Any], *, quantize: bool
+) -> Callable[..., Any]:
+    _require_transformers(pipeline)
+    try:
+        from optimum.onnxruntime import (
+            ORTModelForTokenClassification,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise ImportError(
+            'ONNX backends require the `onnx` dependency group '
+            '(optimum[onnxruntime]).'
+        ) from e
+
+    export_dir = pathlib.Path(ONNX_CACHE_DIR) / spec.model.replace('/', '--')
+    if not (export_dir / 'model.onnx').exists():
+        logger.info(f'Exporting {spec.model} to ONNX in {export_dir}.')
+        model = ORTModelForTokenClassification.from_pretrained(
+            spec.model, export=True, token=HF_TOKEN
+        )
+        model.save_pretrained(export_dir)
+
+    file_name = 'model.onnx'
+    if quantize:
+        file_name = 'model_quantized.onnx'
+        if not (export_dir / file_name).exists():
+            logger.info(f'Quantizing {spec.model} to dynamic int8.')
+            is_arm = platform.machine().lower() in {'arm64', 'aarch64'}
+            qconfig = (
+                AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+                if is_arm
+                else AutoQuantizationConfig.avx512_vnni(
+                    is_static=False, per_channel=False
+                )
+            )
+            quantizer = ORTQuantizer.from_pretrained(
+                export_dir, file_name='model.onnx'
+            )
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+
+    model = ORTModelForTokenClassification.from_pretrained(
+        export_dir, file_name=file_name
+    )
+    tokenizer = AutoTokenizer.from_pretrained(spec.model, token=HF_TOKEN)
+    return pipeline(
+        task='token-classification',
+        model=model,
+        tokenizer=tokenizer,
+        aggregation_strategy=spec.aggregation_strategy,
+    )
+
+
+@register_backend('onnx')
+def _onnx_backend(
+    spec: ModelSpec, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    return _onnx_pipeline(spec, pipeline, quantize=False)
+
+
+@register_backend('onnx-int8')
+def _onnx_int8_backend(
+    spec: ModelSpec, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    return _onnx_pipeline(spec, pipeline, quantize=True)
+
+
+@register_backend('remote')
+def _remote_backend(
+    spec: ModelSpec, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    ner = RemoteNer(
+        spec.model,
+        address=MODEL_WORKER_ADDRESS or default_address(),
+        authkey=MODEL_WORKER_AUTHKEY.encode(),
+    )
+    # Fails fast when no worker is listening, so the rule is marked failed.
+    if spec.model not in ner.ping():
+        raise ValueError(f'Model worker does not serve {spec.model}.')
+    return ner
+
+
+@register_backend('stub')
+def _stub_backend(
+    spec: ModelSpec, pipeline: Callable[..., Any]
+) -> Callable[..., Any]:
+    latency = {
+        'latency_ms': STUB_NER_LATENCY_MS,
+        'latency_ms_per_kchar': STUB_NER_LATENCY_MS_PER_KCHAR,
+    }
+    if STUB_NER_LEXICON_PATH:
+        return StubNer.from_file(STUB_NER_LEXICON_PATH, **latency)
+    return StubNer(**latency)
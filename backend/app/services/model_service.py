@@ -1,57 +1,310 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
 from collections.abc import Callable
+from enum import StrEnum
 from typing import Any
 
-from app.core.config import HF_TOKEN
-from app.services.base import CleanedTextResult, PiiRule, RuleResult
+from app.core.config import (
+    MODEL_BACKEND_AB_AI,
+    MODEL_BACKEND_BERT_BASE,
+    MODEL_LOAD_RETRY_SECONDS,
+    MODEL_NOT_READY_POLICY,
+    MODEL_PRESCREEN_AB_AI,
+    MODEL_PRESCREEN_BERT_BASE,
+)
+from app.core.metrics import PRESCREEN_CHARS, PRESCREEN_TEXTS, RULE_SECONDS
+from app.services.base import (
+    CleanedTextResult,
+    Detection,
+    PiiRule,
+    RuleResult,
+)
+from app.services.batching import MicroBatcher, batched, run_many
+from app.services.chunking import TextChunk, TokenWindowChunker
+from app.services.executor import model_executor
+from app.services.inference import ModelSpec, build_ner
+from app.services.prescreen import build_prescreen
+from app.services.span_plan import Span, entity_spans
 from app.services.utils import TextUtils
-from transformers import pipeline
+
+try:
+    from transformers import pipeline
+except ImportError:
+    # Only the 'stub' and 'remote' backends work without transformers.
+    pipeline = None
+
+logger = logging.getLogger('anonify.models')
+
+
+class ModelLoadState(StrEnum):
+    NOT_LOADED = 'not_loaded'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
 
 
 class BaseModelRule(PiiRule, ABC):
+    """
+    Base class for NER model rules.
+
+    The pipeline is built lazily: either by `load()` (e.g. from a background
+    thread at startup) or on first use. Concurrent callers wait for the load
+    in progress instead of building the pipeline twice. With a `prescreen`
+    mode other than 'off', NER only runs on the sentences that may hold an
+    entity, see Prescreen.
+    """
+
+    _spec: ModelSpec
     _pii_ner: Callable[[str], list[dict[str, Any]]]
+    _chunker: TokenWindowChunker
+
+    def __init__(self, backend: str = 'torch', prescreen: str = 'off') -> None:
+        self._backend = backend
+        self._prescreen_mode = prescreen
+        self._prescreen = build_prescreen(prescreen)
+        self._load_lock = threading.Lock()
+        self._load_state = ModelLoadState.NOT_LOADED
+        self._load_error: str | None = None
+        self._failed_at = 0.0
+        self._retry_lock = threading.Lock()
 
     @property
     @abstractmethod
     def placeholder(self) -> str: ...
 
-    def _apply_rule_and_get_replaced_values(
-        self, text: str, entities: list[dict[str, Any]], method: str
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def prescreen(self) -> str:
+        return self._prescreen_mode
+
+    @property
+    def spec(self) -> ModelSpec:
+        return self._spec
+
+    def _build_pipeline(self) -> Callable[..., Any]:
+        return build_ner(self._spec, self._backend, pipeline)
+
+    @property
+    def load_state(self) -> ModelLoadState:
+        return self._load_state
+
+    @property
+    def load_error(self) -> str | None:
+        """Why the last load failed, while the state is FAILED."""
+        if self._load_state is ModelLoadState.FAILED:
+            return self._load_error
+        return None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._load_state is ModelLoadState.READY
+
+    def retry_failed_load(self) -> threading.Thread | None:
+        """
+        Reload a failed model in the background once it is due.
+
+        A retry is due MODEL_LOAD_RETRY_SECONDS after the last failure.
+        Returns the loader thread, or None when no retry was started.
+        """
+        with self._retry_lock:
+            if self._load_state is not ModelLoadState.FAILED:
+                return None
+            if time.monotonic() - self._failed_at < MODEL_LOAD_RETRY_SECONDS:
+                return None
+            self._load_state = ModelLoadState.LOADING
+        return load_in_background([self])
+
+    def load(self) -> None:
+        """Build the pipeline unless it is already loaded."""
+        if self.is_ready:
+            return
+
+        with self._load_lock:
+            if self.is_ready:
+                return
+
+            self._load_state = ModelLoadState.LOADING
+            logger.info(f'Loading model {self.placeholder}.')
+            try:
+                self._set_pipeline(self._build_pipeline())
+            except Exception as e:
+                self._load_error = f'{type(e).__name__}: {e}'
+                self._failed_at = time.monotonic()
+                self._load_state = ModelLoadState.FAILED
+                logger.exception(f'Failed to load model {self.placeholder}.')
+                raise
+
+            self._load_error = None
+            self._load_state = ModelLoadState.READY
+            logger.info(f'Model {self.placeholder} is ready.')
+
+    def _set_pipeline(self, ner: Callable[..., Any]) -> None:
+        self._pii_ner = batched(ner, name=self.placeholder)
+        self._chunker = TokenWindowChunker(getattr(ner, 'tokenizer', None))
+
+    def _windows(self, text: str) -> list[TextChunk]:
+        """The token windows of `text` to run NER on."""
+        if self._prescreen is None:
+            return self._chunker.split(text)
+
+        segments = self._prescreen.segments(text)
+        inferred = sum(len(segment.text) for segment in segments)
+        if not segments:
+            outcome = 'skipped'
+        elif inferred == len(text):
+            outcome = 'full'
+        else:
+            outcome = 'partial'
+        PRESCREEN_TEXTS.inc(self.placeholder, outcome)
+        PRESCREEN_CHARS.inc(self.placeholder, 'inferred', amount=inferred)
+        PRESCREEN_CHARS.inc(
+            self.placeholder, 'skipped', amount=len(text) - inferred
+        )
+
+        return [
+            TextChunk(window.text, segment.offset + window.offset)
+            for segment in segments
+            for window in self._chunker.split(segment.text)
+        ]
+
+    def _chunk_texts(self, texts: list[str]) -> list[list[TextChunk]]:
+        self.load()
+        return [self._windows(text) for text in texts]
+
+    @staticmethod
+    def _merge_results(
+        texts: list[str],
+        chunked: list[list[TextChunk]],
+        results: list[list[dict[str, Any]]],
+    ) -> list[list[dict[str, Any]]]:
+        entities = iter(results)
+        return [
+            TextUtils.normalize_entity_labels(
+                TokenWindowChunker.merge(
+                    text, [(chunk, next(entities)) for chunk in chunks]
+                )
+            )
+            for text, chunks in zip(texts, chunked, strict=True)
+        ]
+
+    def extract_entities_many(
+        self, texts: list[str]
+    ) -> list[list[dict[str, Any]]]:
+        """Extract entities for several texts with one batched NER call."""
+        if not texts:
+            return []
+
+        chunked = self._chunk_texts(texts)
+        results = run_many(
+            self._pii_ner,
+            [chunk.text for chunks in chunked for chunk in chunks],
+        )
+        return self._merge_results(texts, chunked, results)
+
+    async def extract_entities_many_async(
+        self, texts: list[str]
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Like `extract_entities_many`, without holding a thread during NER.
+
+        Loading and chunking run in the model executor. The chunks then go
+        straight to the MicroBatcher and only its futures are awaited, so
+        any number of concurrent requests can share one batch. Unbatched
+        pipelines run in the executor.
+        """
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        chunked = await loop.run_in_executor(
+            model_executor, self._chunk_texts, texts
+        )
+        inputs = [chunk.text for chunks in chunked for chunk in chunks]
+        if isinstance(self._pii_ner, MicroBatcher):
+            results = await asyncio.gather(
+                *(
+                    asyncio.wrap_future(self._pii_ner.submit(text))
+                    for text in inputs
+                )
+            )
+        else:
+            results = await loop.run_in_executor(
+                model_executor, run_many, self._pii_ner, inputs
+            )
+        return self._merge_results(texts, chunked, list(results))
+
+    def extract_entities(self, text: str) -> list[dict[str, Any]]:
+        return self.extract_entities_many([text])[0]
+
+    def detect_many(self, texts: list[str], method: str) -> list[list[Span]]:
+        return [
+            entity_spans(text, entities, method)
+            for text, entities in zip(
+                texts, self.extract_entities_many(texts), strict=True
+            )
+        ]
+
+    async def detect_many_async(
+        self, texts: list[str], method: str
+    ) -> list[list[Span]]:
+        return [
+            entity_spans(text, entities, method)
+            for text, entities in zip(
+                texts,
+                await self.extract_entities_many_async(texts),
+                strict=True,
+            )
+        ]
+
+    def detect(self, text: str, method: str) -> list[Span]:
+        return self.detect_many([text], method)[0]
+
+    @staticmethod
+    def _redact(
+        text: str, entities: list[dict[str, Any]], method: str
     ) -> RuleResult:
         text, replaced_count, replaced_values = (
             TextUtils.redact_entities_with_counter(text, entities, method)
         )
         return RuleResult(text, replaced_values, replaced_count)
 
-    def extract_entities(self, text: str) -> list[dict[str, Any]]:
-        entities = self._pii_ner(text)
-        return TextUtils.normalize_entity_labels(entities)
+    def evaluate_many(self, texts: list[str], method: str) -> list[RuleResult]:
+        return [
+            self._redact(text, entities, method)
+            for text, entities in zip(
+                texts, self.extract_entities_many(texts), strict=True
+            )
+        ]
+
+    def evaluate(self, text: str, method: str) -> RuleResult:
+        return self._redact(text, self.extract_entities(text), method)
 
     def apply(self, text: str, method: str) -> str:
-        return self._apply_rule_and_get_replaced_values(
-            text, self.extract_entities(text), method
-        ).text
+        return self.evaluate(text, method).text
 
     def replaced_values(self, text: str, method: str) -> dict[str, str]:
-        return self._apply_rule_and_get_replaced_values(
-            text, self.extract_entities(text), method
-        ).replaced_values
+        return self.evaluate(text, method).replaced_values
 
     def replaced_count(self, text: str, method: str) -> dict[str, int]:
-        return self._apply_rule_and_get_replaced_values(
-            text, self.extract_entities(text), method
-        ).replaced_count
+        return self.evaluate(text, method).replaced_count
 
 
 class ModelRuleAbAi(BaseModelRule):
-    def __init__(self):
-        self._pii_ner = pipeline(
-            task='token-classification',
-            model='ab-ai/pii_model',
-            tokenizer='ab-ai/pii_model',
-            token=HF_TOKEN,
-            aggregation_strategy='simple',
-        )
+    _spec = ModelSpec(model='ab-ai/pii_model', aggregation_strategy='simple')
+
+    def __init__(
+        self,
+        backend: str = MODEL_BACKEND_AB_AI,
+        prescreen: str = MODEL_PRESCREEN_AB_AI,
+    ) -> None:
+        super().__init__(backend, prescreen)
 
     @property
     def placeholder(self) -> str:
@@ -59,14 +312,14 @@ class ModelRuleAbAi(BaseModelRule):
 
 
 class ModelRuleBertBase(BaseModelRule):
-    def __init__(self):
-        self._pii_ner = pipeline(
-            task='token-classification',
-            model='dslim/bert-base-NER',
-            tokenizer='dslim/bert-base-NER',
-            token=HF_TOKEN,
-            aggregation_strategy='max',
-        )
+    _spec = ModelSpec(model='dslim/bert-base-NER', aggregation_strategy='max')
+
+    def __init__(
+        self,
+        backend: str = MODEL_BACKEND_BERT_BASE,
+        prescreen: str = MODEL_PRESCREEN_BERT_BASE,
+    ) -> None:
+        super().__init__(backend, prescreen)
 
     @property
     def placeholder(self) -> str:
@@ -74,40 +327,119 @@ class ModelRuleBertBase(BaseModelRule):
 
 
 class RemovalServiceModel:
-    def __init__(self, rules: list[PiiRule]) -> None:
+    """
+    Runs every model rule on the same input.
+
+    Rules detect entities independently, so they can run concurrently; each
+    rule's spans use its placeholder as source, and when spans overlap the
+    rule listed first wins.
+    """
+
+    def __init__(
+        self,
+        rules: list[BaseModelRule],
+        not_ready_policy: str = MODEL_NOT_READY_POLICY,
+    ) -> None:
         self._rules = rules
         self._method = 'model'
+        # 'wait' blocks until a rule's model is loaded, 'fallback' skips it.
+        self._skip_not_ready = not_ready_policy == 'fallback'
 
-    def _apply_rules(self, text: str) -> tuple[str, str]:
-        cleaned_text = text
+    def _active_rules(self) -> tuple[list[BaseModelRule], bool]:
+        active: list[BaseModelRule] = []
+        complete = True
         for rule in self._rules:
-            cleaned_text = rule.apply(cleaned_text, rule.placeholder)
+            if self._skip_not_ready and not rule.is_ready:
+                logger.warning(f'Model {rule.placeholder} not ready, skipping.')
+                rule.retry_failed_load()
+                complete = False
+                continue
+            active.append(rule)
+        return active, complete
 
-        return cleaned_text, self._method
+    @staticmethod
+    def _detect_rule(rule: BaseModelRule, texts: list[str]) -> list[list[Span]]:
+        with RULE_SECONDS.time(rule.placeholder):
+            return rule.detect_many(texts, rule.placeholder)
 
-    def replaced_values(self, text: str) -> dict[str, str]:
-        all_replaced_values: dict[str, str] = {}
-        for rule in self._rules:
-            replaced_values = rule.replaced_values(text, rule.placeholder)
-            all_replaced_values.update(replaced_values)
+    @staticmethod
+    async def _detect_rule_async(
+        rule: BaseModelRule, texts: list[str]
+    ) -> list[list[Span]]:
+        with RULE_SECONDS.time(rule.placeholder):
+            return await rule.detect_many_async(texts, rule.placeholder)
 
-        return all_replaced_values
+    @staticmethod
+    def _merge(
+        method: str,
+        spans: list[list[list[Span]]],
+        complete: bool,
+    ) -> list[Detection]:
+        # spans[rule][text] -> one detection per text, rule order preserved.
+        return [
+            Detection(
+                method,
+                [span for rule_spans in per_text for span in rule_spans],
+                complete,
+            )
+            for per_text in zip(*spans, strict=True)
+        ]
 
-    def replaced_count(self, text: str) -> dict[str, int]:
-        counts: dict[str, int] = {}
-        for rule in self._rules:
-            replaced_count = rule.replaced_count(text, rule.placeholder)
-            counts.update(replaced_count)
-        return counts
+    def detect_many(self, texts: list[str]) -> list[Detection]:
+        rules, complete = self._active_rules()
+        if not rules:
+            return [Detection(self._method, [], complete) for _ in texts]
 
-    def clean(self, text: str) -> CleanedTextResult:
-        cleaned_text, method = self._apply_rules(text)
-        replaced_values = self.replaced_values(text)
-        replaced_count = self.replaced_count(text)
-
-        return CleanedTextResult(
-            method=method,
-            cleaned_text=cleaned_text,
-            replaced_values=replaced_values,
-            replaced_count=replaced_count,
+        spans = [self._detect_rule(rule, texts) for rule in rules]
+        return self._merge(self._method, spans, complete)
+
+    def detect(self, text: str) -> Detection:
+        return self.detect_many([text])[0]
+
+    async def detect_many_async(self, texts: list[str]) -> list[Detection]:
+        """Like `detect_many`, with all rules running concurrently."""
+        rules, complete = self._active_rules()
+        if not rules:
+            return [Detection(self._method, [], complete) for _ in texts]
+
+        spans = await asyncio.gather(
+            *(self._detect_rule_async(rule, texts) for rule in rules)
         )
+        return self._merge(self._method, list(spans), complete)
+
+    async def detect_async(self, text: str) -> Detection:
+        return (await self.detect_many_async([text]))[0]
+
+    def clean_many(self, texts: list[str]) -> list[CleanedTextResult]:
+        return [
+            detection.redact(text)
+            for text, detection in zip(
+                texts, self.detect_many(texts), strict=True
+            )
+        ]
+
+    def clean(self, text: str) -> CleanedTextResult:
+        return self.clean_many([text])[0]
+
+    def replaced_values(self, text: str) -> dict[str, str]:
+        return self.clean(text).replaced_values
+
+    def replaced_count(self, text: str) -> dict[str, int]:
+        return self.clean(text).replaced_count
+
+
+def load_in_background(rules: list[PiiRule]) -> threading.Thread:
+    """Load every model rule in a daemon thread and return the thread."""
+
+    def load_all() -> None:
+        for rule in rules:
+            if isinstance(rule, BaseModelRule):
+                # Failures are logged. With the 'wait' policy the rule
+                # retries on its next use, with 'fallback' once the retry
+                # delay has passed (see `retry_failed_load`).
+                with contextlib.suppress(Exception):
+                    rule.load()
+
+    thread = threading.Thread(target=load_all, name='model-loader', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,350 @@
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import stat
+import tempfile
+import threading
+from collections.abc import Callable
+from multiprocessing.connection import (
+    AuthenticationError,
+    Client,
+    Connection,
+    Listener,
+    wait,
+)
+from multiprocessing.process import BaseProcess
+from typing import Any
+
+from app.services.batching import Entities, batched, run_many
+
+logger = logging.getLogger('anonify.models')
+
+
+class ModelWorkerError(RuntimeError):
+    """Raised by RemoteNer when the model worker reports a failure."""
+
+
+def default_address() -> str:
+    """The socket path in the user's private runtime directory."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or os.path.join(
+        tempfile.gettempdir(), f'anonify-{os.getuid()}'
+    )
+    return os.path.join(runtime_dir, 'anonify-models.sock')
+
+
+def _require_authkey(authkey: bytes) -> None:
+    if not authkey:
+        raise ValueError(
+            'MODEL_WORKER_AUTHKEY must be set to a secret shared by the API '
+            'and the model worker.'
+        )
+
+
+def _plain(value: Any) -> Any:
+    # NumPy scalars, such as the float32 scores of transformers pipelines.
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _send(conn: Connection, message: Any) -> None:
+    # JSON rather than pickle, so a peer can only ever send plain data.
+    conn.send_bytes(json.dumps(message, default=_plain).encode())
+
+
+def _recv(conn: Connection) -> Any:
+    return json.loads(conn.recv_bytes())
+
+
+def _tokenizer(ner: Callable[..., Any]) -> Any:
+    tokenizer = getattr(ner, 'tokenizer', None)
+    return tokenizer if getattr(tokenizer, 'is_fast', False) else None
+
+
+def _handle(
+    request: Any,
+    ners: dict[str, Callable[..., Any]],
+    batchers: dict[str, Callable[..., Any]],
+) -> dict[str, Any]:
+    try:
+        match request:
+            case {'op': 'ner', 'model': str(model), 'texts': list(texts)}:
+                result = run_many(batchers[model], texts)
+            case {'op': 'tokenizer', 'model': str(model)}:
+                tokenizer = _tokenizer(ners[model])
+                result = tokenizer and {
+                    'model_max_length': tokenizer.model_max_length,
+                    'special_tokens': tokenizer.num_special_tokens_to_add(),
+                }
+            case {'op': 'offsets', 'model': str(model), 'text': str(text)}:
+                encoding = _tokenizer(ners[model])(
+                    text, add_special_tokens=False, return_offsets_mapping=True
+                )
+                result = [list(span) for span in encoding['offset_mapping']]
+            case {'op': 'ping'}:
+                result = sorted(ners)
+            case _:
+                return {'error': f'Bad request {request!r}.'}
+    except KeyError as e:
+        return {'error': f'Unknown model {e.args[0]!r}.'}
+    except Exception as e:
+        logger.exception('Model worker request failed.')
+        return {'error': f'{type(e).__name__}: {e}'}
+    return {'result': result}
+
+
+def _serve_connection(
+    conn: Connection,
+    ners: dict[str, Callable[..., Any]],
+    batchers: dict[str, Callable[..., Any]],
+) -> None:
+    with conn:
+        while True:
+            try:
+                response = _handle(_recv(conn), ners, batchers)
+                try:
+                    _send(conn, response)
+                except TypeError as e:
+                    _send(conn, {'error': f'Unserializable result: {e}'})
+            except (EOFError, OSError, ValueError):
+                # ValueError: the request is not JSON; drop the client.
+                return
+
+
+def _worker_main(
+    listener: Listener, ners: dict[str, Callable[..., Any]]
+) -> None:
+    # The parent handles Ctrl+C and terminates its workers.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Created after the fork so the batcher threads live in this process and
+    # concurrent clients of this worker share batched pipeline calls.
+    batchers = {model: batched(ner, name=model) for model, ner in ners.items()}
+
+    while True:
+        try:
+            conn = listener.accept()
+        except AuthenticationError:
+            logger.warning('Rejected a model worker client: bad authkey.')
+            continue
+        except OSError:
+            return
+
+        threading.Thread(
+            target=_serve_connection,
+            args=(conn, ners, batchers),
+            daemon=True,
+        ).start()
+
+
+def _prepare_socket_path(address: str) -> None:
+    # Only the owner may reach the socket, and only a stale socket left by
+    # a server that did not shut down is replaced.
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(
+            f'{directory} must be owned by this user with mode 0700.'
+        )
+
+    try:
+        mode = os.lstat(address).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f'{address} exists and is not a socket.')
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(address)
+        except ConnectionRefusedError:
+            os.unlink(address)
+            return
+    raise FileExistsError(f'A model worker already listens on {address}.')
+
+
+class ModelWorkerServer:
+    """
+    Pre-fork inference server shared by all API workers on a host.
+
+    The pipelines are built once in the parent process; the workers are
+    forked afterwards, so model weights stay shared copy-on-write and memory
+    no longer grows with the number of API workers. `gc.freeze()` keeps the
+    collector from touching (and so copying) the inherited objects. Workers
+    accept connections on one Unix socket and answer NER requests for any
+    model by name; a worker that dies is replaced. Requests and replies are
+    JSON, authenticated with `authkey`, on a socket only the owner can use.
+    """
+
+    def __init__(
+        self,
+        ners: dict[str, Callable[..., Any]],
+        *,
+        address: str,
+        authkey: bytes,
+        processes: int,
+    ) -> None:
+        _require_authkey(authkey)
+        self._ners = ners
+        self._address = address
+        self._authkey = authkey
+        self._processes = max(1, processes)
+        self._context = multiprocessing.get_context('fork')
+        self._listener: Listener | None = None
+        self._workers: list[BaseProcess] = []
+        self._closing = threading.Event()
+
+    @property
+    def address(self) -> str:
+        return self._address
+
+    def _spawn(self) -> BaseProcess:
+        worker = self._context.Process(
+            target=_worker_main,
+            args=(self._listener, self._ners),
+            name='model-worker',
+            daemon=True,
+        )
+        worker.start()
+        return worker
+
+    def start(self) -> None:
+        """Bind the socket and fork the worker processes."""
+        _prepare_socket_path(self._address)
+        self._listener = Listener(
+            self._address, family='AF_UNIX', authkey=self._authkey
+        )
+        os.chmod(self._address, 0o600)
+        gc.freeze()
+        self._workers = [self._spawn() for _ in range(self._processes)]
+        logger.info(
+            f'Model worker serving {sorted(self._ners)} on {self._address} '
+            f'with {self._processes} processes.'
+        )
+
+    def serve_forever(self) -> None:
+        """Start the workers and replace any that exit until closed."""
+        self.start()
+        while not self._closing.is_set():
+            sentinels = {worker.sentinel: worker for worker in self._workers}
+            for sentinel in wait(list(sentinels), timeout=1.0):
+                worker = sentinels[sentinel]
+                self._workers.remove(worker)
+                if self._closing.is_set():
+                    break
+                logger.warning(
+                    f'Model worker {worker.pid} exited with '
+                    f'{worker.exitcode}, restarting it.'
+                )
+                self._workers.append(self._spawn())
+
+    def close(self) -> None:
+        """Stop the workers and remove the socket."""
+        self._closing.set()
+        for worker in self._workers:
+            worker.terminate()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        gc.unfreeze()
+
+
+class RemoteTokenizer:
+    """
+    The parts of a fast tokenizer TokenWindowChunker uses, served remotely.
+
+    Only token offsets cross the socket, never the tokenizer itself.
+    """
+
+    is_fast = True
+
+    def __init__(self, ner: 'RemoteNer', info: dict[str, int]) -> None:
+        self._ner = ner
+        self.model_max_length = info['model_max_length']
+        self._special_tokens = info['special_tokens']
+
+    def num_special_tokens_to_add(self) -> int:
+        return self._special_tokens
+
+    def __call__(self, text: str, **kwargs: Any) -> dict[str, Any]:
+        offsets = self._ner._request(
+            {'op': 'offsets', 'model': self._ner.model, 'text': text}
+        )
+        return {'offset_mapping': [tuple(span) for span in offsets]}
+
+
+class RemoteNer:
+    """
+    NER callable backed by a ModelWorkerServer.
+
+    Behaves like a token-classification pipeline: a string gives a list of
+    entities, a list of strings gives one list per string. Connections are
+    pooled and reused by concurrent callers.
+    """
+
+    def __init__(self, model: str, *, address: str, authkey: bytes) -> None:
+        _require_authkey(authkey)
+        self.model = model
+        self._address = address
+        self._authkey = authkey
+        self._idle: queue.SimpleQueue[Connection] = queue.SimpleQueue()
+        self._tokenizer: RemoteTokenizer | None = None
+        self._has_tokenizer = False
+
+    def _connect(self) -> Connection:
+        return Client(self._address, family='AF_UNIX', authkey=self._authkey)
+
+    def _exchange(self, conn: Connection, request: dict[str, Any]) -> Any:
+        try:
+            _send(conn, request)
+            response = _recv(conn)
+        except BaseException:
+            conn.close()
+            raise
+        self._idle.put(conn)
+        return response
+
+    def _request(self, request: dict[str, Any]) -> Any:
+        try:
+            response = self._exchange(self._idle.get_nowait(), request)
+        except queue.Empty:
+            response = self._exchange(self._connect(), request)
+        except (EOFError, OSError):
+            # The worker behind a pooled connection went away; retry once.
+            response = self._exchange(self._connect(), request)
+
+        if 'error' in response:
+            raise ModelWorkerError(response['error'])
+        return response['result']
+
+    def ping(self) -> list[str]:
+        """Return the models served by the worker."""
+        return self._request({'op': 'ping'})
+
+    @property
+    def tokenizer(self) -> RemoteTokenizer | None:
+        """The model's fast tokenizer, if any, so chunking matches."""
+        if not self._has_tokenizer:
+            info = self._request({'op': 'tokenizer', 'model': self.model})
+            self._tokenizer = info and RemoteTokenizer(self, info)
+            self._has_tokenizer = True
+        return self._tokenizer
+
+    def __call__(
+        self, inputs: str | list[str], **kwargs: Any
+    ) -> Entities | list[Entities]:
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        entities = self._request(
+            {'op': 'ner', 'model': self.model, 'texts': texts}
+        )
+        return entities[0] if isinstance(inputs, str) else entities
@@ -1,9 +1,79 @@
+import asyncio
+import time
+from typing import Any
+
 from app.core.errors import ServiceError, ValidationError
+from app.core.metrics import ENTITIES_TOTAL, STAGE_SECONDS
 from app.models.pii import PiiIn, PiiOut
-from app.services.base import HtmlService, TextAnonify, ValidationService
+from app.services.base import (
+    Detection,
+    HtmlService,
+    TextAnonify,
+    ValidationService,
+)
+from app.services.cache import ResultCache
+from app.services.html_service import HtmlDocument
+from app.services.span_plan import SpanPlan
+
+
+def _redact(
+    text: str,
+    detections: list[Detection],
+    document: HtmlDocument | None = None,
+) -> PiiOut:
+    """
+    Resolve the spans of every service on `text` and redact it once.
+
+    With a `document`, `text` is its extracted text and the placeholders
+    are put back into the document's HTML instead.
+    """
+    with STAGE_SECONDS.time('redact'):
+        plan = SpanPlan(text)
+        for detection in detections:
+            plan.extend(detection.spans)
+        cleaned_text, replaced_count, replaced_values = plan.materialize()
+        if document is not None:
+            cleaned_text = document.restore(
+                (span.start, span.end, f'[{key}]')
+                for span, key in plan.placeholders()
+            )
+
+    for key, count in replaced_count.items():
+        source, label = key.split(':', 1)
+        ENTITIES_TOTAL.inc(source, label, amount=count)
+
+    return PiiOut(
+        original_text=text,
+        cleaned_text=cleaned_text,
+        methods=[detection.method for detection in detections],
+        replaced_values=replaced_values,
+        replaced_count=replaced_count,
+    )
+
+
+def _cache_options(
+    clean_html: bool, restore_html: bool, html_service: HtmlService
+) -> dict[str, Any]:
+    """The request options a cached result depends on, besides its text."""
+    if not clean_html:
+        return {}
+    return {
+        'clean_html': True,
+        'restore_html': restore_html,
+        'parser': html_service.parser,
+    }
 
 
 class Orchestrator:
+    """
+    Runs the pipeline over one input.
+
+    With `clean_html` the services see the text of the HTML input. With
+    `restore_html` as well, the cleaned text is the input HTML with its
+    markup kept and the placeholders put back in place; those results are
+    cached under the HTML rather than its text.
+    """
+
     def __init__(
         self,
         input: PiiIn,
@@ -11,53 +81,252 @@ class Orchestrator:
         validation_services: list[ValidationService],
         html_service: HtmlService,
         clean_html: bool = False,
+        cache: ResultCache | None = None,
+        restore_html: bool = False,
     ) -> None:
         self.input = input
         self.clean_services = clean_services
         self.validation_services = validation_services
         self.html_service = html_service
         self.clean_html = clean_html
+        self.cache = cache
+        self.restore_html = restore_html
+        self.document: HtmlDocument | None = None
+        self._cache_options = _cache_options(
+            clean_html, restore_html, html_service
+        )
 
-    def run_pipeline(self) -> PiiOut:
+    def _prepare(self) -> str:
         text = self.input.original_text
 
-        if self.clean_html:
-            text = self.html_service.clean(text)
+        if self.clean_html and self.restore_html:
+            with STAGE_SECONDS.time('html'):
+                self.document = self.html_service.extract(text)
+            text = self.document.text
+        elif self.clean_html:
+            with STAGE_SECONDS.time('html'):
+                text = self.html_service.clean(text)
             self.input = PiiIn(original_text=text)
 
         if not self.validation_services:
             raise ServiceError('No validation services configured')
 
-        for vs in self.validation_services:
-            is_valid, msg = vs.validate(text)
-            if not is_valid:
-                raise ValidationError(msg)
+        with STAGE_SECONDS.time('validation'):
+            for vs in self.validation_services:
+                is_valid, msg = vs.validate(text)
+                if not is_valid:
+                    raise ValidationError(msg)
 
         if not self.clean_services:
             raise ServiceError('No clean services configured')
 
-        methods: list[str] = []
-        replaced_values: dict[str, str] = {}
-        replaced_count: dict[str, int] = {}
+        return text
+
+    def _finish(self, text: str, detections: list[Detection]) -> PiiOut:
+        output = _redact(text, detections, self.document)
+
+        if self.cache is not None and all(d.complete for d in detections):
+            self.cache.put(
+                self.input.original_text, output, **self._cache_options
+            )
+
+        return output
+
+    def _lookup(self) -> PiiOut | None:
+        if self.cache is None:
+            return None
+        with STAGE_SECONDS.time('cache'):
+            return self.cache.get(
+                self.input.original_text, **self._cache_options
+            )
 
+    def run_pipeline(self) -> PiiOut:
+        text = self._prepare()
+
+        cached = self._lookup()
+        if cached is not None:
+            return cached
+
+        detections: list[Detection] = []
         try:
             for service in self.clean_services:
-                result = service.clean(text)
+                start = time.perf_counter()
+                detection = service.detect(text)
+                STAGE_SECONDS.observe(
+                    time.perf_counter() - start, detection.method
+                )
+                detections.append(detection)
+        except Exception as e:
+            raise ServiceError(
+                f'An error occurred during service {service.__class__.__name__}: {e}'
+            ) from e
 
-                text = result.cleaned_text
-                methods.append(result.method)
+        return self._finish(text, detections)
 
-                replaced_values.update(result.replaced_values)
-                replaced_count.update(result.replaced_count)
+    @staticmethod
+    async def _detect_async(service: TextAnonify, text: str) -> Detection:
+        start = time.perf_counter()
+        try:
+            detect_async = getattr(service, 'detect_async', None)
+            if detect_async is not None:
+                detection = await detect_async(text)
+            else:
+                detection = await asyncio.to_thread(service.detect, text)
         except Exception as e:
             raise ServiceError(
                 f'An error occurred during service {service.__class__.__name__}: {e}'
             ) from e
 
-        return PiiOut(
-            original_text=self.input.original_text,
-            cleaned_text=text,
-            methods=methods,
-            replaced_values=replaced_values,
-            replaced_count=replaced_count,
+        STAGE_SECONDS.observe(time.perf_counter() - start, detection.method)
+        return detection
+
+    async def run_pipeline_async(self) -> PiiOut:
+        """
+        Same as `run_pipeline` without blocking the event loop.
+
+        Every service detects on the same text concurrently: services
+        exposing `detect_async` (the model service) run their inference in
+        the model executor, the rest in a worker thread. HTML extraction is
+        offloaded to a worker thread too.
+        """
+        if self.clean_html:
+            text = await asyncio.to_thread(self._prepare)
+        else:
+            text = self._prepare()
+
+        cached = self._lookup()
+        if cached is not None:
+            return cached
+
+        detections = await asyncio.gather(
+            *(
+                self._detect_async(service, text)
+                for service in self.clean_services
+            )
+        )
+        return self._finish(text, list(detections))
+
+
+class BatchOrchestrator:
+    """
+    Runs the pipeline over many inputs at once.
+
+    HTML extraction, validation and cache lookups happen per item; the
+    remaining texts go through each clean service in one `detect_many` call
+    so model rules can batch their inference. Failures are reported per
+    item: the result list holds either a PiiOut or the error raised for it.
+    `clean_html` and `restore_html` behave as in Orchestrator.
+    """
+
+    def __init__(
+        self,
+        inputs: list[PiiIn],
+        clean_services: list[TextAnonify],
+        validation_services: list[ValidationService],
+        html_service: HtmlService,
+        clean_html: bool = False,
+        cache: ResultCache | None = None,
+        restore_html: bool = False,
+    ) -> None:
+        self.inputs = inputs
+        self.clean_services = clean_services
+        self.validation_services = validation_services
+        self.html_service = html_service
+        self.clean_html = clean_html
+        self.cache = cache
+        self.restore_html = restore_html
+        self._cache_options = _cache_options(
+            clean_html, restore_html, html_service
         )
+
+    def _prepare(self, text: str) -> tuple[str, str, HtmlDocument | None]:
+        """Return the text to clean, its cache key text and HTML document."""
+        key = text
+        document = None
+        if self.clean_html and self.restore_html:
+            with STAGE_SECONDS.time('html'):
+                document = self.html_service.extract(text)
+            text = document.text
+        elif self.clean_html:
+            with STAGE_SECONDS.time('html'):
+                text = key = self.html_service.clean(text)
+
+        with STAGE_SECONDS.time('validation'):
+            for vs in self.validation_services:
+                is_valid, msg = vs.validate(text)
+                if not is_valid:
+                    raise ValidationError(msg)
+
+        return text, key, document
+
+    def run_pipeline(self) -> list[PiiOut | ServiceError | ValidationError]:
+        if not self.validation_services:
+            raise ServiceError('No validation services configured')
+
+        if not self.clean_services:
+            raise ServiceError('No clean services configured')
+
+        outputs: list[PiiOut | ServiceError | ValidationError | None] = [
+            None
+        ] * len(self.inputs)
+        pending: list[int] = []
+        texts: list[str] = []
+        keys: list[str] = []
+        documents: list[HtmlDocument | None] = []
+
+        for idx, item in enumerate(self.inputs):
+            try:
+                text, key, document = self._prepare(item.original_text)
+            except ValidationError as ve:
+                outputs[idx] = ve
+                continue
+            except Exception as e:
+                # One malformed item must not fail the whole batch.
+                outputs[idx] = ServiceError(
+                    f'An error occurred while preparing the text: {e}'
+                )
+                continue
+
+            if self.cache is not None:
+                with STAGE_SECONDS.time('cache'):
+                    cached = self.cache.get(key, **self._cache_options)
+                if cached is not None:
+                    outputs[idx] = cached
+                    continue
+
+            pending.append(idx)
+            texts.append(text)
+            keys.append(key)
+            documents.append(document)
+
+        detections: list[list[Detection]] = []
+
+        try:
+            for service in self.clean_services:
+                if not texts:
+                    break
+                start = time.perf_counter()
+                service_detections = service.detect_many(texts)
+                STAGE_SECONDS.observe(
+                    time.perf_counter() - start, service_detections[0].method
+                )
+                detections.append(service_detections)
+        except Exception as e:
+            error = ServiceError(
+                f'An error occurred during service {service.__class__.__name__}: {e}'
+            )
+            for idx in pending:
+                outputs[idx] = error
+            return outputs  # type: ignore[return-value]
+
+        for pos, idx in enumerate(pending):
+            item_detections = [per_service[pos] for per_service in detections]
+            output = _redact(texts[pos], item_detections, documents[pos])
+            outputs[idx] = output
+
+            if self.cache is not None and all(
+                detection.complete for detection in item_detections
+            ):
+                self.cache.put(keys[pos], output, **self._cache_options)
+
+        return outputs  # type: ignore[return-value]
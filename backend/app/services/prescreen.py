@@ -0,0 +1,118 @@
+import functools
+import pathlib
+import re
+import string
+from collections.abc import Iterable
+
+from app.core.config import PRESCREEN_LEXICON_PATH
+from app.services.chunking import TextChunk
+
+PRESCREEN_MODES = ('off', 'recall', 'balanced')
+
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\s*\n\s*')
+_TOKEN = re.compile(r'\S+')
+_STRIP = string.punctuation + '“”‘’«»'
+
+# Capitalized only because they open a sentence; 'balanced' ignores them.
+_STARTER_WORDS = """
+    a all also an and any are as at be because but by can could did do
+    does for from had has have he her here his how i if in is it its let
+    my no not now of on once or our please she so some that the their
+    them then there these they this those thanks thank to too was we were
+    what when where which while who why will with would yes you your
+"""
+_SENTENCE_STARTERS = frozenset(_STARTER_WORDS.split())
+
+
+@functools.cache
+def load_lexicon(path: str) -> frozenset[str]:
+    """Read one term per line, case-folded; '#' starts a comment."""
+    if not path:
+        return frozenset()
+    lines = pathlib.Path(path).read_text(encoding='utf-8').splitlines()
+    return frozenset(
+        term
+        for line in lines
+        if (term := line.split('#', 1)[0].strip().casefold())
+    )
+
+
+class Prescreen:
+    """
+    Cheap per-sentence check for whether NER could find an entity.
+
+    Works on token shape: named entities are written as capitalized words or
+    acronyms, so sentences made only of lowercase words, numbers, IDs, URLs
+    or emails are skipped. 'recall' keeps any sentence with a capitalized
+    alphabetic word; 'balanced' also skips sentences whose only capitalized
+    word is a common sentence opener. Words from the lexicon count in any
+    case, for entities often written in lowercase.
+    """
+
+    def __init__(self, mode: str = 'recall', lexicon: Iterable[str] = ()):
+        if mode not in PRESCREEN_MODES[1:]:
+            raise ValueError(
+                f'Unknown prescreen mode {mode!r}, '
+                f'expected one of {PRESCREEN_MODES}.'
+            )
+        self.mode = mode
+        self._lexicon = frozenset(term.casefold() for term in lexicon)
+
+    def is_candidate(self, sentence: str) -> bool:
+        """Return whether NER may find an entity in `sentence`."""
+        first = True
+        for match in _TOKEN.finditer(sentence):
+            word = match.group().strip(_STRIP)
+            if not word:
+                continue
+            opener, first = first, False
+
+            if word.casefold() in self._lexicon:
+                return True
+            if not word[0].isupper():
+                continue
+            # Token shape: letters, with inner hyphens or apostrophes only.
+            if not word.replace('-', '').replace("'", '').isalpha():
+                continue
+            if (
+                self.mode == 'recall'
+                or not opener
+                or word.isupper()
+                or word.casefold() not in _SENTENCE_STARTERS
+            ):
+                return True
+        return False
+
+    def segments(self, text: str) -> list[TextChunk]:
+        """
+        Return the parts of `text` NER should run on.
+
+        Consecutive candidate sentences are joined into one segment, so the
+        model keeps their shared context.
+        """
+        segments: list[TextChunk] = []
+        run_start: int | None = None
+        run_end = 0
+        pos = 0
+
+        for brk in (*_SENTENCE_BREAK.finditer(text), None):
+            end = brk.start() if brk is not None else len(text)
+            if end > pos and self.is_candidate(text[pos:end]):
+                if run_start is None:
+                    run_start = pos
+                run_end = end
+            elif run_start is not None and end > pos:
+                segments.append(TextChunk(text[run_start:run_end], run_start))
+                run_start = None
+            pos = brk.end() if brk is not None else len(text)
+
+        if run_start is not None:
+            segments.append(TextChunk(text[run_start:run_end], run_start))
+        return segments
+
+
+def build_prescreen(mode: str) -> Prescreen | None:
+    """Return the prescreen for a config mode, or None when it is 'off'."""
+    if mode == 'off':
+        return None
+    return Prescreen(mode, load_lexicon(PRESCREEN_LEXICON_PATH))
@@ -0,0 +1,78 @@
+import logging
+import re
+from typing import Any
+
+from app.core.config import REGEX_ENGINE
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+logger = logging.getLogger('anonify')
+
+REGEX_ENGINES = ('re', 're2')
+
+_INLINE_FLAGS = {
+    re.IGNORECASE: 'i',
+    re.MULTILINE: 'm',
+    re.DOTALL: 's',
+    re.VERBOSE: 'x',
+}
+
+
+def scoped_source(pattern: re.Pattern[str]) -> str:
+    """Return the pattern source with its flags inline, e.g. '(?i:...)'."""
+    flags = ''.join(
+        letter for flag, letter in _INLINE_FLAGS.items() if pattern.flags & flag
+    )
+    return f'(?{flags}:{pattern.pattern})' if flags else pattern.pattern
+
+
+def _re2_options() -> Any:
+    options = re2.Options()
+    # Unsupported syntax is expected and handled by the fallback.
+    options.log_errors = False
+    return options
+
+
+def compile_pattern(
+    pattern: re.Pattern[str], engine: str = REGEX_ENGINE
+) -> Any:
+    """
+    Compile `pattern` for a regex engine: 're', or 're2' for linear time.
+
+    RE2 guarantees time linear in the text length, where the backtracking
+    `re` engine can go quadratic or worse on long runs of near-matches. It
+    returns the same matches for the built-in patterns, except that `\\b`
+    only knows ASCII word characters, so a match next to a non-ASCII letter
+    is found by RE2 but not by `re`. Patterns RE2 cannot compile, such as
+    lookarounds and backreferences, fall back to `re`. Either way the
+    result has the `finditer`/`sub` interface of `re.Pattern`.
+    """
+    if engine not in REGEX_ENGINES:
+        raise ValueError(
+            f'Unknown regex engine {engine!r}, expected one of {REGEX_ENGINES}.'
+        )
+    if engine == 're':
+        return pattern
+    if re2 is None:
+        raise ImportError(
+            "The 're2' regex engine needs google-re2; "
+            'install it with the `re2` dependency group.'
+        )
+
+    try:
+        return re2.compile(scoped_source(pattern), _re2_options())
+    except re2.error as e:
+        logger.warning(
+            'Pattern %r is not supported by RE2, using re: %s',
+            pattern.pattern,
+            e,
+        )
+        return pattern
+
+
+def engine_of(compiled: Any) -> str:
+    """Return the engine a pattern from `compile_pattern` runs on."""
+    return 're' if isinstance(compiled, re.Pattern) else 're2'
@@ -1,54 +1,138 @@
+import functools
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from typing import Any
 
+from app.core.config import REGEX_ENGINE
+from app.core.metrics import RULE_SECONDS
 from app.services.base import (
     CleanedTextResult,
+    Detection,
     PiiRule,
     RuleResult,
     TextAnonify,
 )
+from app.services.regex_engine import compile_pattern, engine_of, scoped_source
+from app.services.span_plan import Span, SpanPlan
 from app.services.utils import TextUtils
 
+# Whitespace that ends a token, for `re` and for RE2, whose `\s` is ASCII.
+_SPACE = re.compile(r'[ \t\n\r\f\v]')
+_SPACE_CHARS = ' \t\n\r\f\v'
+
+
+def anchor_windows(
+    text: str, anchors: tuple[str, ...], ignore_case: bool = False
+) -> list[tuple[int, int]] | None:
+    """
+    Return the whitespace-delimited tokens of `text` containing an anchor.
+
+    The windows are sorted and do not overlap. None means the anchors
+    cannot be searched for, because lowercasing changed the text length.
+    """
+    haystack = text
+    if ignore_case:
+        haystack = text.lower()
+        if len(haystack) != len(text):
+            return None
+
+    windows: set[tuple[int, int]] = set()
+    for anchor in anchors:
+        # Every token is expanded once per anchor: the search resumes at
+        # its end, and the start lookup never goes past the previous one.
+        end = 0
+        pos = haystack.find(anchor)
+        while pos >= 0:
+            start = max(text.rfind(char, end, pos) for char in _SPACE_CHARS)
+            space = _SPACE.search(text, pos)
+            end = space.start() if space else len(text)
+            windows.add((start + 1, end))
+            pos = haystack.find(anchor, end)
+    return sorted(windows)
+
+
+def _finditer(
+    pattern: Any, text: str, windows: list[tuple[int, int]] | None
+) -> Iterator[Any]:
+    if windows is None:
+        yield from pattern.finditer(text)
+        return
+    # A window starts after whitespace and ends at whitespace or the end of
+    # the text, so `\b` behaves as in a scan of the whole text.
+    for start, end in windows:
+        yield from pattern.finditer(text, start, end)
+
 
 class BaseRegexRule(PiiRule, ABC):
     _pattern: re.Pattern[str]
+    # Literals every match contains, lowercase if `anchors_ignore_case`. A
+    # rule declaring anchors must never match across whitespace: the
+    # pattern then only runs on the tokens around them, or not at all.
+    anchors: tuple[str, ...] = ()
+    anchors_ignore_case = False
 
     @property
     @abstractmethod
     def placeholder(self) -> str: ...
 
-    def _apply_rule_and_get_replaced_values(
-        self, text: str, method: str
-    ) -> RuleResult:
+    @property
+    def pattern(self) -> re.Pattern[str]:
+        return self._pattern
+
+    @functools.cached_property
+    def matcher(self) -> Any:
+        """The pattern compiled for REGEX_ENGINE."""
+        return compile_pattern(self._pattern)
+
+    @property
+    def engine(self) -> str:
+        return engine_of(self.matcher)
+
+    def windows(self, text: str) -> list[tuple[int, int]] | None:
+        """The parts of `text` to match, or None for all of it."""
+        if not self.anchors:
+            return None
+        return anchor_windows(text, self.anchors, self.anchors_ignore_case)
+
+    def detect(self, text: str, method: str = 'regex') -> list[Span]:
+        windows = self.windows(text)
+        return [
+            Span(match.start(), match.end(), self.placeholder, method)
+            for match in _finditer(self.matcher, text, windows)
+        ]
+
+    def evaluate(self, text: str, method: str = 'regex') -> RuleResult:
+        if self.windows(text) == []:
+            return RuleResult(text, {}, {})
+
         text, replaced_count, replaced_values = (
             TextUtils.return_placeholder_with_counter(
                 text,
                 method,
-                self._pattern,
+                self.matcher,
                 self.placeholder,
             )
         )
         return RuleResult(text, replaced_values, replaced_count)
 
     def apply(self, text: str, method: str = 'regex') -> str:
-        return self._apply_rule_and_get_replaced_values(text, method).text
+        return self.evaluate(text, method).text
 
     def replaced_values(
         self, text: str, method: str = 'regex'
     ) -> dict[str, str]:
-        return self._apply_rule_and_get_replaced_values(
-            text, method
-        ).replaced_values
+        return self.evaluate(text, method).replaced_values
 
     def replaced_count(
         self, text: str, method: str = 'regex'
     ) -> dict[str, int]:
-        return self._apply_rule_and_get_replaced_values(
-            text, method
-        ).replaced_count
+        return self.evaluate(text, method).replaced_count
 
 
 class RegexRuleEmail(BaseRegexRule):
+    anchors = ('@',)
+
     def __init__(self):
         self._pattern = re.compile(
             r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
@@ -60,6 +144,9 @@ class RegexRuleEmail(BaseRegexRule):
 
 
 class RegexRuleIpv4(BaseRegexRule):
+    # An octet is followed by a dot.
+    anchors = tuple(f'{digit}.' for digit in '0123456789')
+
     def __init__(self):
         self._pattern = re.compile(
             r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}'
@@ -72,6 +159,8 @@ class RegexRuleIpv4(BaseRegexRule):
 
 
 class RegexRuleIpv6(BaseRegexRule):
+    anchors = (':',)
+
     def __init__(self):
         self._pattern = re.compile(
             r'\b(?:(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}|'
@@ -92,6 +181,9 @@ class RegexRuleIpv6(BaseRegexRule):
 
 
 class RegexRuleUrl(BaseRegexRule):
+    anchors = ('http', 'www.')
+    anchors_ignore_case = True
+
     def __init__(self):
         self._pattern = re.compile(
             r'\b(?:https?://|www\.)[^\s<>\"]+', re.IGNORECASE
@@ -102,42 +194,137 @@ class RegexRuleUrl(BaseRegexRule):
         return 'URL'
 
 
-class RemovalServiceRegex(TextAnonify):
-    def __init__(self, rules: list[PiiRule]):
+class RegexRuleSet:
+    """
+    Compiled set of regex rules matched in a single scan.
+
+    Every rule pattern becomes a named group of one alternation, so the text
+    is scanned and rebuilt once regardless of the number of rules. Overlaps
+    are resolved by the engine itself: the leftmost match wins and, for
+    matches starting at the same position, the rule registered first wins.
+    Placeholders share one counter per placeholder name, e.g. IPv4 and IPv6
+    matches are numbered [IP_ADDRESS_1], [IP_ADDRESS_2]. The combined
+    pattern is compiled for `engine` (see `compile_pattern`).
+
+    Rules whose anchors are missing from the text are left out of the
+    alternation, and when every remaining rule has anchors only the tokens
+    around them are scanned. Text without any anchor is not scanned at all.
+    """
+
+    def __init__(
+        self, rules: list[BaseRegexRule], engine: str = REGEX_ENGINE
+    ) -> None:
         self._rules = rules
-        self._method = 'regex'
+        self._engine = engine
+        self._placeholders: dict[str, str] = {}
+        self._alternatives: list[str] = []
 
-    def _apply_rules(self, text: str) -> tuple[str, str]:
-        cleaned_text = text
-        for rule in self._rules:
-            cleaned_text = rule.apply(cleaned_text, self._method)
+        for idx, rule in enumerate(rules):
+            if rule.pattern.groupindex:
+                raise ValueError(
+                    f'Rule {rule.__class__.__name__} must not define named groups.'
+                )
+            group = f'rule_{idx}'
+            self._placeholders[group] = rule.placeholder
+            self._alternatives.append(
+                f'(?P<{group}>{scoped_source(rule.pattern)})'
+            )
 
-        return cleaned_text, self._method
+        # Combined patterns by bit mask of the rules they include.
+        self._patterns: dict[int, Any] = {}
+        self.engine = (
+            engine_of(self._subset_pattern((1 << len(rules)) - 1))
+            if rules
+            else engine
+        )
 
-    def replaced_count(self, text: str) -> dict[str, int]:
-        counts: dict[str, int] = {}
-        for rule in self._rules:
-            replaced_count = rule.replaced_count(text, self._method)
-            counts.update(replaced_count)
+    def _subset_pattern(self, mask: int) -> Any:
+        pattern = self._patterns.get(mask)
+        if pattern is None:
+            source = '|'.join(
+                alternative
+                for idx, alternative in enumerate(self._alternatives)
+                if mask >> idx & 1
+            )
+            pattern = compile_pattern(re.compile(source), self._engine)
+            self._patterns[mask] = pattern
+        return pattern
 
-        return counts
+    def detect(self, text: str, method: str = 'regex') -> list[Span]:
+        mask = 0
+        windows: list[tuple[int, int]] | None = []
+        for idx, rule in enumerate(self._rules):
+            rule_windows = rule.windows(text)
+            if rule_windows is None:
+                mask |= 1 << idx
+                windows = None
+            elif rule_windows:
+                mask |= 1 << idx
+                if windows is not None:
+                    windows.extend(rule_windows)
+        if not mask:
+            return []
+        if windows is not None:
+            # Windows of different rules are equal or disjoint tokens.
+            windows = sorted(set(windows))
 
-    def replaced_values(self, text: str) -> dict[str, str]:
-        all_replaced_values: dict[str, str] = {}
-        for rule in self._rules:
-            replaced_values = rule.replaced_values(text, self._method)
-            all_replaced_values.update(replaced_values)
+        return [
+            Span(
+                match.start(),
+                match.end(),
+                self._placeholders[match.lastgroup],  # type: ignore[index]
+                method,
+            )
+            for match in _finditer(self._subset_pattern(mask), text, windows)
+        ]
+
+    def evaluate(self, text: str, method: str = 'regex') -> RuleResult:
+        # Matches of one scan never overlap, so the plan keeps them all.
+        plan = SpanPlan(text)
+        plan.extend(self.detect(text, method))
+        text, replaced_count, replaced_values = plan.materialize()
+        return RuleResult(text, replaced_values, replaced_count)
 
-        return all_replaced_values
 
-    def clean(self, text: str) -> CleanedTextResult:
-        cleaned_text, method = self._apply_rules(text)
-        replaced_values = self.replaced_values(text)
-        replaced_count = self.replaced_count(text)
-
-        return CleanedTextResult(
-            method=method,
-            cleaned_text=cleaned_text,
-            replaced_values=replaced_values,
-            replaced_count=replaced_count,
+class RemovalServiceRegex(TextAnonify):
+    def __init__(self, rules: list[PiiRule], engine: str = REGEX_ENGINE):
+        self._rules = rules
+        self._method = 'regex'
+        # Plain regex rules share one scan; others, such as the deny list,
+        # are evaluated one by one.
+        regex_rules = [
+            rule for rule in rules if isinstance(rule, BaseRegexRule)
+        ]
+        self._rule_set = (
+            RegexRuleSet(regex_rules, engine) if regex_rules else None
         )
+        self._other_rules = [
+            rule for rule in rules if not isinstance(rule, BaseRegexRule)
+        ]
+
+    def detect(self, text: str) -> Detection:
+        # Overlaps between rules are resolved by the SpanPlan.
+        spans = []
+        if self._rule_set is not None:
+            # One scan for all regex rules, so they are timed together.
+            with RULE_SECONDS.time('regex/combined'):
+                spans.extend(self._rule_set.detect(text, self._method))
+        for rule in self._other_rules:
+            with RULE_SECONDS.time(f'regex/{rule.placeholder}'):
+                spans.extend(rule.detect(text, self._method))
+        return Detection(self._method, spans)
+
+    def detect_many(self, texts: list[str]) -> list[Detection]:
+        return [self.detect(text) for text in texts]
+
+    def clean(self, text: str) -> CleanedTextResult:
+        return self.detect(text).redact(text)
+
+    def clean_many(self, texts: list[str]) -> list[CleanedTextResult]:
+        return [self.clean(text) for text in texts]
+
+    def replaced_count(self, text: str) -> dict[str, int]:
+        return self.clean(text).replaced_count
+
+    def replaced_values(self, text: str) -> dict[str, str]:
+        return self.clean(text).replaced_values
@@ -0,0 +1,174 @@
+import bisect
+import heapq
+import string
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+_PUNCTUATION = frozenset(string.punctuation)
+
+
+def trim_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """
+    Trim leading/trailing whitespace and trailing/leading punctuation from a span.
+    Keeps offsets consistent with the original string.
+    """
+    # First trim whitespace
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+
+    # Then trim punctuation (common for NER/PII models)
+    while start < end and text[start] in _PUNCTUATION:
+        start += 1
+    while end > start and text[end - 1] in _PUNCTUATION:
+        end -= 1
+
+    return start, end
+
+
+@dataclass(frozen=True, slots=True, order=True)
+class Span:
+    """An entity found in a text, as offsets into that text."""
+
+    start: int
+    end: int
+    label: str
+    # Method namespace of the detector, e.g. 'regex' or 'model/ab-ai'.
+    source: str
+
+
+def entity_spans(
+    text: str,
+    entities: list[dict[str, Any]],
+    source: str,
+    *,
+    label_key: str = 'entity_group',
+    trim_spans: bool = True,
+) -> list[Span]:
+    """Convert NER-style entity dicts to spans, skipping invalid ones."""
+    spans: list[Span] = []
+    for e in entities:
+        if 'start' not in e or 'end' not in e or label_key not in e:
+            continue
+
+        start = int(e['start'])
+        end = int(e['end'])
+        if start < 0 or end > len(text) or start >= end:
+            continue
+
+        if trim_spans:
+            start, end = trim_span(text, start, end)
+            if start >= end:
+                continue
+
+        spans.append(Span(start, end, str(e[label_key]), source))
+    return spans
+
+
+class SpanPlan:
+    """
+    Spans detected on one text, resolved and redacted in a single pass.
+
+    Detectors add spans against the original text in any order. Overlaps
+    are resolved by source priority: the source added first wins. Within a
+    source the leftmost span wins, and the longest one for equal starts.
+    `materialize` numbers placeholders per source and label in reading order
+    and namespaces counts and values by source, e.g. 'regex:EMAIL_1'.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._spans: dict[str, list[Span]] = {}
+
+    def add(self, span: Span) -> None:
+        if span.start < 0 or span.end > len(self.text):
+            return
+        if span.start >= span.end:
+            return
+        self._spans.setdefault(span.source, []).append(span)
+
+    def extend(self, spans: Iterable[Span]) -> None:
+        for span in spans:
+            self.add(span)
+
+    def add_entities(
+        self,
+        source: str,
+        entities: list[dict[str, Any]],
+        *,
+        label_key: str = 'entity_group',
+        trim_spans: bool = True,
+    ) -> None:
+        """Add NER-style entity dicts, see `entity_spans`."""
+        self.extend(
+            entity_spans(
+                self.text,
+                entities,
+                source,
+                label_key=label_key,
+                trim_spans=trim_spans,
+            )
+        )
+
+    def resolve(self) -> list[Span]:
+        """Return the non-overlapping spans to redact, in reading order."""
+        kept: list[Span] = []
+        kept_starts: list[int] = []
+        kept_ends: list[int] = []
+
+        for spans in self._spans.values():
+            accepted: list[Span] = []
+            last_end = -1
+            for span in sorted(spans, key=lambda s: (s.start, s.start - s.end)):
+                if span.start < last_end:
+                    continue
+                # Drop spans overlapping one kept from a higher-priority source.
+                idx = bisect.bisect_left(kept_ends, span.start + 1)
+                if idx < len(kept_starts) and kept_starts[idx] < span.end:
+                    continue
+                accepted.append(span)
+                last_end = span.end
+
+            kept = list(heapq.merge(kept, accepted))
+            kept_starts = [span.start for span in kept]
+            kept_ends = [span.end for span in kept]
+
+        return kept
+
+    def placeholders(self, start_at: int = 1) -> list[tuple[Span, str]]:
+        """Return the resolved spans with their placeholder keys."""
+        next_idx: dict[tuple[str, str], int] = defaultdict(lambda: start_at)
+        placed: list[tuple[Span, str]] = []
+        for span in self.resolve():
+            idx = next_idx[span.source, span.label]
+            next_idx[span.source, span.label] += 1
+            placed.append((span, f'{span.label}_{idx}'))
+        return placed
+
+    def materialize(
+        self, start_at: int = 1
+    ) -> tuple[str, dict[str, int], dict[str, str]]:
+        """Return the redacted text, counts and replaced values."""
+        text = self.text
+        counters: dict[str, int] = {}
+        mapping: dict[str, str] = {}
+        parts: list[str] = []
+        cursor = 0
+
+        for span, placeholder_key in self.placeholders(start_at):
+            parts.append(text[cursor : span.start])
+            parts.append(f'[{placeholder_key}]')
+            cursor = span.end
+
+            mapping[f'{span.source}:{placeholder_key}'] = text[
+                span.start : span.end
+            ]
+            counters[f'{span.source}:{span.label}'] = (
+                counters.get(f'{span.source}:{span.label}', 0) + 1
+            )
+
+        parts.append(text[cursor:])
+        return ''.join(parts), counters, mapping
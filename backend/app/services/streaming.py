@@ -0,0 +1,236 @@
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import BinaryIO
+
+from app.core.config import NDJSON_CHUNK_SIZE, NDJSON_MAX_LINE_BYTES
+from app.core.errors import ServiceError, ValidationError
+from app.models.pii import (
+    PiiBatchItemOut,
+    PiiIn,
+    PiiOut,
+    batch_item_include,
+)
+from app.services.base import HtmlService, TextAnonify, ValidationService
+from app.services.cache import ResultCache
+from app.services.orchestrator import BatchOrchestrator
+from pydantic import ValidationError as PydanticValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
+    HTTP_413_CONTENT_TOO_LARGE,
+    HTTP_422_UNPROCESSABLE_CONTENT,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+
+
+class _OversizedLine:
+    """Marker for an input line longer than the configured limit."""
+
+
+class NdjsonAnonymizer:
+    """
+    Anonymizes newline-delimited JSON records in bounded chunks.
+
+    Every input line is a `PiiIn` object; every output line is a
+    `PiiBatchItemOut` whose `index` is the zero-based record number. At most
+    `chunk_size` records and one line of `max_line_bytes` are held at a time,
+    so memory stays flat regardless of input size. Blank lines are skipped.
+    With `fields`, results only carry those `PiiOut` fields.
+    """
+
+    def __init__(
+        self,
+        clean_services: list[TextAnonify],
+        validation_services: list[ValidationService],
+        html_service: HtmlService,
+        clean_html: bool = False,
+        cache: ResultCache | None = None,
+        chunk_size: int = NDJSON_CHUNK_SIZE,
+        max_line_bytes: int = NDJSON_MAX_LINE_BYTES,
+        restore_html: bool = False,
+        fields: frozenset[str] | None = None,
+    ) -> None:
+        self.clean_services = clean_services
+        self.validation_services = validation_services
+        self.html_service = html_service
+        self.clean_html = clean_html
+        self.cache = cache
+        self.chunk_size = max(1, chunk_size)
+        self.max_line_bytes = max_line_bytes
+        self.restore_html = restore_html
+        self._include = batch_item_include(fields)
+
+    def _process_chunk(
+        self, records: list[tuple[int, bytes | _OversizedLine]]
+    ) -> list[str]:
+        items: dict[int, PiiBatchItemOut] = {}
+        inputs: list[tuple[int, PiiIn]] = []
+
+        for index, line in records:
+            if isinstance(line, _OversizedLine):
+                items[index] = PiiBatchItemOut(
+                    index=index,
+                    status_code=HTTP_413_CONTENT_TOO_LARGE,
+                    error=f'Record exceeds {self.max_line_bytes} bytes.',
+                )
+                continue
+            try:
+                inputs.append((index, PiiIn.model_validate_json(line)))
+            except PydanticValidationError as e:
+                items[index] = PiiBatchItemOut(
+                    index=index,
+                    status_code=HTTP_422_UNPROCESSABLE_CONTENT,
+                    error=json.dumps(
+                        e.errors(
+                            include_url=False,
+                            include_context=False,
+                            include_input=False,
+                        ),
+                        default=str,
+                    ),
+                )
+
+        if inputs:
+            outputs = BatchOrchestrator(
+                inputs=[item for _, item in inputs],
+                clean_services=self.clean_services,
+                validation_services=self.validation_services,
+                html_service=self.html_service,
+                clean_html=self.clean_html,
+                cache=self.cache,
+                restore_html=self.restore_html,
+            ).run_pipeline()
+
+            for (index, item), output in zip(inputs, outputs, strict=True):
+                items[index] = self._to_item(index, item, output)
+
+        return [
+            items[index].model_dump_json(include=self._include) + '\n'
+            for index, _ in records
+        ]
+
+    @staticmethod
+    def _to_item(
+        index: int,
+        item: PiiIn,
+        output: PiiOut | ServiceError | ValidationError,
+    ) -> PiiBatchItemOut:
+        if isinstance(output, ValidationError):
+            return PiiBatchItemOut(
+                index=index,
+                status_code=HTTP_400_BAD_REQUEST,
+                error=output.message,
+            )
+        if isinstance(output, ServiceError):
+            return PiiBatchItemOut(
+                index=index,
+                status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+                error=output.message,
+            )
+        return PiiBatchItemOut(
+            index=index,
+            status_code=HTTP_200_OK,
+            result=output.model_copy(
+                update={'original_text': item.original_text}
+            ),
+        )
+
+    def _process_records(
+        self, lines: Iterable[bytes | _OversizedLine]
+    ) -> Iterator[str]:
+        records: list[tuple[int, bytes | _OversizedLine]] = []
+        for index, line in enumerate(lines):
+            records.append((index, line))
+            if len(records) >= self.chunk_size:
+                yield from self._process_chunk(records)
+                records = []
+
+        if records:
+            yield from self._process_chunk(records)
+
+    def _checked_lines(
+        self, lines: Iterable[str | bytes]
+    ) -> Iterator[bytes | _OversizedLine]:
+        for raw in lines:
+            line = raw.encode() if isinstance(raw, str) else raw
+            if not line.strip():
+                continue
+            if len(line) > self.max_line_bytes:
+                yield _OversizedLine()
+            else:
+                yield line
+
+    def _read_lines(self, source: BinaryIO) -> Iterator[bytes | _OversizedLine]:
+        # Reads at most one byte past the limit, so an oversized line is
+        # never held whole.
+        limit = self.max_line_bytes + 1
+        while line := source.readline(limit):
+            if line.endswith(b'\n') or len(line) < limit:
+                if line.strip():
+                    yield line
+                continue
+            while (rest := source.readline(limit)) and not rest.endswith(b'\n'):
+                pass
+            yield _OversizedLine()
+
+    def process_lines(self, lines: Iterable[str | bytes]) -> Iterator[str]:
+        """Anonymize NDJSON lines already split, e.g. a list of strings."""
+        yield from self._process_records(self._checked_lines(lines))
+
+    def process_file(self, source: BinaryIO) -> Iterator[str]:
+        """Anonymize NDJSON read from a binary file, e.g. stdin."""
+        yield from self._process_records(self._read_lines(source))
+
+    async def _split_lines(
+        self, chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes | _OversizedLine]:
+        buffer = bytearray()
+        oversized = False
+
+        async for chunk in chunks:
+            start = 0
+            while (end := chunk.find(b'\n', start)) >= 0:
+                if not oversized:
+                    buffer += chunk[start:end]
+                if oversized or len(buffer) > self.max_line_bytes:
+                    yield _OversizedLine()
+                elif buffer.strip():
+                    yield bytes(buffer)
+                buffer.clear()
+                oversized = False
+                start = end + 1
+
+            if not oversized:
+                buffer += chunk[start:]
+                if len(buffer) > self.max_line_bytes:
+                    # Drop the rest of this line instead of buffering it.
+                    oversized = True
+                    buffer.clear()
+
+        if oversized:
+            yield _OversizedLine()
+        elif buffer.strip():
+            yield bytes(buffer)
+
+    async def process_stream(
+        self, chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[str]:
+        """Anonymize an NDJSON byte stream, e.g. a request body."""
+        records: list[tuple[int, bytes | _OversizedLine]] = []
+        index = 0
+
+        async for line in self._split_lines(chunks):
+            records.append((index, line))
+            index += 1
+
+            if len(records) >= self.chunk_size:
+                for out in await run_in_threadpool(
+                    self._process_chunk, records
+                ):
+                    yield out
+                records = []
+
+        if records:
+            for out in await run_in_threadpool(self._process_chunk, records):
+                yield out
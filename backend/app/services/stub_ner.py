@@ -0,0 +1,94 @@
+import json
+import pathlib
+import re
+import time
+from typing import Any
+
+from app.services.batching import Entities
+
+# Used when no lexicon is configured: capitalized word pairs as people.
+DEFAULT_PATTERNS = {'PER': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'}
+
+
+class StubNer:
+    """
+    Deterministic in-process NER for offline and load testing.
+
+    Entities come from a lexicon of surface forms and from regex patterns,
+    both keyed by label, and have the shape of an aggregated
+    token-classification pipeline: a string gives a list of entities, a
+    list of strings gives one list per string. Each call sleeps for
+    `latency_ms` plus `latency_ms_per_kchar` per 1000 input characters, so
+    batching and concurrency behave as with a real model.
+    """
+
+    def __init__(
+        self,
+        lexicon: dict[str, list[str]] | None = None,
+        patterns: dict[str, str] | None = None,
+        *,
+        latency_ms: float = 0.0,
+        latency_ms_per_kchar: float = 0.0,
+    ) -> None:
+        if lexicon is None and patterns is None:
+            patterns = DEFAULT_PATTERNS
+
+        alternatives: list[str] = []
+        self._labels: list[str] = []
+        for label, surfaces in (lexicon or {}).items():
+            # Longest first, so the longest surface form wins.
+            ordered = sorted(surfaces, key=len, reverse=True)
+            alternatives.append(
+                r'\b(?:' + '|'.join(map(re.escape, ordered)) + r')\b'
+            )
+            self._labels.append(label)
+        for label, pattern in (patterns or {}).items():
+            alternatives.append(f'(?:{pattern})')
+            self._labels.append(label)
+
+        self._pattern = re.compile(
+            '|'.join(f'(?P<g{i}>{alt})' for i, alt in enumerate(alternatives))
+            or r'(?!)'
+        )
+        self.latency_ms = latency_ms
+        self.latency_ms_per_kchar = latency_ms_per_kchar
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> 'StubNer':
+        """
+        Load a JSON file `{"lexicon": {label: [surface, ...]},
+        "patterns": {label: regex}}`; either key may be left out.
+        """
+        data = json.loads(pathlib.Path(path).read_text(encoding='utf-8'))
+        return cls(data.get('lexicon'), data.get('patterns'), **kwargs)
+
+    def _entities(self, text: str) -> Entities:
+        entities = []
+        for match in self._pattern.finditer(text):
+            if match.start() == match.end():
+                continue
+            entities.append(
+                {
+                    'entity_group': self._labels[int(match.lastgroup[1:])],
+                    'score': 1.0,
+                    'word': match.group(),
+                    'start': match.start(),
+                    'end': match.end(),
+                }
+            )
+        return entities
+
+    def _sleep(self, chars: int) -> None:
+        delay_ms = self.latency_ms + self.latency_ms_per_kchar * chars / 1000
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def __call__(
+        self, inputs: str | list[str], **kwargs: Any
+    ) -> Entities | list[Entities]:
+        if isinstance(inputs, str):
+            self._sleep(len(inputs))
+            return self._entities(inputs)
+
+        self._sleep(sum(map(len, inputs)))
+        return [self._entities(text) for text in inputs]
@@ -1,7 +1,7 @@
-import string
-from collections import defaultdict
 from typing import Any
 
+from app.services.span_plan import SpanPlan
+
 
 class TextUtils:
     # Label normalization mapping for model entities
@@ -32,52 +32,27 @@ class TextUtils:
             normalized.append(entity)
         return normalized
 
-    @staticmethod
-    def _trim_span(text: str, start: int, end: int) -> tuple[int, int]:
-        """
-        Trim leading/trailing whitespace and trailing/leading punctuation from a span.
-        Keeps offsets consistent with the original string.
-        """
-        # First trim whitespace
-        while start < end and text[start].isspace():
-            start += 1
-        while end > start and text[end - 1].isspace():
-            end -= 1
-
-        # Then trim punctuation (common for NER/PII models)
-        punct = set(string.punctuation)
-        while start < end and text[start] in punct:
-            start += 1
-        while end > start and text[end - 1] in punct:
-            end -= 1
-
-        return start, end
-
     @staticmethod
     def return_placeholder_with_counter(
         text: str, method: str, pattern, placeholder: str
     ) -> tuple[str, dict[str, int], dict[str, str]]:
         """Replace regex matches with numbered placeholders and collect originals."""
 
+        # Keys are namespaced as they are built; no second pass over dicts.
         replaced_values: dict[str, str] = {}
+        key_prefix = f'{method}:{placeholder}_'
         count = 0
 
         def replace_with_counter(match):
             nonlocal count
             count += 1
-            placeholder_with_counter = f'[{placeholder}_{count}]'
-            # Store originals keyed by placeholder name; the caller can namespace.
-            replaced_values[f'{placeholder}_{count}'] = match.group(0)
-            return placeholder_with_counter
+            replaced_values[f'{key_prefix}{count}'] = match.group(0)
+            return f'[{placeholder}_{count}]'
 
         text = pattern.sub(replace_with_counter, text)
-        replaced_count = {placeholder: count} if count > 0 else {}
-
-        # Namespace keys with method prefix
-        namespaced_count = TextUtils.namespace_dict(replaced_count, method)
-        namespaced_values = TextUtils.namespace_dict(replaced_values, method)
+        replaced_count = {f'{method}:{placeholder}': count} if count else {}
 
-        return text, namespaced_count, namespaced_values
+        return text, replaced_count, replaced_values
 
     @staticmethod
     def redact_entities_with_counter(
@@ -100,69 +75,12 @@ class TextUtils:
         Required entity fields:
           - start (int), end (int)
           - entity_group (or label_key)
-        """
-
-        # 1) Normalize, validate, and (optionally) trim spans
-        normalized = []
-        for e in entities:
-            if 'start' not in e or 'end' not in e or label_key not in e:
-                continue
-
-            start = int(e['start'])
-            end = int(e['end'])
-            if start < 0 or end > len(text) or start >= end:
-                continue
 
-            if trim_spans:
-                start, end = TextUtils._trim_span(text, start, end)
-                if start >= end:
-                    continue
-
-            normalized.append({**e, 'start': start, 'end': end})
-
-        # 2) Sort left-to-right, prefer longer spans if same start
-        ents = sorted(
-            normalized, key=lambda e: (e['start'], -(e['end'] - e['start']))
+        The text is rebuilt in one left-to-right pass, so the cost is linear
+        in the text length plus the number of entities.
+        """
+        plan = SpanPlan(text)
+        plan.add_entities(
+            method, entities, label_key=label_key, trim_spans=trim_spans
         )
-
-        # 3) Remove overlaps deterministically
-        filtered = []
-        last_end = -1
-        for e in ents:
-            if e['start'] < last_end:
-                continue
-            filtered.append(e)
-            last_end = e['end']
-
-        # 4) Assign numbered placeholders (numbering follows reading order)
-        next_idx = defaultdict(lambda: start_at)
-        assigned = []
-        mapping: dict[str, str] = {}
-
-        for e in filtered:
-            label = str(e[label_key])
-            idx = next_idx[label]
-            next_idx[label] += 1
-
-            placeholder_key = f'{label}_{idx}'  # EMAIL_1
-            placeholder = f'[{placeholder_key}]'  # [EMAIL_1]
-
-            start, end = e['start'], e['end']
-            assigned.append((start, end, placeholder))
-            mapping[placeholder_key] = text[start:end]  # use true substring
-
-        # 5) Replace spans right-to-left to preserve offsets
-        redacted = text
-        for start, end, placeholder in sorted(
-            assigned, key=lambda x: x[0], reverse=True
-        ):
-            redacted = redacted[:start] + placeholder + redacted[end:]
-
-        # 6) Build counters
-        counters = {label: next_idx[label] - start_at for label in next_idx}
-
-        # 7) Namespace keys with method prefix
-        namespaced_counters = TextUtils.namespace_dict(counters, method)
-        namespaced_mapping = TextUtils.namespace_dict(mapping, method)
-
-        return redacted, namespaced_counters, namespaced_mapping
+        return plan.materialize(start_at)
@@ -0,0 +1,123 @@
+"""
+Compare HTML text extraction throughput on synthetic email HTML.
+
+The documents mimic marketing and reply-chain emails: nested layout
+tables with inline styles, a style block, tracking pixels, entities and
+quoted replies, at a few hundred KB. BeautifulSoup with html.parser, the
+previous implementation, is the baseline. Backends whose library is not
+installed are skipped.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_html_parsers \\
+        --size-kb 50 300 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import time
+
+from app.services.html_service import HtmlService, available_parsers
+from bs4 import BeautifulSoup
+
+HEAD = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8">'
+    '<title>Your order &amp; account update</title><style>'
+    'body { margin: 0; } .btn { color: #fff; background: #0a66c2; }'
+    '</style></head><body style="margin:0;padding:0">\n'
+)
+ROW = (
+    '<tr><td style="padding:8px 16px;font-family:Arial,sans-serif;'
+    'font-size:14px;color:#333333" align="left" valign="top">'
+    '<table role="presentation" width="100%" cellpadding="0" '
+    'cellspacing="0"><tr><td>Hi {name},&nbsp;your order '
+    '<b>#{order}</b> ships to {street} &ndash; contact '
+    '<a href="mailto:{email}" style="color:#0a66c2">{email}</a> or visit '
+    '<a href="https://shop.example.com/o/{order}?utm_source=mail">'
+    'our site</a>.</td></tr></table></td></tr>\n'
+)
+QUOTE = (
+    '<blockquote type="cite"><div>On Mon, {name} &lt;{email}&gt; '
+    'wrote:<br>Thanks &#8212; see you at {street}.</div></blockquote>\n'
+)
+PIXEL = (
+    '<img src="https://t.example.com/p/{order}.gif" width="1" height="1" '
+    'alt="" style="display:block">\n'
+)
+TAIL = '</body></html>\n'
+NAMES = ['Anna Smith', 'José Núñez', 'Li Wei', 'Olga Petrova']
+STREETS = ['12 Baker St', '5 Rue de Rivoli', '88 Nanjing Rd']
+
+
+def make_email(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = [HEAD, '<table width="100%">']
+    length = len(HEAD)
+    while length < size:
+        values = {
+            'name': rng.choice(NAMES),
+            'order': rng.randrange(10**6, 10**7),
+            'street': rng.choice(STREETS),
+            'email': f'user{rng.randrange(1000)}@mail.example.com',
+        }
+        part = rng.choice((ROW, ROW, ROW, QUOTE, PIXEL)).format(**values)
+        parts.append(part)
+        length += len(part)
+    parts.append('</table>' + TAIL)
+    return ''.join(parts)
+
+
+def measure(extract, html: str, repeat: int) -> float:
+    extract(html)  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(html)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size-kb', nargs='+', type=int, default=[50, 300])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    variants = {
+        'bs4_html_parser': lambda html: BeautifulSoup(
+            html, 'html.parser'
+        ).get_text(),
+        'stdlib_extract': HtmlService().extract,
+    }
+    for name in available_parsers():
+        try:
+            variants[name] = HtmlService(parser=name).clean
+        except ImportError:
+            continue
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for size_kb in args.size_kb:
+        html = make_email(size_kb * 1024)
+        expected = variants['bs4_html_parser'](html)
+        size_results = results[f'{size_kb}kb'] = {}
+        for name, extract in variants.items():
+            elapsed = measure(extract, html, args.repeat)
+            text = extract(html)
+            text = text if isinstance(text, str) else text.text
+            size_results[name] = {
+                'ms': round(elapsed * 1e3, 2),
+                'mb_per_s': round(len(html) / elapsed / 1e6, 2),
+                'same_text': text == expected,
+            }
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
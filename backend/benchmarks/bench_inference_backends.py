@@ -0,0 +1,169 @@
+"""
+Compare NER inference backends on latency and entity-level F1.
+
+Every backend runs the same labelled sentences through each model rule.
+F1 is reported against the gold labels and against the torch backend, so
+the delta shows how much accuracy an ONNX or int8 backend trades away.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend uv run --group prod --group onnx \\
+        python -m benchmarks.bench_inference_backends \\
+        --backends torch onnx onnx-int8 --output backends.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any
+
+from app.services.model_service import (
+    BaseModelRule,
+    ModelRuleAbAi,
+    ModelRuleBertBase,
+)
+
+# (text, [(label, surface form), ...]) with labels after normalization.
+SAMPLES: list[tuple[str, list[tuple[str, str]]]] = [
+    (
+        'John Smith works at Acme Corporation in Berlin.',
+        [
+            ('PERSON', 'John Smith'),
+            ('ORGANIZATION', 'Acme Corporation'),
+            ('LOCATION', 'Berlin'),
+        ],
+    ),
+    (
+        'Please call Maria Garcia on 555-123-4567 tomorrow.',
+        [('PERSON', 'Maria Garcia')],
+    ),
+    (
+        'The meeting with Google in London was moved to Friday.',
+        [('ORGANIZATION', 'Google'), ('LOCATION', 'London')],
+    ),
+    (
+        'Angela Merkel visited Paris with officials from the United Nations.',
+        [
+            ('PERSON', 'Angela Merkel'),
+            ('LOCATION', 'Paris'),
+            ('ORGANIZATION', 'United Nations'),
+        ],
+    ),
+    ('The build finished in 42 seconds with no errors.', []),
+]
+
+RULES: dict[str, type[BaseModelRule]] = {
+    'model/ab-ai': ModelRuleAbAi,
+    'model/bert-base-NER': ModelRuleBertBase,
+}
+
+
+def entity_set(
+    text: str, entities: list[dict[str, Any]]
+) -> set[tuple[str, str]]:
+    return {
+        (str(e['entity_group']), text[e['start'] : e['end']].strip())
+        for e in entities
+    }
+
+
+def f1(predicted: set, expected: set) -> float:
+    if not predicted and not expected:
+        return 1.0
+    tp = len(predicted & expected)
+    if tp == 0:
+        return 0.0
+    precision = tp / len(predicted)
+    recall = tp / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_backend(
+    rule_cls: type[BaseModelRule], backend: str, repeats: int
+) -> dict[str, Any]:
+    rule = rule_cls(backend=backend)
+
+    start = time.perf_counter()
+    rule.load()
+    load_s = time.perf_counter() - start
+
+    # Warm up once so lazy initialisation is not measured.
+    rule.extract_entities(SAMPLES[0][0])
+
+    latencies: list[float] = []
+    predictions: list[set[tuple[str, str]]] = []
+    for text, _ in SAMPLES:
+        entities: list[dict[str, Any]] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            entities = rule.extract_entities(text)
+            latencies.append(time.perf_counter() - start)
+        predictions.append(entity_set(text, entities))
+
+    gold_f1 = statistics.mean(
+        f1(predicted, set(gold))
+        for predicted, (_, gold) in zip(predictions, SAMPLES, strict=True)
+    )
+
+    return {
+        'load_s': round(load_s, 3),
+        'latency_ms_p50': round(statistics.median(latencies) * 1000, 3),
+        'latency_ms_p95': round(
+            statistics.quantiles(latencies, n=20)[-1] * 1000, 3
+        ),
+        'f1_gold': round(gold_f1, 4),
+        'predictions': predictions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--backends', nargs='+', default=['torch', 'onnx', 'onnx-int8']
+    )
+    parser.add_argument('--rules', nargs='+', default=list(RULES))
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, Any]] = {}
+    for rule_name in args.rules:
+        per_backend = {
+            backend: run_backend(RULES[rule_name], backend, args.repeats)
+            for backend in args.backends
+        }
+
+        reference = per_backend.get('torch')
+        reference_predictions = reference['predictions'] if reference else []
+        for result in per_backend.values():
+            predictions = result.pop('predictions')
+            if reference is None:
+                continue
+            result['f1_vs_torch'] = round(
+                statistics.mean(
+                    f1(predicted, expected)
+                    for predicted, expected in zip(
+                        predictions, reference_predictions, strict=True
+                    )
+                ),
+                4,
+            )
+            result['f1_gold_delta'] = round(
+                result['f1_gold'] - reference['f1_gold'], 4
+            )
+            result['latency_p50_delta_ms'] = round(
+                result['latency_ms_p50'] - reference['latency_ms_p50'], 3
+            )
+
+        results[rule_name] = per_backend
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
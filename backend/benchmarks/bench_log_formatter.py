@@ -0,0 +1,138 @@
+"""
+Measure JSON log formatter throughput on request log records.
+
+The records mirror what RequestLoggingMiddleware emits, formatted with the
+fmt_keys from the logging config. The previous formatter is kept here as
+the baseline; the orjson variant runs only when orjson is installed.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_log_formatter \\
+        --records 50000
+"""
+
+import argparse
+import datetime as dt
+import json
+import logging
+import time
+from typing import override
+
+from app.core import logging_config
+from app.core.logging_config import LOG_RECORD_BUILTIN_ATTRS, MyJSONFormatter
+
+FMT_KEYS = {
+    'level': 'levelname',
+    'message': 'message',
+    'timestamp': 'timestamp',
+    'logger': 'name',
+    'module': 'module',
+    'function': 'funcName',
+    'line': 'lineno',
+    'thread_name': 'threadName',
+}
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """The formatter this benchmark compares to."""
+
+    def __init__(self, *, fmt_keys: dict[str, str] | None = None):
+        super().__init__()
+        self.fmt_keys = fmt_keys if fmt_keys is not None else {}
+
+    @override
+    def format(self, record: logging.LogRecord) -> str:
+        always_fields = {
+            'message': record.getMessage(),
+            'timestamp': dt.datetime.fromtimestamp(
+                record.created, tz=dt.UTC
+            ).isoformat(),
+        }
+        if record.exc_info is not None:
+            always_fields['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info is not None:
+            always_fields['stack_info'] = self.formatStack(record.stack_info)
+
+        message = {
+            key: msg_val
+            if (msg_val := always_fields.pop(val, None)) is not None
+            else getattr(record, val)
+            for key, val in self.fmt_keys.items()
+        }
+        message.update(always_fields)
+        for key, val in record.__dict__.items():
+            if key not in LOG_RECORD_BUILTIN_ATTRS:
+                message[key] = val
+        return json.dumps(message, default=str)
+
+
+def make_records(count: int) -> list[logging.LogRecord]:
+    logger = logging.getLogger('anonify.requests')
+    start = time.time()
+    records = []
+    for i in range(count):
+        record = logger.makeRecord(
+            logger.name,
+            logging.INFO,
+            'middleware.py',
+            98,
+            'Response: %s %s - %s',
+            ('POST', '/api/v1/pii/clean', 200),
+            None,
+            func='__call__',
+            extra={
+                'method': 'POST',
+                'path': '/api/v1/pii/clean',
+                'status_code': 200,
+                'process_time': 0.0123,
+                'client_host': '127.0.0.1',
+            },
+        )
+        # About 200 records per second, like a busy worker.
+        record.created = start + i * 0.005
+        records.append(record)
+    return records
+
+
+def measure(formatter: logging.Formatter, records: list[logging.LogRecord]):
+    for record in records[:1000]:  # warm up
+        formatter.format(record)
+
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    elapsed = time.perf_counter() - start
+    return {
+        'us_per_record': round(elapsed / len(records) * 1e6, 3),
+        'records_per_s': round(len(records) / elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    variants: dict[str, logging.Formatter] = {
+        'legacy': LegacyJSONFormatter(fmt_keys=FMT_KEYS),
+        'json': MyJSONFormatter(fmt_keys=FMT_KEYS, use_orjson=False),
+    }
+    if logging_config.orjson is not None:
+        variants['orjson'] = MyJSONFormatter(fmt_keys=FMT_KEYS)
+
+    results = {name: measure(f, records) for name, f in variants.items()}
+    baseline = results['legacy']['us_per_record']
+    for result in results.values():
+        result['speedup'] = round(baseline / result['us_per_record'], 2)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
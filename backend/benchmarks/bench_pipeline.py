@@ -0,0 +1,270 @@
+"""
+Benchmark the anonymization pipeline offline, stage by stage.
+
+Covers each regex rule, RemovalServiceRegex.clean,
+TextUtils.redact_entities_with_counter, HtmlService.clean,
+Orchestrator.run_pipeline and the /api/v1/pii/clean route through the
+ASGI transport, on synthetic corpora from 1 KB to 50 KB at low and high
+PII density. Model rules use the 'stub' inference backend with the corpus
+lexicon, so nothing is downloaded, and the result cache is disabled so
+every call does the work. STUB_NER_LATENCY_MS and
+STUB_NER_LATENCY_MS_PER_KCHAR add simulated model latency.
+
+Results are JSON with the commit they were measured on. Pass an earlier
+run as `--baseline` to get the change of every median against it.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_pipeline \\
+        --sizes-kb 1 10 50 --output pipeline.json
+    PYTHONPATH=backend python -m benchmarks.bench_pipeline \\
+        --baseline pipeline.json
+"""
+
+import atexit
+import json
+import os
+import tempfile
+
+from benchmarks.corpus import STUB_LEXICON
+
+with tempfile.NamedTemporaryFile(
+    'w', suffix='.json', prefix='stub-lexicon-', delete=False
+) as _lexicon:
+    json.dump(STUB_LEXICON, _lexicon)
+atexit.register(os.unlink, _lexicon.name)
+
+# Read by app.core.config at import time.
+os.environ.setdefault('MODEL_PRELOAD', 'false')
+os.environ.setdefault('MODEL_BACKEND_AB_AI', 'stub')
+os.environ.setdefault('MODEL_BACKEND_BERT_BASE', 'stub')
+os.environ.setdefault('STUB_NER_LEXICON_PATH', _lexicon.name)
+os.environ.setdefault('RESULT_CACHE_MAX_BYTES', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import datetime as dt  # noqa: E402
+import logging  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import time  # noqa: E402
+from collections.abc import Awaitable, Callable  # noqa: E402
+from functools import partial  # noqa: E402
+from typing import Any  # noqa: E402
+
+from app.api.server import get_application  # noqa: E402
+from app.models.pii import PiiIn  # noqa: E402
+from app.services import (  # noqa: E402
+    html_service,
+    regex_rules,
+    removal_service_model,
+    removal_service_regex,
+    validation_service,
+)
+from app.services.orchestrator import Orchestrator  # noqa: E402
+from app.services.stub_ner import StubNer  # noqa: E402
+from app.services.utils import TextUtils  # noqa: E402
+from asgi_lifespan import LifespanManager  # noqa: E402
+from benchmarks.corpus import DENSITIES, make_html, make_text  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+
+def summarize(timings: list[float], chars: int) -> dict[str, float]:
+    p50 = statistics.median(timings)
+    # quantiles() needs two points; a single run is its own p95.
+    p95 = (
+        statistics.quantiles(timings, n=100)[94]
+        if len(timings) > 1
+        else timings[0]
+    )
+    return {
+        'ms_p50': round(p50 * 1e3, 4),
+        'ms_p95': round(p95 * 1e3, 4),
+        'ms_mean': round(statistics.fmean(timings) * 1e3, 4),
+        'mb_per_s': round(chars / p50 / 1e6, 3),
+    }
+
+
+def measure(fn: Callable[[], Any], repeats: int) -> list[float]:
+    fn()  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[Any]], repeats: int
+) -> list[float]:
+    await fn()  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_pipeline(text: str) -> None:
+    Orchestrator(
+        input=PiiIn(original_text=text),
+        clean_services=[removal_service_regex, removal_service_model],
+        validation_services=[validation_service],
+        html_service=html_service,
+    ).run_pipeline()
+
+
+def stage_cases(text: str) -> dict[str, tuple[Callable[[], Any], int]]:
+    """Benchmark name -> (callable, characters it processes)."""
+    html = make_html(text)
+    entities = StubNer.from_file(os.environ['STUB_NER_LEXICON_PATH'])(text)
+    cases: dict[str, tuple[Callable[[], Any], int]] = {
+        f'regex_rule/{type(rule).__name__}': (
+            partial(rule.apply, text),
+            len(text),
+        )
+        for rule in regex_rules
+    }
+    cases['removal_service_regex.clean'] = (
+        partial(removal_service_regex.clean, text),
+        len(text),
+    )
+    cases['text_utils.redact_entities_with_counter'] = (
+        partial(
+            TextUtils.redact_entities_with_counter, text, entities, 'model'
+        ),
+        len(text),
+    )
+    cases['html_service.clean'] = (partial(html_service.clean, html), len(html))
+    cases['orchestrator.run_pipeline'] = (
+        partial(run_pipeline, text),
+        len(text),
+    )
+    return cases
+
+
+async def route_timings(texts: list[str], repeats: int) -> list[list[float]]:
+    # httpx logs every request at INFO, which would end up in the report.
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    app = get_application()
+    async with (
+        LifespanManager(app),
+        AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://testserver'
+        ) as client,
+    ):
+        path = app.url_path_for('pii:remover')
+
+        async def post(text: str) -> None:
+            response = await client.post(path, json={'original_text': text})
+            response.raise_for_status()
+
+        return [
+            await measure_async(partial(post, text), repeats) for text in texts
+        ]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {
+            (r['benchmark'], r['size_kb'], r['density']): r
+            for r in json.load(f)['results']
+        }
+    for result in results:
+        before = baseline.get(
+            (result['benchmark'], result['size_kb'], result['density'])
+        )
+        if before is None:
+            continue
+        result['baseline_ms_p50'] = before['ms_p50']
+        result['change_pct'] = round(
+            (result['ms_p50'] / before['ms_p50'] - 1) * 100, 1
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--sizes-kb', nargs='+', type=int, default=[1, 5, 10, 50]
+    )
+    parser.add_argument(
+        '--densities',
+        nargs='+',
+        choices=list(DENSITIES),
+        default=['low', 'high'],
+    )
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--baseline', help='Compare with an earlier run.')
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    # 1 KB is 1000 characters here: PiiIn accepts at most 50000.
+    corpora = [
+        (size_kb, density, make_text(size_kb * 1000, density))
+        for size_kb in args.sizes_kb
+        for density in args.densities
+    ]
+
+    results: list[dict[str, Any]] = []
+    for size_kb, density, text in corpora:
+        for name, (fn, chars) in stage_cases(text).items():
+            results.append(
+                {
+                    'benchmark': name,
+                    'size_kb': size_kb,
+                    'density': density,
+                    **summarize(measure(fn, args.repeats), chars),
+                }
+            )
+
+    texts = [text for _, _, text in corpora]
+    for (size_kb, density, text), timings in zip(
+        corpora, asyncio.run(route_timings(texts, args.repeats)), strict=True
+    ):
+        results.append(
+            {
+                'benchmark': 'route./api/v1/pii/clean',
+                'size_kb': size_kb,
+                'density': density,
+                **summarize(timings, len(text)),
+            }
+        )
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    report = json.dumps(
+        {
+            'commit': git_commit(),
+            'created_at': dt.datetime.now(dt.UTC).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeats': args.repeats,
+            'results': results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
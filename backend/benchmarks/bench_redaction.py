@@ -0,0 +1,112 @@
+"""
+Measure span redaction cost as the number of entities grows.
+
+`TextUtils.redact_entities_with_counter` is timed on a fixed-size text with
+an increasing number of entities, next to the previous implementation that
+spliced the string once per entity. The linear version's time per entity
+should stay flat; the splicing version's grows with the text length.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_redaction \\
+        --text-size 50000 --entities 10 100 1000 5000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from app.services.utils import TextUtils
+
+WORD = 'lorem '
+NAME = 'John'
+
+
+def make_case(
+    text_size: int, n_entities: int
+) -> tuple[str, list[dict[str, Any]]]:
+    """A text of about `text_size` chars with `n_entities` evenly spaced."""
+    step = max(len(NAME) + 1, text_size // max(1, n_entities))
+    filler = (WORD * (step // len(WORD) + 1))[: step - len(NAME) - 1]
+    text = f' {NAME}{filler}' * n_entities
+    entities = [
+        {'start': pos + 1, 'end': pos + 1 + len(NAME), 'entity_group': 'PER'}
+        for pos in range(0, len(text), step)
+    ]
+    return text, entities
+
+
+def splice_redact(text: str, entities: list[dict[str, Any]]) -> str:
+    """The previous approach: one string copy per replaced entity."""
+    redacted = text
+    for idx, e in enumerate(
+        sorted(entities, key=lambda e: e['start'], reverse=True)
+    ):
+        placeholder = f'[{e["entity_group"]}_{len(entities) - idx}]'
+        redacted = redacted[: e['start']] + placeholder + redacted[e['end'] :]
+    return redacted
+
+
+def time_ms(fn: Callable[[], Any], repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--text-size', type=int, default=50_000)
+    parser.add_argument(
+        '--entities', nargs='+', type=int, default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    results: list[dict[str, Any]] = []
+    for n_entities in args.entities:
+        text, entities = make_case(args.text_size, n_entities)
+        linear_ms = time_ms(
+            partial(
+                TextUtils.redact_entities_with_counter,
+                text,
+                entities,
+                'model',
+                trim_spans=False,
+            ),
+            args.repeats,
+        )
+        splice_ms = time_ms(
+            partial(splice_redact, text, entities), args.repeats
+        )
+        results.append(
+            {
+                'text_chars': len(text),
+                'entities': len(entities),
+                'linear_ms': round(linear_ms, 3),
+                'linear_us_per_entity': round(
+                    linear_ms * 1000 / max(1, len(entities)), 3
+                ),
+                'splice_ms': round(splice_ms, 3),
+                'splice_us_per_entity': round(
+                    splice_ms * 1000 / max(1, len(entities)), 3
+                ),
+            }
+        )
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
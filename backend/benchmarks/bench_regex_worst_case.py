@@ -0,0 +1,102 @@
+"""
+Benchmark each regex rule on adversarial 50 KB inputs, per regex engine.
+
+Each rule runs on inputs built to make a backtracking engine do the most
+work (see `corpus.adversarial_texts`), with `re` and, when google-re2 is
+installed, `re2`. The report gives the worst time per rule and engine;
+with `--max-ms`, the run fails when a rule on a checked engine exceeds it,
+which is how a linear-time engine is held to its guarantee.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_regex_worst_case \\
+        --engines re2 --max-ms 100
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any
+
+from app.services.regex_engine import REGEX_ENGINES, compile_pattern, re2
+from app.services.regex_service import (
+    RegexRuleEmail,
+    RegexRuleIpv4,
+    RegexRuleIpv6,
+    RegexRuleUrl,
+)
+from benchmarks.corpus import adversarial_texts
+
+RULES = [RegexRuleEmail(), RegexRuleIpv4(), RegexRuleIpv6(), RegexRuleUrl()]
+
+
+def best_of(pattern: Any, text: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in pattern.finditer(text):
+            pass
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--engines',
+        nargs='+',
+        choices=REGEX_ENGINES,
+        default=['re', 're2'] if re2 is not None else ['re'],
+    )
+    parser.add_argument('--size', type=int, default=50_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument(
+        '--max-ms', type=float, help='Fail when a rule takes longer.'
+    )
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    texts = adversarial_texts(args.size)
+    results: list[dict[str, Any]] = []
+    for engine in args.engines:
+        for rule in RULES:
+            pattern = compile_pattern(rule.pattern, engine)
+            timings = {
+                name: best_of(pattern, text, args.repeats)
+                for name, text in texts.items()
+            }
+            worst = max(timings, key=timings.__getitem__)
+            results.append(
+                {
+                    'rule': type(rule).__name__,
+                    'engine': engine,
+                    'worst_input': worst,
+                    'worst_ms': round(timings[worst] * 1e3, 3),
+                    'ms': {k: round(v * 1e3, 3) for k, v in timings.items()},
+                }
+            )
+
+    report = json.dumps(
+        {'size': args.size, 'repeats': args.repeats, 'results': results},
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r['worst_ms'] > args.max_ms]
+        for r in slow:
+            print(
+                f'{r["rule"]} on {r["engine"]}: {r["worst_ms"]} ms '
+                f'on {r["worst_input"]}',
+                file=sys.stderr,
+            )
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Measure request logging middleware overhead against /ping.
+
+Requests are driven straight through the ASGI interface, without a server
+or HTTP client, so the numbers are dominated by the middleware itself. The
+previous BaseHTTPMiddleware implementation is kept here as the baseline.
+Log records are formatted by a handler that discards the output, so the
+formatting cost is included but no I/O is.
+
+Usage (from the repository root):
+
+    PYTHONPATH=backend python -m benchmarks.bench_request_logging \\
+        --requests 5000 --sample-rate 1 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app.api.middleware import RequestLoggingMiddleware
+from app.api.v1.routes.ping import router as ping_router
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message
+
+logger = logging.getLogger('anonify.requests')
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares to."""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        start_time = time.time()
+        method = request.method
+        path = request.url.path
+        query_params = str(request.query_params) if request.query_params else ''
+        client_host = request.client.host if request.client else 'unknown'
+        client_port = request.client.port if request.client else None
+
+        logger.info(
+            f'Request: {method} {path}',
+            extra={
+                'method': method,
+                'path': path,
+                'query_params': query_params,
+                'client_host': client_host,
+                'client_port': client_port,
+                'request_id': request.headers.get('X-Request-ID', None),
+            },
+        )
+
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        status_code = response.status_code
+        log_level = logging.INFO if status_code < 400 else logging.WARNING
+        logger.log(
+            log_level,
+            f'Response: {method} {path} - {status_code}',
+            extra={
+                'method': method,
+                'path': path,
+                'status_code': status_code,
+                'process_time': round(process_time, 4),
+                'client_host': client_host,
+            },
+        )
+        return response
+
+
+class DiscardHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(ping_router, prefix='/ping')
+    return app
+
+
+SCOPE: dict[str, Any] = {
+    'type': 'http',
+    'asgi': {'version': '3.0'},
+    'http_version': '1.1',
+    'method': 'GET',
+    'scheme': 'http',
+    'path': '/ping/',
+    'raw_path': b'/ping/',
+    'root_path': '',
+    'query_string': b'',
+    'headers': [(b'host', b'testserver')],
+    'client': ('127.0.0.1', 50000),
+    'server': ('testserver', 80),
+}
+
+
+async def drive(app: ASGIApp, requests: int) -> list[float]:
+    async def receive() -> Message:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    latencies: list[float] = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(SCOPE), receive, send)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    return {
+        'us_p50': round(statistics.median(latencies) * 1e6, 2),
+        'us_mean': round(statistics.fmean(latencies) * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--sample-rate', nargs='+', type=int, default=[1, 10])
+    parser.add_argument('--level', default='INFO')
+    parser.add_argument('--output', help='Write JSON results to this file.')
+    args = parser.parse_args()
+
+    logger.handlers = [DiscardHandler()]
+    logger.propagate = False
+    logger.setLevel(args.level)
+
+    variants: dict[str, ASGIApp] = {
+        'none': build_app(),
+        'base_http_middleware': LegacyRequestLoggingMiddleware(build_app()),
+    }
+    for rate in args.sample_rate:
+        variants[f'asgi_sample_{rate}'] = RequestLoggingMiddleware(
+            build_app(), sample_rate=rate
+        )
+
+    results: dict[str, dict[str, float]] = {}
+    for name, app in variants.items():
+        asyncio.run(drive(app, min(500, args.requests)))  # warm up
+        results[name] = summarize(asyncio.run(drive(app, args.requests)))
+
+    baseline = results['none']['us_p50']
+    for result in results.values():
+        result['overhead_us_p50'] = round(result['us_p50'] - baseline, 2)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
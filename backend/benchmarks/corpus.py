@@ -0,0 +1,102 @@
+"""
+Synthetic corpora for offline benchmarks.
+
+Texts are built from a fixed seed, so every run and every commit sees the
+same input. PII density is the share of sentences carrying PII: 'low' is
+about one in ten, as in ordinary support tickets, 'high' is nearly every
+sentence, as in contact lists or CRM exports.
+"""
+
+import random
+
+DENSITIES = {'low': 0.1, 'high': 0.9}
+
+FILLER = [
+    'The quarterly report was shared with the whole team yesterday.',
+    'Please review the attached document before the next meeting.',
+    'Our build pipeline finished without errors after the last change.',
+    'We will follow up on the open questions early next week.',
+    'The service was restarted and latency went back to normal.',
+    'Thanks again for the quick turnaround on this request.',
+    'Let me know if the proposed timeline works for everyone.',
+]
+
+PEOPLE = ['John Smith', 'Maria Garcia', 'Angela Merkel', 'Li Wei']
+ORGANIZATIONS = ['Acme Corporation', 'United Nations', 'Globex']
+LOCATIONS = ['Berlin', 'London', 'Paris', 'Lisbon']
+
+# Lexicon for the 'stub' NER backend (see STUB_NER_LEXICON_PATH).
+STUB_LEXICON = {
+    'lexicon': {'PER': PEOPLE, 'ORG': ORGANIZATIONS, 'LOC': LOCATIONS},
+}
+
+
+def _pii_sentence(rng: random.Random) -> str:
+    person = rng.choice(PEOPLE)
+    user = person.split()[0].lower()
+    return rng.choice(
+        [
+            f'{person} from {rng.choice(ORGANIZATIONS)} wrote to '
+            f'{user}@mail.example.com about the invoice.',
+            f'The login came from {rng.randrange(1, 255)}.'
+            f'{rng.randrange(256)}.{rng.randrange(256)}.'
+            f'{rng.randrange(1, 255)} in {rng.choice(LOCATIONS)}.',
+            f'{person} shared https://docs.example.com/d/'
+            f'{rng.randrange(10**6)} with the team.',
+            f'Traffic from 2001:db8::{rng.randrange(1, 0xFFFF):x} was '
+            f'blocked for {person}.',
+        ]
+    )
+
+
+def make_text(size: int, density: str, seed: int = 0) -> str:
+    """A text of at most `size` characters, cut at a sentence boundary."""
+    rng = random.Random(f'{size}-{density}-{seed}')
+    share = DENSITIES[density]
+    sentences: list[str] = []
+    length = 0
+    while True:
+        if rng.random() < share:
+            sentence = _pii_sentence(rng)
+        else:
+            sentence = rng.choice(FILLER)
+        if length + len(sentence) + 1 > size:
+            break
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def make_html(text: str) -> str:
+    """Wrap the sentences of `text` in email-like markup."""
+    paragraphs = ''.join(
+        f'<p style="margin:0 0 8px">{sentence}.</p>\n'
+        for sentence in text.split('. ')
+    )
+    return (
+        '<html><head><style>p { color: #333; }</style></head><body>'
+        f'<table><tr><td>{paragraphs}</td></tr></table></body></html>'
+    )
+
+
+def adversarial_texts(size: int) -> dict[str, str]:
+    """
+    Inputs that drive the built-in regex rules into heavy backtracking:
+    long runs that almost match, repeated until `size` characters.
+    """
+    runs = {
+        'word_dots': 'a.',
+        'dashes': 'a-',
+        'digit_dots': '1.',
+        'at_signs': 'a@a',
+        'hex_colons': 'abcd:',
+        'short_colons': '1:',
+        'www_prefixes': 'www.',
+        'url_prefixes': 'http://x ',
+    }
+    texts = {
+        name: (run * (size // len(run) + 1))[:size]
+        for name, run in runs.items()
+    }
+    texts['long_token'] = 'http://' + 'a' * (size - 7)
+    return texts
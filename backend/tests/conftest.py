@@ -6,6 +6,9 @@ from asgi_lifespan import LifespanManager
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 
+# Config is read at import time; keep the app from loading real models.
+os.environ.setdefault('MODEL_PRELOAD', 'false')
+
 
 # Fixture to create FastAPI app instance for testing
 @pytest.fixture
@@ -15,6 +18,21 @@ def app() -> FastAPI:
     return get_application()
 
 
+@pytest.fixture
+def mock_model_pipeline(monkeypatch):
+    """Mock the HuggingFace pipeline to avoid loading the actual model in tests."""
+    import app.services.model_service as ms
+
+    def fake_pipeline(*args, **kwargs):
+        def run(inputs, **kwargs):
+            # Return no entities, for single texts and batches alike.
+            return [] if isinstance(inputs, str) else [[] for _ in inputs]
+
+        return run
+
+    monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+
+
 # Set up environment variables for testing
 @pytest.fixture(scope='session', autouse=True)
 def setup_test_env():
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.services.batching import MicroBatcher, run_many
+
+
+class FakeNer:
+    """Mimics a HF pipeline: a str returns entities, a list returns a list."""
+
+    def __init__(self) -> None:
+        self.calls: list[str | list[str]] = []
+        self.batch_sizes: list[int | None] = []
+        self.lock = threading.Lock()
+
+    def _entities(self, text: str) -> list[dict]:
+        return [{'start': 0, 'end': len(text), 'entity_group': text}]
+
+    def __call__(self, inputs, **kwargs):
+        with self.lock:
+            self.calls.append(inputs)
+            self.batch_sizes.append(kwargs.get('batch_size'))
+        if isinstance(inputs, str):
+            return self._entities(inputs)
+        return [self._entities(text) for text in inputs]
+
+
+class TestMicroBatcher:
+    def test_single_call_passes_plain_text(self) -> None:
+        ner = FakeNer()
+        batcher = MicroBatcher(ner, max_batch_size=8, max_wait_ms=0)
+
+        assert batcher('alice') == [
+            {'start': 0, 'end': 5, 'entity_group': 'alice'}
+        ]
+        assert ner.calls == ['alice']
+
+    def test_concurrent_calls_are_batched(self) -> None:
+        ner = FakeNer()
+        batcher = MicroBatcher(ner, max_batch_size=8, max_wait_ms=200)
+        texts = [f'text-{i}' for i in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher, texts))
+
+        assert [r[0]['entity_group'] for r in results] == texts
+        assert len(ner.calls) < len(texts)
+
+    def test_batch_is_capped_at_max_size(self) -> None:
+        ner = FakeNer()
+        batcher = MicroBatcher(ner, max_batch_size=2, max_wait_ms=50)
+
+        futures = [batcher.submit(f'text-{i}') for i in range(5)]
+        results = [future.result(timeout=5) for future in futures]
+
+        assert len(results) == 5
+        assert all(
+            isinstance(call, str) or len(call) <= 2 for call in ner.calls
+        )
+
+    def test_errors_are_raised_to_every_caller(self) -> None:
+        def failing_ner(inputs, **kwargs):
+            raise RuntimeError('model crashed')
+
+        batcher = MicroBatcher(failing_ner, max_batch_size=4, max_wait_ms=0)
+
+        with pytest.raises(RuntimeError, match='model crashed'):
+            batcher('text')
+
+
+class TestRunMany:
+    def test_batch_size_is_capped(self) -> None:
+        ner = FakeNer()
+        texts = [f'text-{i}' for i in range(40)]
+
+        results = run_many(ner, texts, max_batch_size=16)
+
+        assert [r[0]['entity_group'] for r in results] == texts
+        assert ner.batch_sizes == [16]
+
+    def test_batching_disabled_runs_one_text_per_pass(self) -> None:
+        ner = FakeNer()
+
+        run_many(ner, ['a', 'b', 'c'], max_batch_size=1)
+        run_many(ner, ['a', 'b'], max_batch_size=0)
+
+        assert ner.batch_sizes == [1, 1]
+
+    def test_small_input_uses_its_length(self) -> None:
+        ner = FakeNer()
+
+        run_many(ner, ['a', 'b'], max_batch_size=16)
+
+        assert ner.batch_sizes == [2]
@@ -0,0 +1,120 @@
+import pytest
+from app.models.pii import PiiIn, PiiOut
+from app.services.cache import ResultCache
+from app.services.html_service import HtmlService
+from app.services.orchestrator import Orchestrator
+from app.services.regex_service import (
+    RegexRuleEmail,
+    RegexRuleIpv4,
+    RemovalServiceRegex,
+)
+from app.services.validation_service import (
+    ValidationRuleNonEmpty,
+    ValidationServiceChecker,
+)
+
+TEXT = 'Mail me at test@mail.com'
+
+
+@pytest.fixture
+def pii_out():
+    return PiiOut(
+        original_text=TEXT,
+        cleaned_text='Mail me at [EMAIL_1]',
+        methods=['regex'],
+        replaced_values={'regex:EMAIL_1': 'test@mail.com'},
+        replaced_count={'regex:EMAIL': 1},
+    )
+
+
+class CountingRegexService(RemovalServiceRegex):
+    def __init__(self) -> None:
+        super().__init__(rules=[RegexRuleEmail(), RegexRuleIpv4()])
+        self.calls = 0
+
+    def detect(self, text: str):
+        self.calls += 1
+        return super().detect(text)
+
+
+class TestResultCache:
+    @pytest.mark.parametrize('hash_only', [True, False])
+    def test_hit_returns_same_result(self, pii_out, hash_only: bool) -> None:
+        cache = ResultCache(
+            max_bytes=1_000_000, ttl_seconds=60, hash_only=hash_only
+        )
+
+        assert cache.get(TEXT) is None
+        cache.put(TEXT, pii_out)
+
+        assert cache.get(TEXT) == pii_out
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_hash_only_keeps_no_plaintext(self, pii_out) -> None:
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=60)
+        cache.put(TEXT, pii_out)
+
+        ((key, entry),) = cache._entries.items()
+        assert TEXT not in key
+        assert entry.replaced_values is None
+        assert 'test@mail.com' not in repr(entry)
+
+    def test_key_depends_on_flag_and_version(self, pii_out) -> None:
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=60, version='v1')
+        cache.put(TEXT, pii_out, clean_html=False)
+
+        assert cache.get(TEXT, clean_html=True) is None
+        other = ResultCache(max_bytes=1_000_000, ttl_seconds=60, version='v2')
+        assert other._key(TEXT, False, False, '') != cache._key(
+            TEXT, False, False, ''
+        )
+
+    def test_key_depends_on_html_options(self, pii_out) -> None:
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=60)
+        cache.put(TEXT, pii_out, True, restore_html=True, parser='stdlib')
+
+        assert cache.get(TEXT, True, parser='stdlib') is None
+        assert cache.get(TEXT, True, restore_html=True, parser='lxml') is None
+        assert cache.get(TEXT, True, restore_html=True, parser='stdlib')
+
+    def test_expired_entries_miss(self, monkeypatch, pii_out) -> None:
+        import app.services.cache as cache_module
+
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=10)
+        cache.put(TEXT, pii_out)
+
+        now = cache_module.time.monotonic()
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now + 11)
+
+        assert cache.get(TEXT) is None
+
+    def test_evicts_least_recently_used_over_byte_limit(self, pii_out) -> None:
+        cache = ResultCache(max_bytes=700, ttl_seconds=60, hash_only=False)
+        texts = [f'{TEXT} {i}' for i in range(3)]
+        for text in texts:
+            cache.put(text, pii_out)
+
+        assert cache.stats()['size_bytes'] <= 700
+        assert cache.get(texts[0]) is None
+        assert cache.get(texts[-1]) is not None
+
+    def test_orchestrator_skips_services_on_hit(self) -> None:
+        service = CountingRegexService()
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=60)
+
+        def run() -> PiiOut:
+            return Orchestrator(
+                input=PiiIn(original_text=TEXT),
+                clean_services=[service],
+                validation_services=[
+                    ValidationServiceChecker(rules=[ValidationRuleNonEmpty()])
+                ],
+                html_service=HtmlService(),
+                cache=cache,
+            ).run_pipeline()
+
+        first, second = run(), run()
+
+        assert first == second
+        assert service.calls == 1
@@ -0,0 +1,108 @@
+import pytest
+from app.services.chunking import TextChunk, TokenWindowChunker
+
+
+@pytest.fixture
+def chunker():
+    # Without a tokenizer the window is half of max_tokens words.
+    return TokenWindowChunker(max_tokens=8, overlap_tokens=2)
+
+
+class TestTokenWindowChunker:
+    def test_short_text_is_single_chunk(self, chunker) -> None:
+        assert chunker.split('one two three') == [TextChunk('one two three', 0)]
+
+    def test_windows_cover_text_with_overlap(self, chunker) -> None:
+        text = 'w0 w1 w2 w3 w4 w5 w6 w7 w8 w9'
+        chunks = chunker.split(text)
+
+        assert [c.text for c in chunks] == [
+            'w0 w1 w2 w3',
+            'w2 w3 w4 w5',
+            'w4 w5 w6 w7',
+            'w6 w7 w8 w9',
+        ]
+        for chunk in chunks:
+            assert text[chunk.offset : chunk.offset + len(chunk.text)] == (
+                chunk.text
+            )
+
+    def test_merge_maps_offsets_and_dedupes_overlap(self) -> None:
+        text = 'aa John Smith bb'
+        first = TextChunk('aa John Smith', 0)
+        second = TextChunk('John Smith bb', 3)
+        entities = TokenWindowChunker.merge(
+            text,
+            [
+                (
+                    first,
+                    [
+                        {
+                            'start': 3,
+                            'end': 7,
+                            'entity_group': 'PER',
+                            'score': 0.7,
+                            'word': 'John',
+                        }
+                    ],
+                ),
+                (
+                    second,
+                    [
+                        {
+                            'start': 0,
+                            'end': 10,
+                            'entity_group': 'PER',
+                            'score': 0.9,
+                            'word': 'John Smith',
+                        }
+                    ],
+                ),
+            ],
+        )
+
+        assert entities == [
+            {
+                'start': 3,
+                'end': 13,
+                'entity_group': 'PER',
+                'score': 0.9,
+                'word': 'John Smith',
+            }
+        ]
+
+    def test_model_rule_covers_long_text(self, monkeypatch) -> None:
+        import app.services.model_service as ms
+
+        calls: list = []
+
+        def fake_pipeline(*args, **kwargs):
+            def run(inputs, **kw):
+                calls.append(inputs)
+                texts = [inputs] if isinstance(inputs, str) else inputs
+                results = [
+                    [
+                        {
+                            'start': idx,
+                            'end': idx + len('Alice'),
+                            'entity_group': 'PER',
+                        }
+                        for idx in range(len(t))
+                        if t.startswith('Alice', idx)
+                    ]
+                    for t in texts
+                ]
+                return results[0] if isinstance(inputs, str) else results
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        monkeypatch.setattr(ms, 'batched', lambda ner, **kw: ner)
+        rule = ms.ModelRuleAbAi()
+        rule._chunker = TokenWindowChunker(max_tokens=20, overlap_tokens=4)
+
+        text = ' '.join(['Alice'] + ['filler'] * 40 + ['Alice'])
+        result = rule.evaluate(text, 'model')
+
+        assert len(calls) == 1
+        assert result.replaced_count == {'model:PERSON': 2}
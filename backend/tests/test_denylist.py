@@ -0,0 +1,127 @@
+import pytest
+from app.services.denylist import (
+    DenyList,
+    DenyListRule,
+    compile_denylist,
+    load_denylist,
+    parse_entries,
+)
+from app.services.regex_service import RegexRuleEmail, RemovalServiceRegex
+
+ENTRIES = [
+    ('Acme', 'CUSTOMER'),
+    ('Acme Corporation', 'CUSTOMER'),
+    ('Blue Falcon', 'PROJECT'),
+    ('db-01.internal', 'HOSTNAME'),
+]
+
+
+@pytest.fixture
+def denylist() -> DenyList:
+    return DenyList.build(ENTRIES)
+
+
+class TestDenyList:
+    def test_parse_entries(self) -> None:
+        lines = ['# customers', 'Acme\tCUSTOMER', '', '  Globex  ', 'x\t ']
+
+        assert list(parse_entries(lines)) == [
+            ('Acme', 'CUSTOMER'),
+            ('Globex', 'DENYLIST'),
+            ('x', 'DENYLIST'),
+        ]
+
+    def test_find_prefers_leftmost_longest(self, denylist: DenyList) -> None:
+        text = 'acme corporation moved Blue Falcon to DB-01.internal.'
+
+        assert denylist.find(text) == [
+            (0, 16, 'CUSTOMER'),
+            (23, 34, 'PROJECT'),
+            (38, 52, 'HOSTNAME'),
+        ]
+
+    def test_shorter_match_after_a_longer_overlap(self) -> None:
+        denylist = DenyList.build([('ab', 'X'), ('bcd', 'X'), ('c', 'X')])
+
+        assert denylist.find('abcd', word_boundary=False) == [
+            (0, 2, 'X'),
+            (2, 3, 'X'),
+        ]
+
+    def test_word_boundary(self, denylist: DenyList) -> None:
+        text = 'Acmes and NotAcme but _Acme_ and (Acme)'
+
+        assert denylist.find(text) == [(34, 38, 'CUSTOMER')]
+        assert len(denylist.find(text, word_boundary=False)) == 4
+
+    def test_case_sensitive(self) -> None:
+        denylist = DenyList.build(ENTRIES, ignore_case=False)
+
+        assert denylist.find('acme and Acme') == [(9, 13, 'CUSTOMER')]
+
+    def test_folding_keeps_offsets(self) -> None:
+        denylist = DenyList.build([('Straße', 'X'), ('Zoë', 'X')])
+
+        text = 'STRAẞE at Straße, ZOË'
+        assert [text[s:e] for s, e, _ in denylist.find(text)] == [
+            'Straße',
+            'ZOË',
+        ]
+
+    def test_compiled_round_trip(self, denylist: DenyList, tmp_path) -> None:
+        path = str(tmp_path / 'list.automaton')
+        denylist.save(path)
+
+        loaded = DenyList.open(path)
+
+        assert len(loaded) == len(denylist)
+        text = 'Acme Corporation, Blue Falcon'
+        assert loaded.find(text) == denylist.find(text)
+
+    def test_load_reuses_compiled_file_until_the_list_changes(
+        self, tmp_path, monkeypatch
+    ) -> None:
+        source = tmp_path / 'denylist.txt'
+        source.write_text('Acme\tCUSTOMER\n', encoding='utf-8')
+        compile_denylist(str(source))
+        assert (tmp_path / 'denylist.txt.automaton').exists()
+
+        def no_build(*args, **kwargs):
+            raise AssertionError('rebuilt')
+
+        with monkeypatch.context() as m:
+            m.setattr(DenyList, 'build', no_build)
+            assert load_denylist(str(source)).find('Acme') == [
+                (0, 4, 'CUSTOMER')
+            ]
+
+        source.write_text('Globex\n', encoding='utf-8')
+        assert load_denylist(str(source)).find('Acme Globex') == [
+            (5, 11, 'DENYLIST')
+        ]
+        assert DenyList.open(str(source) + '.automaton').find('Globex')
+
+
+class TestDenyListRule:
+    def test_evaluate_numbers_placeholders_per_label(
+        self, denylist: DenyList
+    ) -> None:
+        rule = DenyListRule(denylist)
+
+        result = rule.evaluate('Acme, Blue Falcon and acme.', 'regex')
+
+        assert result.text == '[CUSTOMER_1], [PROJECT_1] and [CUSTOMER_2].'
+        assert result.replaced_count == {
+            'regex:CUSTOMER': 2,
+            'regex:PROJECT': 1,
+        }
+        assert result.replaced_values['regex:CUSTOMER_2'] == 'acme'
+
+    def test_runs_next_to_regex_rules(self, denylist: DenyList) -> None:
+        service = RemovalServiceRegex(
+            rules=[RegexRuleEmail(), DenyListRule(denylist)]
+        )
+
+        result = service.clean('Mail ops@acme.com about Blue Falcon.')
+
+        assert result.cleaned_text == 'Mail [EMAIL_1] about [PROJECT_1].'
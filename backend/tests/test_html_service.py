@@ -1,5 +1,12 @@
+import html
+import re
+
 import pytest
-from app.services.html_service import HtmlService
+from app.services.html_service import HtmlService, available_parsers
+from bs4 import BeautifulSoup
+
+# Module each optional parser backend needs.
+PARSER_MODULES = {'lxml': 'lxml', 'selectolax': 'selectolax'}
 
 
 @pytest.fixture
@@ -7,45 +14,130 @@ def html_service():
     return HtmlService()
 
 
+@pytest.fixture(params=available_parsers())
+def parser_service(request):
+    if request.param in PARSER_MODULES:
+        pytest.importorskip(PARSER_MODULES[request.param])
+    return HtmlService(parser=request.param)
+
+
 HTML_CLEAN_CASES = [
     (
         '<p>This is a <b>bold</b> statement.</p>',
         'This is a bold statement.',
-        '<p>This is a <b>bold</b> statement.</p>',
+    ),
+    (
+        '<!DOCTYPE html><html><head><title>Hi</title>'
+        '<style>p { color: red; }</style></head>'
+        '<body><!-- note --><p>Tom&nbsp;&amp;&#32;Jerry&#x21;</p>'
+        '<script>var a = "<b>x</b>";</script>\n<p>Bye</p></body></html>',
+        'HiTom\xa0& Jerry!\nBye',
+    ),
+    ('a &lt b &amp c', 'a < b & c'),
+    ('<p title="a&amp;b">q</p><br/>r', 'qr'),
+]
+
+# Text `extract` gives for the clean cases with text-carrying attributes.
+ATTRIBUTE_TEXT = {'<p title="a&amp;b">q</p><br/>r': 'a&bqr'}
+
+RESTORE_CASES = [
+    (
+        '<p>Mail <b>john</b> at john@mail.com</p>',
+        [(5, 9, '[NAME_1]'), (13, 26, '[EMAIL_1]')],
+        '<p>Mail <b>[NAME_1]</b> at [EMAIL_1]</p>',
+    ),
+    (
+        '<p>Call <i>John</i>&nbsp;Smith now</p>',
+        [(5, 15, '[NAME_1]')],
+        '<p>Call <i>[NAME_1]</i> now</p>',
+    ),
+    (
+        '<p>R&amp;D &lt;x&gt;</p>',
+        [(0, 3, '<ORG>')],
+        '<p>&lt;ORG&gt; &lt;x&gt;</p>',
     ),
 ]
 
 
 class TestHtmlService:
-    @pytest.mark.parametrize(
-        'original_text, clean_result, restored_result', HTML_CLEAN_CASES
-    )
+    @pytest.mark.parametrize('original_text, clean_result', HTML_CLEAN_CASES)
     def test_clean_text_from_html(
-        self,
-        html_service,
-        original_text: str,
-        clean_result: str,
-        restored_result: str,
+        self, parser_service, original_text: str, clean_result: str
+    ) -> None:
+        assert parser_service.clean(original_text) == clean_result
+
+    @pytest.mark.parametrize('original_text, clean_result', HTML_CLEAN_CASES)
+    def test_clean_matches_beautifulsoup(
+        self, original_text: str, clean_result: str
+    ) -> None:
+        expected = BeautifulSoup(original_text, 'html.parser').get_text()
+
+        assert HtmlService().clean(original_text) == expected
+
+    @pytest.mark.parametrize('original_text, clean_result', HTML_CLEAN_CASES)
+    def test_offsets_map_back_to_markup(
+        self, original_text: str, clean_result: str
     ) -> None:
-        cleaned_result = html_service.clean(original_text)
-        assert cleaned_result == clean_result
+        # A tiny chunk size splits tags, references and lines across feeds.
+        document = HtmlService(chunk_size=3).extract(original_text)
+
+        # Attribute values are set apart by newlines mapping to no markup.
+        mapped = []
+        for i, char in enumerate(document.text):
+            start, end = document.html_span(i, i + 1)
+            if start == end:
+                assert char == '\n'
+                continue
+            assert html.unescape(original_text[start:end]) == char
+            mapped.append(char)
+        assert ''.join(mapped) == ATTRIBUTE_TEXT.get(
+            original_text, clean_result
+        )
 
     @pytest.mark.parametrize(
-        'original_text, clean_result, restored_result', HTML_CLEAN_CASES
+        'original_text, replacements, expected', RESTORE_CASES
     )
     def test_restore_text_to_html(
-        self,
-        html_service,
-        original_text: str,
-        clean_result: str,
-        restored_result: str,
+        self, html_service, original_text: str, replacements, expected: str
+    ) -> None:
+        document = html_service.extract(original_text)
+
+        assert html_service.restore(document, replacements) == expected
+
+    def test_restore_without_replacements_returns_html(
+        self, html_service
     ) -> None:
-        html_service.clean(original_text)
-        restored = html_service.restore(clean_result)
-        assert restored == restored_result
-
-    def test_restore_without_cleaning_raises_error(self, html_service) -> None:
-        with pytest.raises(
-            ValueError, match='No state available to restore HTML.'
-        ):
-            html_service.restore('Some cleaned text')
+        original = '<p>This is a <b>bold</b> statement.</p>'
+        document = html_service.extract(original)
+
+        assert html_service.restore(document, []) == original
+
+    def test_restore_redacts_attribute_values(self, html_service) -> None:
+        original = (
+            '<a href="mailto:ann@mail.com?s=1&amp;t=2" class="ann@mail.com" '
+            "title='Ann'>Write to Ann</a><img alt=ann@mail.com>"
+        )
+        document = html_service.extract(original)
+        replacements = [
+            (match.start(), match.end(), f'[NAME_{i}]')
+            for i, match in enumerate(re.finditer('ann', document.text, re.I))
+        ]
+
+        assert document.text == (
+            '\nmailto:ann@mail.com?s=1&t=2\n\nAnn\nWrite to Ann\nann@mail.com\n'
+        )
+        assert html_service.restore(document, replacements) == (
+            '<a href="mailto:[NAME_0]@mail.com?s=1&amp;t=2" class="ann@mail.com" '
+            "title='[NAME_1]'>Write to [NAME_2]</a><img alt=[NAME_3]@mail.com>"
+        )
+
+    def test_unknown_parser_raises_error(self) -> None:
+        with pytest.raises(ValueError, match='Unknown HTML parser'):
+            HtmlService(parser='nope')
+
+    def test_documents_are_independent(self, html_service) -> None:
+        first = html_service.extract('<p>first a@mail.com</p>')
+        second = html_service.extract('<div>second</div>')
+
+        assert first.restore([(6, 16, '[EMAIL_1]')]) == '<p>first [EMAIL_1]</p>'
+        assert second.restore([]) == '<div>second</div>'
@@ -0,0 +1,65 @@
+import pytest
+from app.services import inference
+from app.services.inference import (
+    ModelSpec,
+    available_backends,
+    build_ner,
+    register_backend,
+)
+
+
+@pytest.fixture
+def spec():
+    return ModelSpec(model='dslim/bert-base-NER', aggregation_strategy='max')
+
+
+class TestInferenceBackends:
+    def test_builtin_backends_are_registered(self) -> None:
+        assert {'torch', 'onnx', 'onnx-int8', 'remote', 'stub'} <= set(
+            available_backends()
+        )
+
+    def test_stub_backend_needs_no_pipeline(self, spec) -> None:
+        ner = build_ner(spec, 'stub', pipeline=None)  # type: ignore[arg-type]
+
+        assert ner('mail John Smith') == [
+            {
+                'entity_group': 'PER',
+                'score': 1.0,
+                'word': 'John Smith',
+                'start': 5,
+                'end': 15,
+            }
+        ]
+
+    def test_torch_backend_without_transformers_raises(self, spec) -> None:
+        with pytest.raises(ImportError, match='prod'):
+            build_ner(spec, 'torch', pipeline=None)  # type: ignore[arg-type]
+
+    def test_torch_backend_builds_pipeline(self, spec) -> None:
+        calls: list[dict] = []
+
+        def fake_pipeline(**kwargs):
+            calls.append(kwargs)
+            return lambda text: []
+
+        build_ner(spec, 'torch', fake_pipeline)
+
+        assert calls[0]['model'] == 'dslim/bert-base-NER'
+        assert calls[0]['aggregation_strategy'] == 'max'
+
+    def test_registered_backend_is_used(self, spec, monkeypatch) -> None:
+        # A copy of the registry, so the backend is gone after the test.
+        monkeypatch.setattr(inference, '_BACKENDS', dict(inference._BACKENDS))
+
+        @register_backend('test-backend')
+        def _backend(spec, pipeline):
+            return lambda text: [{'model': spec.model}]
+
+        ner = build_ner(spec, 'test-backend', pipeline=None)  # type: ignore[arg-type]
+
+        assert ner('text') == [{'model': 'dslim/bert-base-NER'}]
+
+    def test_unknown_backend_raises(self, spec) -> None:
+        with pytest.raises(ValueError, match='Unknown inference backend'):
+            build_ner(spec, 'tensorrt', pipeline=None)  # type: ignore[arg-type]
@@ -0,0 +1,117 @@
+import dataclasses
+import datetime as dt
+import enum
+import json
+import logging
+import sys
+
+import pytest
+from app.core import logging_config
+from app.core.logging_config import MyJSONFormatter
+
+FMT_KEYS = {
+    'level': 'levelname',
+    'message': 'message',
+    'timestamp': 'timestamp',
+    'logger': 'name',
+    'line': 'lineno',
+}
+
+
+class Color(enum.Enum):
+    RED = 'red'
+
+
+class Level(enum.IntEnum):
+    HIGH = 2
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+
+
+def make_record(**extra) -> logging.LogRecord:
+    record = logging.getLogger('anonify.requests').makeRecord(
+        'anonify.requests',
+        logging.INFO,
+        __file__,
+        10,
+        'Response: %s %s - %s',
+        ('GET', '/ping', 200),
+        None,
+        extra=extra,
+    )
+    return record
+
+
+class TestMyJSONFormatter:
+    @pytest.mark.parametrize('use_orjson', [False, True])
+    def test_fields_and_extras(self, use_orjson: bool) -> None:
+        formatter = MyJSONFormatter(fmt_keys=FMT_KEYS, use_orjson=use_orjson)
+        record = make_record(status_code=200, path=object())
+
+        out = json.loads(formatter.format(record))
+
+        assert list(out)[:5] == list(FMT_KEYS)
+        assert out['level'] == 'INFO'
+        assert out['message'] == 'Response: GET /ping - 200'
+        assert out['logger'] == 'anonify.requests'
+        assert out['line'] == 10
+        assert out['status_code'] == 200
+        assert out['path'].startswith('<object object')
+
+    @pytest.mark.skipif(
+        logging_config.orjson is None, reason='orjson is not installed'
+    )
+    @pytest.mark.parametrize(
+        'value',
+        [
+            'Zoë 👋 \x7f',
+            dt.datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt.UTC),
+            Point(1),
+            Color.RED,
+            Level.HIGH,
+            float('nan'),
+            {'nested': [float('inf'), Color.RED]},
+            1.5e-7,
+            2**70,
+        ],
+        ids=repr,
+    )
+    def test_orjson_gives_the_same_values(self, value) -> None:
+        record = make_record(value=value)
+
+        fast = MyJSONFormatter(fmt_keys=FMT_KEYS).format(record)
+        stdlib = MyJSONFormatter(fmt_keys=FMT_KEYS, use_orjson=False).format(
+            record
+        )
+
+        assert fast.isascii()
+        # repr, since NaN != NaN.
+        assert repr(json.loads(fast)) == repr(json.loads(stdlib))
+
+    def test_unmapped_computed_fields_are_appended(self) -> None:
+        formatter = MyJSONFormatter(fmt_keys={'level': 'levelname'})
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = make_record()
+            record.exc_info = sys.exc_info()
+
+        out = json.loads(formatter.format(record))
+
+        assert list(out)[:4] == ['level', 'message', 'timestamp', 'exc_info']
+        assert 'ValueError: boom' in out['exc_info']
+
+    @pytest.mark.parametrize(
+        'created',
+        [0.0, 1700000000.0, 1700000000.25, 1700000000.9999996, 1.0000005],
+    )
+    def test_timestamp_matches_isoformat(self, created: float) -> None:
+        formatter = MyJSONFormatter()
+
+        assert (
+            formatter._timestamp(created)
+            == dt.datetime.fromtimestamp(created, tz=dt.UTC).isoformat()
+        )
@@ -0,0 +1,77 @@
+import pytest
+from app.core.metrics import MetricsRegistry
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.usefixtures('mock_model_pipeline')
+
+
+class TestMetricsRegistry:
+    def test_counter_renders_labels(self) -> None:
+        registry = MetricsRegistry()
+        counter = registry.counter('hits_total', 'Hits.', ('path',))
+        counter.inc('/a')
+        counter.inc('/a', amount=2)
+        counter.inc('say "hi"')
+
+        text = registry.render()
+
+        assert '# TYPE hits_total counter' in text
+        assert 'hits_total{path="/a"} 3' in text
+        assert r'hits_total{path="say \"hi\""} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        registry = MetricsRegistry()
+        histogram = registry.histogram(
+            'latency_seconds', 'Latency.', ('stage',), buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value, 'regex')
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{stage="regex",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{stage="regex",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{stage="regex",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{stage="regex"} 5.65' in lines
+        assert 'latency_seconds_count{stage="regex"} 4' in lines
+        assert histogram.count('regex') == 4
+
+    def test_timer_and_callback(self) -> None:
+        registry = MetricsRegistry()
+        histogram = registry.histogram('work_seconds', 'Work.')
+        registry.callback('queue_size', 'gauge', 'Queue.', lambda: 7)
+
+        with histogram.time():
+            pass
+
+        assert histogram.count() == 1
+        assert 'queue_size 7' in registry.render()
+
+    def test_duplicate_names_are_rejected(self) -> None:
+        registry = MetricsRegistry()
+        registry.counter('x_total', 'X.')
+
+        with pytest.raises(ValueError):
+            registry.histogram('x_total', 'X.')
+
+
+class TestMetricsRoute:
+    async def test_metrics_after_clean(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        await client.post(
+            app.url_path_for('pii:remover'),
+            json={'original_text': 'Metrics mail metrics@mail.com'},
+        )
+
+        res = await client.get(app.url_path_for('metrics'))
+        text = res.text
+
+        assert res.status_code == 200
+        assert res.headers['content-type'].startswith('text/plain')
+        assert 'anonify_stage_seconds_count{stage="validation"}' in text
+        assert 'anonify_stage_seconds_count{stage="regex"}' in text
+        assert 'anonify_rule_seconds_count{rule="regex/combined"}' in text
+        assert 'anonify_entities_total{source="regex",label="EMAIL"}' in text
+        assert 'anonify_cache_hits_total' in text
@@ -0,0 +1,275 @@
+import gzip
+import json
+import logging
+import zlib
+
+import anyio
+import pytest
+from app.api.middleware import (
+    CONTENT_CODINGS,
+    CompressionMiddleware,
+    RequestLoggingMiddleware,
+    negotiate_coding,
+    zstandard,
+)
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.routing import Route
+
+
+def _client(sample_rate: int) -> AsyncClient:
+    async def ok(request):
+        return PlainTextResponse('ok')
+
+    async def missing(request):
+        return PlainTextResponse('no', status_code=404)
+
+    async def boom(request):
+        raise RuntimeError('boom')
+
+    app = Starlette(
+        routes=[
+            Route('/ok', ok),
+            Route('/missing', missing),
+            Route('/boom', boom),
+        ]
+    )
+    return AsyncClient(
+        transport=ASGITransport(
+            app=RequestLoggingMiddleware(app, sample_rate=sample_rate),
+            raise_app_exceptions=False,
+        ),
+        base_url='http://testserver',
+    )
+
+
+def _records(caplog, message: str) -> list[logging.LogRecord]:
+    return [r for r in caplog.records if r.getMessage().startswith(message)]
+
+
+class TestRequestLoggingMiddleware:
+    async def test_logs_request_and_response_fields(
+        self, app: FastAPI, client: AsyncClient, caplog
+    ) -> None:
+        caplog.set_level(logging.INFO, logger='anonify.requests')
+
+        await client.get(
+            app.url_path_for('ping'),
+            params={'a': '1'},
+            headers={'X-Request-ID': 'req-1'},
+        )
+
+        (request,) = _records(caplog, 'Request: GET /api/v1/ping')
+        assert request.msg == 'Request: %s %s'
+        assert request.query_params == 'a=1'
+        assert request.request_id == 'req-1'
+        (response,) = _records(caplog, 'Response: GET /api/v1/ping/ - 200')
+        assert response.status_code == 200
+        assert response.process_time >= 0
+
+    async def test_samples_successes_but_keeps_errors(self, caplog) -> None:
+        caplog.set_level(logging.INFO, logger='anonify.requests')
+
+        async with _client(sample_rate=3) as client:
+            for _ in range(6):
+                await client.get('/ok')
+            await client.get('/missing')
+            await client.get('/boom')
+
+        assert len(_records(caplog, 'Response: GET /ok')) == 2
+        (missing,) = _records(caplog, 'Response: GET /missing - 404')
+        assert missing.levelno == logging.WARNING
+        (failed,) = _records(caplog, 'Request failed: GET /boom')
+        assert failed.error == 'boom'
+
+    async def test_disabled_level_logs_nothing(self, caplog) -> None:
+        caplog.set_level(logging.WARNING, logger='anonify.requests')
+
+        async with _client(sample_rate=1) as client:
+            await client.get('/ok')
+
+        assert _records(caplog, 'Re') == []
+
+
+def _compression_client(**kwargs) -> AsyncClient:
+    async def echo(request):
+        return JSONResponse(await request.json())
+
+    async def small(request):
+        return JSONResponse({'ok': True})
+
+    async def binary(request):
+        return Response(b'x' * 4096, media_type='application/octet-stream')
+
+    app = Starlette(
+        routes=[
+            Route('/echo', echo, methods=['POST']),
+            Route('/small', small),
+            Route('/binary', binary),
+        ]
+    )
+    return AsyncClient(
+        transport=ASGITransport(app=CompressionMiddleware(app, **kwargs)),
+        base_url='http://testserver',
+    )
+
+
+PAYLOAD = {'original_text': 'Mail john@mail.com ' * 200}
+# 64 MiB of zeros in about 2 KB.
+BOMB = zstandard.compress(b'0' * (64 << 20)) if zstandard is not None else b''
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.parametrize(
+        'accept_encoding, expected',
+        (
+            ('gzip, deflate, br', 'gzip'),
+            ('*', CONTENT_CODINGS[0]),
+            ('zstd;q=0.5, gzip', 'gzip'),
+            ('gzip;q=0, br', None),
+            ('identity', None),
+            ('', None),
+        ),
+    )
+    def test_negotiate_coding(self, accept_encoding, expected) -> None:
+        assert negotiate_coding(accept_encoding) == expected
+
+    async def test_decompresses_request_and_compresses_response(
+        self,
+    ) -> None:
+        body = gzip.compress(json.dumps(PAYLOAD).encode())
+
+        async with _compression_client(minimum_size=1024) as client:
+            res = await client.post(
+                '/echo',
+                content=body,
+                headers={
+                    'Content-Type': 'application/json',
+                    'Content-Encoding': 'gzip',
+                    'Accept-Encoding': 'gzip',
+                },
+            )
+
+        assert res.status_code == 200
+        assert res.headers['content-encoding'] == 'gzip'
+        assert res.headers['vary'] == 'Accept-Encoding'
+        assert int(res.headers['content-length']) < len(res.content)
+        assert res.json() == PAYLOAD
+
+    @pytest.mark.skipif(zstandard is None, reason='zstandard is not installed')
+    async def test_zstd_round_trip(self) -> None:
+        body = zstandard.compress(json.dumps(PAYLOAD).encode())
+
+        async with _compression_client(minimum_size=1024) as client:
+            res = await client.post(
+                '/echo',
+                content=body,
+                headers={
+                    'Content-Type': 'application/json',
+                    'Content-Encoding': 'zstd',
+                    'Accept-Encoding': 'gzip, zstd',
+                },
+            )
+
+        assert res.status_code == 200
+        assert res.headers['content-encoding'] == 'zstd'
+        assert res.json() == PAYLOAD
+
+    @pytest.mark.parametrize('path', ('/small', '/binary'))
+    async def test_skips_small_and_binary_responses(self, path) -> None:
+        async with _compression_client(minimum_size=1024) as client:
+            res = await client.get(path, headers={'Accept-Encoding': 'gzip'})
+
+        assert res.status_code == 200
+        assert 'content-encoding' not in res.headers
+
+    async def test_compresses_streams_chunk_by_chunk(self) -> None:
+        async def records():
+            for index in range(3):
+                yield json.dumps({'index': index, 'pad': 'x' * 1000}) + '\n'
+
+        app = CompressionMiddleware(
+            StreamingResponse(records(), media_type='application/x-ndjson'),
+            minimum_size=1024,
+        )
+        messages = []
+
+        async def receive():
+            await anyio.sleep_forever()
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'headers': [(b'accept-encoding', b'gzip')],
+        }
+        await app(scope, receive, send)
+
+        start, *bodies = messages
+        headers = dict(start['headers'])
+        assert headers[b'content-encoding'] == b'gzip'
+        assert b'content-length' not in headers
+        # Every chunk is flushed, so each record decodes on arrival.
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        for index, message in enumerate(bodies[:3]):
+            record = json.loads(decoder.decompress(message['body']))
+            assert record['index'] == index
+        assert decoder.decompress(bodies[-1]['body']) == b''
+        assert decoder.eof
+
+    @pytest.mark.parametrize(
+        'headers, content, status_code',
+        (
+            ({'Content-Encoding': 'br'}, b'{}', 415),
+            ({'Content-Encoding': 'gzip'}, b'not gzip', 400),
+            ({'Content-Encoding': 'gzip'}, gzip.compress(b'{}')[:-4], 400),
+            (
+                {'Content-Encoding': 'gzip'},
+                gzip.compress(json.dumps(PAYLOAD).encode()),
+                413,
+            ),
+            pytest.param(
+                {'Content-Encoding': 'zstd'},
+                BOMB,
+                413,
+                marks=pytest.mark.skipif(
+                    zstandard is None, reason='zstandard is not installed'
+                ),
+            ),
+        ),
+    )
+    async def test_rejects_bad_request_bodies(
+        self, headers, content, status_code
+    ) -> None:
+        async with _compression_client(max_request_bytes=1000) as client:
+            res = await client.post(
+                '/echo',
+                content=content,
+                headers={'Content-Type': 'application/json', **headers},
+            )
+
+        assert res.status_code == status_code
+
+    @pytest.mark.usefixtures('mock_model_pipeline')
+    async def test_compresses_app_responses(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover'),
+            content=gzip.compress(json.dumps(PAYLOAD).encode()),
+            headers={'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'},
+        )
+
+        assert res.status_code == 200
+        assert res.headers['content-encoding'] == 'gzip'
+        assert res.json()['original_text'] == PAYLOAD['original_text']
@@ -0,0 +1,187 @@
+import os
+import socket
+import stat
+from multiprocessing.connection import AuthenticationError, Client
+
+import pytest
+from app.services.chunking import TokenWindowChunker
+from app.services.inference import ModelSpec, build_ner
+from app.services.model_worker import (
+    ModelWorkerError,
+    ModelWorkerServer,
+    RemoteNer,
+)
+
+AUTHKEY = b'secret'
+
+# The workers are forked from the (threaded) test process on purpose.
+pytestmark = pytest.mark.filterwarnings(
+    'ignore:This process .* is multi-threaded:DeprecationWarning'
+)
+
+
+def fake_ner(inputs, **kwargs):
+    def entities(text: str) -> list[dict]:
+        start = text.find('John')
+        if start < 0:
+            return []
+        return [
+            {
+                'start': start,
+                'end': start + 4,
+                'entity_group': 'PER',
+                'score': 0.9,
+                'word': 'John',
+            }
+        ]
+
+    if isinstance(inputs, str):
+        return entities(inputs)
+    return [entities(text) for text in inputs]
+
+
+class FakeTokenizer:
+    is_fast = True
+    model_max_length = 8
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+    def __call__(self, text, **kwargs):
+        offsets = [(i, i + 2) for i in range(0, len(text), 2)]
+        return {'offset_mapping': offsets}
+
+
+def tokenized_ner(inputs, **kwargs):
+    return fake_ner(inputs, **kwargs)
+
+
+tokenized_ner.tokenizer = FakeTokenizer()
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ModelWorkerServer(
+        {'fake/model': fake_ner, 'fake/tokenized': tokenized_ner},
+        address=str(tmp_path / 'models.sock'),
+        authkey=AUTHKEY,
+        processes=2,
+    )
+    server.start()
+    yield server
+    server.close()
+
+
+class TestModelWorker:
+    def test_remote_ner_matches_local(self, server) -> None:
+        ner = RemoteNer('fake/model', address=server.address, authkey=AUTHKEY)
+
+        assert ner.ping() == ['fake/model', 'fake/tokenized']
+        assert ner('Hi John') == fake_ner('Hi John')
+        assert ner(['Hi John', 'Hi there'], batch_size=2) == fake_ner(
+            ['Hi John', 'Hi there']
+        )
+        assert ner.tokenizer is None
+
+    def test_unknown_model_raises(self, server) -> None:
+        ner = RemoteNer('other/model', address=server.address, authkey=AUTHKEY)
+
+        with pytest.raises(ModelWorkerError, match='other/model'):
+            ner('Hi John')
+
+    def test_wrong_authkey_is_rejected(self, server) -> None:
+        ner = RemoteNer('fake/model', address=server.address, authkey=b'no')
+
+        with pytest.raises(AuthenticationError):
+            ner.ping()
+
+    def test_no_server_fails_to_connect(self, tmp_path) -> None:
+        ner = RemoteNer(
+            'fake/model', address=str(tmp_path / 'none.sock'), authkey=AUTHKEY
+        )
+
+        with pytest.raises(OSError):
+            ner.ping()
+
+    def test_remote_backend(self, monkeypatch, server) -> None:
+        import app.services.inference as inference
+
+        monkeypatch.setattr(inference, 'MODEL_WORKER_ADDRESS', server.address)
+        monkeypatch.setattr(inference, 'MODEL_WORKER_AUTHKEY', 'secret')
+
+        ner = build_ner(ModelSpec('fake/model', 'simple'), 'remote', None)
+
+        assert ner('Hi John') == fake_ner('Hi John')
+        with pytest.raises(ValueError, match='does not serve'):
+            build_ner(ModelSpec('other/model', 'simple'), 'remote', None)
+
+    def test_tokenizer_offsets_are_served(self, server) -> None:
+        ner = RemoteNer(
+            'fake/tokenized', address=server.address, authkey=AUTHKEY
+        )
+        text = 'abcdefghijklmnopqrst'
+
+        remote = TokenWindowChunker(ner.tokenizer, overlap_tokens=2)
+        local = TokenWindowChunker(FakeTokenizer(), overlap_tokens=2)
+
+        assert remote.split(text) == local.split(text)
+        assert len(remote.split(text)) > 1
+
+    def test_pickled_requests_are_not_loaded(self, server) -> None:
+        conn = Client(server.address, family='AF_UNIX', authkey=AUTHKEY)
+
+        conn.send(('ping',))
+
+        with pytest.raises(EOFError):
+            conn.recv_bytes()
+        conn.close()
+
+    def test_empty_authkey_is_refused(self, tmp_path) -> None:
+        address = str(tmp_path / 'models.sock')
+
+        with pytest.raises(ValueError, match='MODEL_WORKER_AUTHKEY'):
+            ModelWorkerServer({}, address=address, authkey=b'', processes=1)
+        with pytest.raises(ValueError, match='MODEL_WORKER_AUTHKEY'):
+            RemoteNer('fake/model', address=address, authkey=b'')
+
+    def test_socket_is_private(self, server) -> None:
+        directory = os.path.dirname(server.address)
+
+        assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(directory).st_mode) & 0o077 == 0
+
+    def test_shared_directory_is_refused(self, tmp_path) -> None:
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o777)
+        server = ModelWorkerServer(
+            {},
+            address=str(shared / 'models.sock'),
+            authkey=AUTHKEY,
+            processes=1,
+        )
+
+        with pytest.raises(PermissionError):
+            server.start()
+
+    def test_only_stale_sockets_are_replaced(self, server, tmp_path) -> None:
+        def start(address: str) -> None:
+            other = ModelWorkerServer(
+                {}, address=address, authkey=AUTHKEY, processes=1
+            )
+            other.start()
+            other.close()
+
+        with pytest.raises(FileExistsError, match='already listens'):
+            start(server.address)
+
+        regular = tmp_path / 'file.sock'
+        regular.write_text('keep')
+        with pytest.raises(FileExistsError, match='not a socket'):
+            start(str(regular))
+        assert regular.read_text() == 'keep'
+
+        stale = str(tmp_path / 'stale.sock')
+        with socket.socket(socket.AF_UNIX) as left_behind:
+            left_behind.bind(stale)
+        start(stale)
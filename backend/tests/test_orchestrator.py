@@ -1,8 +1,10 @@
 import pytest
 from app.core.errors import ServiceError, ValidationError
 from app.models.pii import PiiIn
+from app.services.base import Detection
+from app.services.cache import ResultCache
 from app.services.html_service import HtmlService
-from app.services.orchestrator import Orchestrator
+from app.services.orchestrator import BatchOrchestrator, Orchestrator
 from app.services.regex_service import (
     RegexRuleEmail,
     RegexRuleIpv4,
@@ -10,6 +12,7 @@ from app.services.regex_service import (
     RegexRuleUrl,
     RemovalServiceRegex,
 )
+from app.services.span_plan import Span
 from app.services.validation_service import (
     ValidationRuleNonEmpty,
     ValidationServiceChecker,
@@ -124,6 +127,73 @@ class TestOrchestrator:
         assert '<p>' not in result.cleaned_text
         assert result.methods == ['regex']
 
+    def test_orchestrator_restore_html(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        html_text = '<p>My email is <b>test@mail.com</b> &amp; more</p>'
+
+        orch = Orchestrator(
+            input=PiiIn(original_text=html_text),
+            clean_services=[regex_service],
+            validation_services=[validation_service],
+            html_service=html_service,
+            clean_html=True,
+            restore_html=True,
+        )
+
+        result = orch.run_pipeline()
+
+        assert result.cleaned_text == (
+            '<p>My email is <b>[EMAIL_1]</b> &amp; more</p>'
+        )
+        assert result.replaced_values == {'regex:EMAIL_1': 'test@mail.com'}
+
+    def test_orchestrator_restore_html_redacts_attributes(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        html_text = '<a href="mailto:test@mail.com">test@mail.com</a>'
+
+        orch = Orchestrator(
+            input=PiiIn(original_text=html_text),
+            clean_services=[regex_service],
+            validation_services=[validation_service],
+            html_service=html_service,
+            clean_html=True,
+            restore_html=True,
+        )
+
+        result = orch.run_pipeline()
+
+        assert result.cleaned_text == (
+            '<a href="mailto:[EMAIL_1]">[EMAIL_2]</a>'
+        )
+        assert 'test@mail.com' not in result.cleaned_text
+
+    def test_restored_html_is_cached_apart_from_text(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        # The text of the second input is the markup of the first one.
+        markup = '<a href="mailto:a@b.io">Mail</a> a@b.io'
+        escaped = markup.replace('<', '&lt;').replace('>', '&gt;')
+        cache = ResultCache(max_bytes=1_000_000, ttl_seconds=60)
+
+        def run(text: str, restore_html: bool) -> None:
+            Orchestrator(
+                input=PiiIn(original_text=text),
+                clean_services=[regex_service],
+                validation_services=[validation_service],
+                html_service=html_service,
+                clean_html=True,
+                cache=cache,
+                restore_html=restore_html,
+            ).run_pipeline()
+
+        run(markup, restore_html=True)
+        run(escaped, restore_html=False)
+
+        assert cache.hits == 0
+        assert cache.misses == 2
+
     @pytest.mark.parametrize(
         'text, expected_count',
         [
@@ -151,3 +221,147 @@ class TestOrchestrator:
 
         result = orch.run_pipeline()
         assert result.replaced_count == expected_count
+
+    async def test_orchestrator_async_matches_sync(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        text = '<p>Mail test@mail.com from 192.168.1.1</p>'
+
+        def build() -> Orchestrator:
+            return Orchestrator(
+                input=PiiIn(original_text=text),
+                clean_services=[regex_service],
+                validation_services=[validation_service],
+                html_service=html_service,
+                clean_html=True,
+            )
+
+        result = await build().run_pipeline_async()
+
+        assert result == build().run_pipeline()
+        assert result.cleaned_text == 'Mail [EMAIL_1] from [IP_ADDRESS_1]'
+
+    async def test_orchestrator_async_wraps_service_errors(
+        self, validation_service, html_service
+    ) -> None:
+        class FailingService:
+            async def detect_async(self, text: str):
+                raise RuntimeError('boom')
+
+        orch = Orchestrator(
+            input=PiiIn(original_text='hello'),
+            clean_services=[FailingService()],
+            validation_services=[validation_service],
+            html_service=html_service,
+        )
+
+        with pytest.raises(ServiceError, match='FailingService: boom'):
+            await orch.run_pipeline_async()
+
+    def test_services_detect_on_original_text(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        seen: list[str] = []
+
+        class NameService:
+            def detect(self, text: str) -> Detection:
+                seen.append(text)
+                start = text.index('test')
+                return Detection(
+                    'model',
+                    [
+                        Span(start, start + 4, 'PERSON', 'model/fake'),
+                        Span(0, 2, 'PERSON', 'model/fake'),
+                    ],
+                )
+
+        text = 'Jo mailed test@mail.com'
+        result = Orchestrator(
+            input=PiiIn(original_text=text),
+            clean_services=[regex_service, NameService()],
+            validation_services=[validation_service],
+            html_service=html_service,
+        ).run_pipeline()
+
+        assert seen == [text]
+        assert result.cleaned_text == '[PERSON_1] mailed [EMAIL_1]'
+        assert result.methods == ['regex', 'model']
+        assert result.replaced_values == {
+            'model/fake:PERSON_1': 'Jo',
+            'regex:EMAIL_1': 'test@mail.com',
+        }
+
+
+class TestBatchOrchestrator:
+    def test_batch_results_in_input_order(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        orch = BatchOrchestrator(
+            inputs=[
+                PiiIn(original_text='Mail a@mail.com'),
+                PiiIn(original_text='   '),
+                PiiIn(original_text='Host 10.0.0.1'),
+            ],
+            clean_services=[regex_service],
+            validation_services=[validation_service],
+            html_service=html_service,
+        )
+
+        first, second, third = orch.run_pipeline()
+
+        assert first.cleaned_text == 'Mail [EMAIL_1]'
+        assert isinstance(second, ValidationError)
+        assert third.cleaned_text == 'Host [IP_ADDRESS_1]'
+        assert third.methods == ['regex']
+
+    def test_batch_service_error_is_reported_per_item(
+        self, validation_service, html_service
+    ) -> None:
+        class FailingService:
+            def detect_many(self, texts):
+                raise RuntimeError('boom')
+
+        orch = BatchOrchestrator(
+            inputs=[PiiIn(original_text='a'), PiiIn(original_text='b')],
+            clean_services=[FailingService()],
+            validation_services=[validation_service],
+            html_service=html_service,
+        )
+
+        results = orch.run_pipeline()
+
+        assert all(isinstance(r, ServiceError) for r in results)
+        assert all(
+            r.message == 'An error occurred during service FailingService: boom'
+            for r in results
+        )
+
+    def test_batch_prepare_error_is_reported_per_item(
+        self, regex_service, validation_service, html_service
+    ) -> None:
+        class FailingHtmlService:
+            parser = 'html.parser'
+
+            def clean(self, text):
+                if 'bad' in text:
+                    raise RuntimeError('unparsable')
+                return html_service.clean(text)
+
+        orch = BatchOrchestrator(
+            inputs=[
+                PiiIn(original_text='bad <p>'),
+                PiiIn(original_text='Mail a@mail.com'),
+            ],
+            clean_services=[regex_service],
+            validation_services=[validation_service],
+            html_service=FailingHtmlService(),
+            clean_html=True,
+        )
+
+        first, second = orch.run_pipeline()
+
+        assert isinstance(first, ServiceError)
+        assert first.message == (
+            'An error occurred while preparing the text: unparsable'
+        )
+        assert second.cleaned_text == 'Mail [EMAIL_1]'
@@ -1,6 +1,9 @@
+import time
+
 import pytest
 from app.services.model_service import (
     ModelRuleAbAi,
+    ModelRuleBertBase,
     RemovalServiceModel,
 )
 
@@ -60,3 +63,293 @@ class TestPiiModelService:
 
         assert result.cleaned_text == expected_result
         assert result.method == 'model'
+
+    def test_model_service_runs_pipeline_once_per_rule(
+        self, monkeypatch
+    ) -> None:
+        import app.services.model_service as ms
+
+        calls: list[str] = []
+
+        def fake_pipeline(*args, **kwargs):
+            def run(text: str):
+                calls.append(text)
+                start = text.index('John')
+                return [
+                    {
+                        'start': start,
+                        'end': start + len('John'),
+                        'entity_group': 'PER',
+                        'score': 0.99,
+                        'word': 'John',
+                    }
+                ]
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        service = RemovalServiceModel(rules=[ModelRuleAbAi()])
+
+        result = service.clean('Hello John.')
+
+        assert len(calls) == 1
+        assert result.cleaned_text == 'Hello [PERSON_1].'
+        assert result.replaced_values == {'model/ab-ai:PERSON_1': 'John'}
+        assert result.replaced_count == {'model/ab-ai:PERSON': 1}
+
+    def test_model_rule_loads_lazily(self, monkeypatch) -> None:
+        import app.services.model_service as ms
+
+        built: list[str] = []
+
+        def fake_pipeline(*args, **kwargs):
+            built.append(kwargs['model'])
+            return lambda text: []
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        rule = ModelRuleAbAi()
+
+        assert built == []
+        assert rule.load_state == ms.ModelLoadState.NOT_LOADED
+
+        rule.evaluate('Hello there.', rule.placeholder)
+        rule.evaluate('Hello again.', rule.placeholder)
+
+        assert built == ['ab-ai/pii_model']
+        assert rule.is_ready
+
+    def test_fallback_policy_skips_models_not_ready(self) -> None:
+        service = RemovalServiceModel(
+            rules=[ModelRuleAbAi()], not_ready_policy='fallback'
+        )
+
+        result = service.clean('Hello John.')
+
+        assert result.cleaned_text == 'Hello John.'
+        assert result.method == 'model'
+
+    def test_fallback_policy_retries_failed_loads(self, monkeypatch) -> None:
+        import app.services.model_service as ms
+
+        attempts: list[str] = []
+
+        def flaky_pipeline(*args, **kwargs):
+            attempts.append(kwargs['model'])
+            if len(attempts) == 1:
+                raise OSError('weights missing')
+            return lambda inputs, **kw: (
+                [] if isinstance(inputs, str) else [[] for _ in inputs]
+            )
+
+        monkeypatch.setattr(ms, 'pipeline', flaky_pipeline)
+        rule = ModelRuleAbAi()
+        service = RemovalServiceModel(rules=[rule], not_ready_policy='fallback')
+
+        ms.load_in_background([rule]).join()
+        assert rule.load_state == ms.ModelLoadState.FAILED
+        assert rule.load_error == 'OSError: weights missing'
+
+        # Not due yet: the request is served without the model.
+        monkeypatch.setattr(ms, 'MODEL_LOAD_RETRY_SECONDS', 3600.0)
+        assert service.detect('Hello John.').complete is False
+        assert rule.retry_failed_load() is None
+        assert len(attempts) == 1
+
+        monkeypatch.setattr(ms, 'MODEL_LOAD_RETRY_SECONDS', 0.0)
+        assert service.detect('Hello John.').complete is False
+        # The request above started the retry; let it finish.
+        while rule.load_state == ms.ModelLoadState.LOADING:
+            time.sleep(0.01)
+
+        assert rule.is_ready
+        assert rule.load_error is None
+        assert len(attempts) == 2
+        assert service.detect('Hello John.').complete is True
+
+    def test_clean_many_batches_pipeline_calls(self, monkeypatch) -> None:
+        import app.services.model_service as ms
+
+        calls: list = []
+
+        def fake_pipeline(*args, **kwargs):
+            def run(inputs, **kw):
+                calls.append(inputs)
+                return [[] for _ in inputs]
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        monkeypatch.setattr(ms, 'batched', lambda ner, **kw: ner)
+        service = RemovalServiceModel(rules=[ModelRuleAbAi()])
+
+        results = service.clean_many(['first text', 'second text'])
+
+        assert calls == [['first text', 'second text']]
+        assert [r.cleaned_text for r in results] == [
+            'first text',
+            'second text',
+        ]
+
+    def test_prescreen_runs_ner_on_candidate_sentences_only(
+        self, monkeypatch
+    ) -> None:
+        import app.services.model_service as ms
+        from app.core.metrics import PRESCREEN_CHARS, PRESCREEN_TEXTS
+
+        calls: list[str] = []
+
+        def find_john(text: str) -> list[dict]:
+            calls.append(text)
+            if 'John' not in text:
+                return []
+            start = text.index('John')
+            return [{'entity_group': 'PER', 'start': start, 'end': start + 4}]
+
+        def fake_pipeline(*args, **kwargs):
+            def run(inputs, **kw):
+                if isinstance(inputs, str):
+                    return find_john(inputs)
+                return [find_john(text) for text in inputs]
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        monkeypatch.setattr(ms, 'batched', lambda ner, **kw: ner)
+        rule = ModelRuleBertBase(prescreen='recall')
+        skipped_before = PRESCREEN_TEXTS.value(rule.placeholder, 'skipped')
+        chars_before = PRESCREEN_CHARS.value(rule.placeholder, 'skipped')
+        text = 'build 42 ok. Then John called.'
+
+        entities = rule.extract_entities_many([text, 'status 200 ok'])
+
+        assert calls == ['Then John called.']
+        assert entities[0][0]['start'] == text.index('John')
+        assert entities[1] == []
+        assert PRESCREEN_TEXTS.value(rule.placeholder, 'skipped') == (
+            skipped_before + 1
+        )
+        assert PRESCREEN_CHARS.value(rule.placeholder, 'skipped') == (
+            chars_before + len('build 42 ok. ') + len('status 200 ok')
+        )
+
+    def test_rules_detect_on_same_input_first_rule_wins(
+        self, monkeypatch
+    ) -> None:
+        import app.services.model_service as ms
+
+        seen: dict[str, list] = {}
+
+        def fake_pipeline(*args, **kwargs):
+            model = kwargs['model']
+            word = 'John Smith' if model == 'ab-ai/pii_model' else 'Smith'
+
+            def run(inputs, **kw):
+                seen.setdefault(model, []).append(inputs)
+                texts = [inputs] if isinstance(inputs, str) else inputs
+                out = []
+                for text in texts:
+                    start = text.index(word)
+                    out.append(
+                        [
+                            {
+                                'start': start,
+                                'end': start + len(word),
+                                'entity_group': 'PER',
+                                'score': 0.9,
+                                'word': word,
+                            }
+                        ]
+                    )
+                return out[0] if isinstance(inputs, str) else out
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        service = RemovalServiceModel(
+            rules=[ModelRuleAbAi(), ms.ModelRuleBertBase()]
+        )
+
+        result = service.clean('Hello John Smith.')
+
+        assert seen['ab-ai/pii_model'] == ['Hello John Smith.']
+        assert seen['dslim/bert-base-NER'] == ['Hello John Smith.']
+        assert result.cleaned_text == 'Hello [PERSON_1].'
+        assert result.replaced_values == {'model/ab-ai:PERSON_1': 'John Smith'}
+
+    async def test_detect_async_matches_detect(self, monkeypatch) -> None:
+        import app.services.model_service as ms
+
+        def fake_pipeline(*args, **kwargs):
+            def run(inputs, **kw):
+                def spans(text: str) -> list[dict]:
+                    start = text.index('John')
+                    return [
+                        {
+                            'start': start,
+                            'end': start + 4,
+                            'entity_group': 'PER',
+                            'score': 0.9,
+                            'word': 'John',
+                        }
+                    ]
+
+                if isinstance(inputs, str):
+                    return spans(inputs)
+                return [spans(text) for text in inputs]
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        service = RemovalServiceModel(
+            rules=[ModelRuleAbAi(), ms.ModelRuleBertBase()]
+        )
+
+        detection = await service.detect_async('Hi John.')
+
+        assert detection == service.detect('Hi John.')
+        assert [span.source for span in detection.spans] == [
+            'model/ab-ai',
+            'model/bert-base-NER',
+        ]
+        assert detection.redact('Hi John.').cleaned_text == 'Hi [PERSON_1].'
+
+    async def test_concurrent_async_requests_share_a_batch(
+        self, monkeypatch
+    ) -> None:
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        import app.services.model_service as ms
+        from app.services.batching import MicroBatcher
+
+        calls: list = []
+
+        def fake_pipeline(*args, **kwargs):
+            def run(inputs, **kw):
+                calls.append(inputs)
+                return [] if isinstance(inputs, str) else [[] for _ in inputs]
+
+            return run
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        monkeypatch.setattr(
+            ms,
+            'batched',
+            lambda ner, **kw: MicroBatcher(
+                ner, max_batch_size=16, max_wait_ms=200
+            ),
+        )
+        # One thread only: requests must not hold it while waiting on NER.
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(ms, 'model_executor', executor)
+        service = RemovalServiceModel(rules=[ModelRuleAbAi()])
+        texts = [f'Request number {i}.' for i in range(8)]
+
+        detections = await asyncio.gather(
+            *(service.detect_async(text) for text in texts)
+        )
+
+        executor.shutdown()
+        assert len(detections) == 8
+        assert len(calls) == 1
+        assert sorted(calls[0]) == sorted(texts)
@@ -1,12 +1,16 @@
+import random
 import re
 
 import pytest
 from app.services.regex_service import (
+    BaseRegexRule,
     RegexRuleEmail,
     RegexRuleIpv4,
     RegexRuleIpv6,
+    RegexRuleSet,
     RegexRuleUrl,
     RemovalServiceRegex,
+    anchor_windows,
 )
 from app.services.utils import TextUtils
 
@@ -118,3 +122,116 @@ class TestRegexService:
     ) -> None:
         result = regex_service.replaced_count(text)
         assert result == expected_result
+
+
+class TicketRule(BaseRegexRule):
+    """Case-sensitive, unlike RegexRuleUrl."""
+
+    def __init__(self):
+        self._pattern = re.compile(r'\bTICKET-\d+\b')
+
+    @property
+    def placeholder(self) -> str:
+        return 'TICKET'
+
+
+class TestRegexRuleSet:
+    def test_ip_rules_share_placeholder_counter(self, regex_service) -> None:
+        result = regex_service.clean(
+            'Hosts 10.0.0.1 and 2001:db8:0:0:0:0:2:1 are up'
+        )
+        assert result.cleaned_text == (
+            'Hosts [IP_ADDRESS_1] and [IP_ADDRESS_2] are up'
+        )
+        assert result.replaced_values == {
+            'regex:IP_ADDRESS_1': '10.0.0.1',
+            'regex:IP_ADDRESS_2': '2001:db8:0:0:0:0:2:1',
+        }
+        assert result.replaced_count == {'regex:IP_ADDRESS': 2}
+
+    def test_leftmost_match_wins_overlap(self, regex_service) -> None:
+        result = regex_service.clean('Go to https://10.0.0.1/login now')
+        assert result.cleaned_text == 'Go to [URL_1] now'
+        assert result.replaced_values == {
+            'regex:URL_1': 'https://10.0.0.1/login'
+        }
+
+    def test_same_start_prefers_first_rule(self) -> None:
+        rule_set = RegexRuleSet([RegexRuleEmail(), RegexRuleUrl()])
+        result = rule_set.evaluate('www.user@mail.com', 'regex')
+        assert result.text == '[EMAIL_1]'
+
+    def test_ignorecase_stays_scoped_to_rule(self) -> None:
+        rule_set = RegexRuleSet([RegexRuleUrl(), TicketRule()])
+        result = rule_set.evaluate(
+            'See HTTPS://EXAMPLE.COM about ticket-12 and TICKET-34', 'regex'
+        )
+        assert result.text == 'See [URL_1] about ticket-12 and [TICKET_1]'
+
+    def test_empty_rule_set_returns_text(self) -> None:
+        result = RegexRuleSet([]).evaluate('a@b.com', 'regex')
+        assert result.text == 'a@b.com'
+        assert result.replaced_count == {}
+
+
+class DigitsRule(BaseRegexRule):
+    def __init__(self):
+        self._pattern = re.compile(r'\d{4}')
+
+    @property
+    def placeholder(self) -> str:
+        return 'DIGITS'
+
+
+class TestAnchorPrefilter:
+    def test_windows_are_tokens_around_anchors(self) -> None:
+        text = 'Mail a@b.io,\tor WWW.x.org and\nc@d.io'
+
+        assert anchor_windows(text, ('@',)) == [(5, 12), (30, 36)]
+        assert anchor_windows(text, ('www.',), ignore_case=True) == [(16, 25)]
+        assert anchor_windows(text, (':',)) == []
+
+    def test_text_without_anchors_is_not_scanned(self) -> None:
+        rule_set = RegexRuleSet([RegexRuleEmail(), RegexRuleUrl()])
+
+        rule_set.detect('Nothing to see here.')
+
+        assert rule_set._patterns.keys() == {0b11}
+
+    def test_only_rules_with_anchors_are_scanned(self) -> None:
+        rule_set = RegexRuleSet([RegexRuleEmail(), RegexRuleUrl()])
+
+        result = rule_set.evaluate('Write to a@b.io today', 'regex')
+
+        assert result.text == 'Write to [EMAIL_1] today'
+        assert rule_set._patterns.keys() == {0b11, 0b01}
+
+    def test_rule_without_anchors_scans_whole_text(self) -> None:
+        rule_set = RegexRuleSet([RegexRuleEmail(), DigitsRule()])
+
+        result = rule_set.evaluate('PIN 1234 for a@b.io, 5678', 'regex')
+
+        assert result.text == 'PIN [DIGITS_1] for [EMAIL_1], [DIGITS_2]'
+
+    def test_matches_like_a_full_scan(self) -> None:
+        rules = [RegexRuleEmail(), RegexRuleIpv4(), RegexRuleIpv6()]
+        rules.append(RegexRuleUrl())
+        rule_set = RegexRuleSet(rules)
+        full = rule_set._subset_pattern(0b1111)
+        fragments = [
+            'a', '0', '7', 'f', '255', '.', ':', '::', '@', '-', '/', ' ',
+            '\n', '\t', '"', 'HTTP', 'https://', 'wWw.', '.com', 'db8',
+            '10.0.0.1', 'x@y.io', '\u0130', '\u00e9',
+        ]  # fmt: skip
+        rng = random.Random(0)
+
+        for _ in range(2000):
+            text = ''.join(
+                rng.choice(fragments) for _ in range(rng.randint(0, 30))
+            )
+            spans = [(s.start, s.end) for s in rule_set.detect(text)]
+            assert spans == [m.span() for m in full.finditer(text)], text
+            for rule in rules:
+                spans = [(s.start, s.end) for s in rule.detect(text)]
+                expected = [m.span() for m in rule.matcher.finditer(text)]
+                assert spans == expected, text
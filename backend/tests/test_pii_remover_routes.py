@@ -8,7 +8,10 @@ from starlette.status import (
     HTTP_404_NOT_FOUND,
 )
 
-pytestmark = pytest.mark.asyncio
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.usefixtures('mock_model_pipeline'),
+]
 
 
 @pytest.fixture
@@ -22,21 +25,6 @@ def pii_out():
     )
 
 
-@pytest.fixture(autouse=True)
-def mock_model_pipeline(monkeypatch):
-    """Mock the HuggingFace pipeline to avoid loading the actual model in tests."""
-    import app.services.model_service as ms
-
-    def fake_pipeline(*args, **kwargs):
-        def run(text: str):
-            # Return empty list so model service doesn't find any entities
-            return []
-
-        return run
-
-    monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
-
-
 class TestPiiRemoverRoutes:
     async def test_pii_remover_route_exists(
         self, app: FastAPI, client: AsyncClient
@@ -93,3 +81,98 @@ class TestPiiRemoverRoutes:
             json={'original_text': invalid_payload},
         )
         assert res.status_code == status_code
+
+    async def test_pii_remover_batch_keeps_order_and_item_errors(
+        self, app: FastAPI, client: AsyncClient, pii_out: PiiOut
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover-batch'),
+            json={
+                'items': [
+                    {'original_text': pii_out.original_text},
+                    {'original_text': '    '},
+                    {'original_text': 'Server 10.0.0.1 is down.'},
+                ]
+            },
+        )
+        assert res.status_code == HTTP_200_OK
+
+        results = res.json()['results']
+        assert [r['index'] for r in results] == [0, 1, 2]
+        assert [r['status_code'] for r in results] == [200, 400, 200]
+        assert PiiOut(**results[0]['result']) == pii_out
+        assert results[1]['result'] is None
+        assert results[1]['error']
+        assert results[2]['result']['cleaned_text'] == (
+            'Server [IP_ADDRESS_1] is down.'
+        )
+
+    async def test_pii_remover_batch_rejects_empty_list(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover-batch'), json={'items': []}
+        )
+        assert res.status_code == 422
+
+    @pytest.mark.parametrize(
+        'fields, expected',
+        (
+            ('cleaned_text', {'cleaned_text'}),
+            (
+                'replaced_count, replaced_values',
+                {'replaced_count', 'replaced_values'},
+            ),
+        ),
+    )
+    async def test_pii_remover_projects_fields(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        pii_out: PiiOut,
+        fields: str,
+        expected: set[str],
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover'),
+            params={'fields': fields},
+            json={'original_text': pii_out.original_text},
+        )
+        assert res.status_code == HTTP_200_OK
+        assert res.json() == pii_out.model_dump(include=expected)
+
+    @pytest.mark.parametrize('fields', ('', 'cleaned_text,password'))
+    async def test_pii_remover_rejects_unknown_fields(
+        self, app: FastAPI, client: AsyncClient, fields: str
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover'),
+            params={'fields': fields},
+            json={'original_text': 'Server 10.0.0.1 is down.'},
+        )
+        assert res.status_code == 422
+
+    async def test_pii_remover_batch_projects_fields(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover-batch'),
+            params={'fields': 'replaced_count'},
+            json={
+                'items': [
+                    {'original_text': 'Server 10.0.0.1 is down.'},
+                    {'original_text': '    '},
+                ]
+            },
+        )
+        assert res.status_code == HTTP_200_OK
+
+        first, second = res.json()['results']
+        assert first == {
+            'index': 0,
+            'status_code': 200,
+            'result': {'replaced_count': {'regex:IP_ADDRESS': 1}},
+            'error': None,
+        }
+        assert second['result'] is None
+        assert second['status_code'] == 400
@@ -2,7 +2,9 @@ import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
 from starlette.status import (
+    HTTP_200_OK,
     HTTP_404_NOT_FOUND,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 pytestmark = pytest.mark.asyncio
@@ -16,3 +18,69 @@ class TestPingRoutes:
         assert res.status_code != HTTP_404_NOT_FOUND
         assert res.status_code == 200
         assert res.json() == {'message': 'pong'}
+
+    async def test_ready_reports_model_states(
+        self, app: FastAPI, client: AsyncClient, monkeypatch
+    ) -> None:
+        import app.services.model_service as ms
+        from app.services import model_rules
+
+        for rule in model_rules:
+            monkeypatch.setattr(
+                rule, '_load_state', ms.ModelLoadState.NOT_LOADED
+            )
+
+        res = await client.get(app.url_path_for('ping:ready'))
+
+        assert res.status_code == HTTP_503_SERVICE_UNAVAILABLE
+        assert res.json() == {
+            'ready': False,
+            'models': {
+                'model/ab-ai': 'not_loaded',
+                'model/bert-base-NER': 'not_loaded',
+            },
+            'errors': {},
+        }
+
+        def fake_pipeline(*args, **kwargs):
+            return lambda inputs, **kw: (
+                [] if isinstance(inputs, str) else [[] for _ in inputs]
+            )
+
+        monkeypatch.setattr(ms, 'pipeline', fake_pipeline)
+        for rule in model_rules:
+            rule.load()
+
+        res = await client.get(app.url_path_for('ping:ready'))
+
+        assert res.status_code == HTTP_200_OK
+        assert res.json() == {
+            'ready': True,
+            'models': {'model/ab-ai': 'ready', 'model/bert-base-NER': 'ready'},
+            'errors': {},
+        }
+
+    async def test_ready_reports_load_failures(
+        self, app: FastAPI, client: AsyncClient, monkeypatch
+    ) -> None:
+        import app.services.model_service as ms
+        from app.services import model_rules
+
+        def broken_pipeline(*args, **kwargs):
+            raise OSError('weights missing')
+
+        monkeypatch.setattr(ms, 'pipeline', broken_pipeline)
+        for rule in model_rules:
+            monkeypatch.setattr(
+                rule, '_load_state', ms.ModelLoadState.NOT_LOADED
+            )
+            ms.load_in_background([rule]).join()
+
+        res = await client.get(app.url_path_for('ping:ready'))
+
+        assert res.status_code == HTTP_503_SERVICE_UNAVAILABLE
+        assert set(res.json()['models'].values()) == {'failed'}
+        assert res.json()['errors'] == {
+            'model/ab-ai': 'OSError: weights missing',
+            'model/bert-base-NER': 'OSError: weights missing',
+        }
@@ -0,0 +1,60 @@
+import pytest
+from app.services.chunking import TextChunk
+from app.services.prescreen import Prescreen, build_prescreen, load_lexicon
+
+
+class TestPrescreen:
+    @pytest.mark.parametrize(
+        'sentence, recall, balanced',
+        [
+            ('met John at the office', True, True),
+            ('John called.', True, True),
+            ('The build is green.', True, False),
+            ('Please check the NASA feed', True, True),
+            ('GET /api/v1/ping 200 12ms', True, True),
+            ('ok 200 3f2a9c1e-77b0 user=jdoe@mail.com', False, False),
+            ('[EMAIL_1] wrote from [IP_ADDRESS_1].', False, False),
+            ('all lowercase text here', False, False),
+            ('1234 5678 9012', False, False),
+        ],
+    )
+    def test_is_candidate(
+        self, sentence: str, recall: bool, balanced: bool
+    ) -> None:
+        assert Prescreen('recall').is_candidate(sentence) is recall
+        assert Prescreen('balanced').is_candidate(sentence) is balanced
+
+    def test_lexicon_terms_match_in_any_case(self) -> None:
+        prescreen = Prescreen('balanced', lexicon=['Berlin'])
+
+        assert prescreen.is_candidate('flying to berlin tomorrow')
+
+    def test_segments_join_consecutive_candidates(self) -> None:
+        text = 'build ok. John met Maria. In Paris! done here.\nbye Tom'
+
+        segments = Prescreen('recall').segments(text)
+
+        assert segments == [
+            TextChunk('John met Maria. In Paris!', 10),
+            TextChunk('bye Tom', 47),
+        ]
+        for segment in segments:
+            start = segment.offset
+            assert text[start : start + len(segment.text)] == segment.text
+
+    def test_segments_empty_without_candidates(self) -> None:
+        assert Prescreen('recall').segments('id=42. status ok.') == []
+
+    def test_off_mode_builds_nothing(self) -> None:
+        assert build_prescreen('off') is None
+        assert build_prescreen('balanced').mode == 'balanced'
+
+    def test_unknown_mode_raises(self) -> None:
+        with pytest.raises(ValueError, match='Unknown prescreen mode'):
+            Prescreen('aggressive')
+
+    def test_load_lexicon(self, tmp_path) -> None:
+        path = tmp_path / 'lexicon.txt'
+        path.write_text('Berlin\n# comment\n\nACME corp  # trailing\n')
+
+        assert load_lexicon(str(path)) == {'berlin', 'acme corp'}
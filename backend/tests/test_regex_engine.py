@@ -0,0 +1,108 @@
+import random
+import re
+import time
+
+import pytest
+from app.services import regex_engine
+from app.services.regex_engine import compile_pattern, engine_of
+from app.services.regex_service import (
+    RegexRuleEmail,
+    RegexRuleIpv4,
+    RegexRuleIpv6,
+    RegexRuleSet,
+    RegexRuleUrl,
+)
+
+RULES = [RegexRuleEmail(), RegexRuleIpv4(), RegexRuleIpv6(), RegexRuleUrl()]
+
+needs_re2 = pytest.mark.skipif(
+    regex_engine.re2 is None, reason='google-re2 is not installed'
+)
+
+# Fragments the built-in patterns care about, so random texts hit partial
+# and complete matches often. ASCII only: RE2's \b ignores other letters.
+FRAGMENTS = [
+    'a', 'Z', '0', '7', 'f', 'ff', '255', '256', '.', ':', '::', '@', '-',
+    '_', '%', '+', '/', ' ', '\n', '"', '<', 'http', 'https://', 'www.',
+    'mail', '.com', 'db8', '10.0.0.1', 'x@y.io',
+]  # fmt: skip
+
+
+def _spans(pattern, text: str) -> list[tuple[int, int]]:
+    return [match.span() for match in pattern.finditer(text)]
+
+
+def _random_texts(count: int) -> list[str]:
+    rng = random.Random(0)
+    return [
+        ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 40)))
+        for _ in range(count)
+    ]
+
+
+class TestCompilePattern:
+    def test_re_returns_the_pattern(self) -> None:
+        pattern = re.compile(r'\d+')
+        assert compile_pattern(pattern, 're') is pattern
+
+    def test_unknown_engine_raises_error(self) -> None:
+        with pytest.raises(ValueError, match='Unknown regex engine'):
+            compile_pattern(re.compile('a'), 'pcre')
+
+    def test_re2_without_google_re2_raises_error(self, monkeypatch) -> None:
+        monkeypatch.setattr(regex_engine, 're2', None)
+
+        with pytest.raises(ImportError, match='re2'):
+            compile_pattern(re.compile('a'), 're2')
+
+    @needs_re2
+    def test_unsupported_syntax_falls_back_to_re(self) -> None:
+        pattern = re.compile(r'(?<=@)\w+')
+
+        compiled = compile_pattern(pattern, 're2')
+
+        assert compiled is pattern
+        assert engine_of(compiled) == 're'
+
+    @needs_re2
+    def test_flags_are_kept(self) -> None:
+        compiled = compile_pattern(re.compile('abc', re.IGNORECASE), 're2')
+
+        assert engine_of(compiled) == 're2'
+        assert _spans(compiled, 'xABC') == [(1, 4)]
+
+
+@needs_re2
+class TestRe2Engine:
+    @pytest.mark.parametrize('rule', RULES, ids=lambda r: type(r).__name__)
+    def test_rule_matches_like_re(self, rule) -> None:
+        compiled = compile_pattern(rule.pattern, 're2')
+
+        assert engine_of(compiled) == 're2'
+        for text in _random_texts(500):
+            assert _spans(compiled, text) == _spans(rule.pattern, text), text
+
+    def test_rule_set_matches_like_re(self) -> None:
+        on_re = RegexRuleSet(RULES, engine='re')
+        on_re2 = RegexRuleSet(RULES, engine='re2')
+
+        assert on_re2.engine == 're2'
+        for text in _random_texts(500):
+            assert on_re2.detect(text) == on_re.detect(text), text
+            assert on_re2.evaluate(text, 'regex') == on_re.evaluate(
+                text, 'regex'
+            )
+
+    @pytest.mark.parametrize('rule', RULES, ids=lambda r: type(r).__name__)
+    @pytest.mark.parametrize(
+        'run', ['a.', 'a-', '1.', 'a@a', 'abcd:', '1:', 'www.', 'http://x ']
+    )
+    def test_worst_case_time_is_bounded(self, rule, run: str) -> None:
+        # `re` needs seconds on some of these; RE2 stays in milliseconds.
+        text = (run * 50_000)[:50_000]
+        compiled = compile_pattern(rule.pattern, 're2')
+
+        start = time.perf_counter()
+        for _ in compiled.finditer(text):
+            pass
+        assert time.perf_counter() - start < 0.5
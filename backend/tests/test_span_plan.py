@@ -0,0 +1,69 @@
+from app.services.span_plan import Span, SpanPlan, entity_spans, trim_span
+
+
+class TestSpanPlan:
+    def test_first_source_wins_overlaps(self) -> None:
+        text = 'Call John Smith at john@mail.com now.'
+        plan = SpanPlan(text)
+        plan.add(Span(19, 32, 'EMAIL', 'regex'))
+        plan.add(Span(5, 15, 'PERSON', 'model/a'))
+        plan.add(Span(10, 15, 'PERSON', 'model/b'))
+        plan.add(Span(19, 23, 'PERSON', 'model/b'))
+
+        redacted, counters, mapping = plan.materialize()
+
+        assert redacted == 'Call [PERSON_1] at [EMAIL_1] now.'
+        assert counters == {'model/a:PERSON': 1, 'regex:EMAIL': 1}
+        assert mapping == {
+            'model/a:PERSON_1': 'John Smith',
+            'regex:EMAIL_1': 'john@mail.com',
+        }
+
+    def test_within_source_leftmost_longest_wins(self) -> None:
+        plan = SpanPlan('abcdef')
+        plan.extend(
+            [
+                Span(1, 3, 'X', 'regex'),
+                Span(0, 2, 'X', 'regex'),
+                Span(0, 4, 'X', 'regex'),
+                Span(4, 6, 'X', 'regex'),
+            ]
+        )
+
+        assert plan.resolve() == [
+            Span(0, 4, 'X', 'regex'),
+            Span(4, 6, 'X', 'regex'),
+        ]
+        assert plan.materialize()[0] == '[X_1][X_2]'
+
+    def test_placeholders_are_numbered_per_source_and_label(self) -> None:
+        plan = SpanPlan('a b c')
+        plan.add(Span(0, 1, 'X', 'regex'))
+        plan.add(Span(2, 3, 'X', 'model/a'))
+        plan.add(Span(4, 5, 'X', 'regex'))
+
+        assert plan.placeholders(start_at=0) == [
+            (Span(0, 1, 'X', 'regex'), 'X_0'),
+            (Span(2, 3, 'X', 'model/a'), 'X_0'),
+            (Span(4, 5, 'X', 'regex'), 'X_1'),
+        ]
+
+    def test_invalid_spans_are_ignored(self) -> None:
+        plan = SpanPlan('abc')
+        plan.extend([Span(2, 2, 'X', 's'), Span(-1, 1, 'X', 's')])
+        plan.add(Span(1, 9, 'X', 's'))
+
+        assert plan.materialize() == ('abc', {}, {})
+
+    def test_entity_spans_trims_and_skips(self) -> None:
+        text = 'Hi, John! '
+        entities = [
+            {'start': 3, 'end': 9, 'entity_group': 'PER'},
+            {'start': 2, 'end': 3, 'entity_group': 'PER'},
+            {'start': 0, 'end': 2},
+        ]
+
+        assert entity_spans(text, entities, 'model') == [
+            Span(4, 8, 'PER', 'model')
+        ]
+        assert trim_span(text, 3, 9) == (4, 8)
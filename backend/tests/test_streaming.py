@@ -0,0 +1,129 @@
+import io
+import json
+
+import pytest
+from app.services.html_service import HtmlService
+from app.services.regex_service import (
+    RegexRuleEmail,
+    RegexRuleIpv4,
+    RemovalServiceRegex,
+)
+from app.services.streaming import NdjsonAnonymizer
+from app.services.validation_service import (
+    ValidationRuleNonEmpty,
+    ValidationServiceChecker,
+)
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+LINES = [
+    '{"original_text": "Mail a@mail.com"}\n',
+    '\n',
+    'not json\n',
+    '{"original_text": "   "}\n',
+    '{"original_text": "Host 10.0.0.1"}\n',
+]
+
+pytestmark = pytest.mark.usefixtures('mock_model_pipeline')
+
+
+@pytest.fixture
+def anonymizer():
+    return NdjsonAnonymizer(
+        clean_services=[
+            RemovalServiceRegex(rules=[RegexRuleEmail(), RegexRuleIpv4()])
+        ],
+        validation_services=[
+            ValidationServiceChecker(rules=[ValidationRuleNonEmpty()])
+        ],
+        html_service=HtmlService(),
+        chunk_size=2,
+        max_line_bytes=100,
+    )
+
+
+async def _iterate(chunks: list[bytes]):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestNdjsonAnonymizer:
+    def test_process_lines(self, anonymizer) -> None:
+        out = [json.loads(line) for line in anonymizer.process_lines(LINES)]
+
+        assert [o['index'] for o in out] == [0, 1, 2, 3]
+        assert [o['status_code'] for o in out] == [200, 422, 400, 200]
+        assert out[0]['result']['cleaned_text'] == 'Mail [EMAIL_1]'
+        assert out[3]['result']['cleaned_text'] == 'Host [IP_ADDRESS_1]'
+
+    def test_process_file_reads_bounded_lines(self, anonymizer) -> None:
+        oversized = '{"original_text": "' + 'x' * 500 + '"}\n'
+        source = io.BytesIO(''.join([*LINES, oversized, LINES[0]]).encode())
+        reads: list[int] = []
+        readline = source.readline
+
+        def bounded_readline(limit: int = -1) -> bytes:
+            line = readline(limit)
+            reads.append(len(line))
+            return line
+
+        source.readline = bounded_readline  # type: ignore[method-assign]
+
+        out = [json.loads(line) for line in anonymizer.process_file(source)]
+
+        assert [o['status_code'] for o in out] == [200, 422, 400, 200, 413, 200]
+        assert out[5]['result']['cleaned_text'] == 'Mail [EMAIL_1]'
+        assert max(reads) <= anonymizer.max_line_bytes + 1
+
+    async def test_process_stream_splits_across_chunks(
+        self, anonymizer
+    ) -> None:
+        body = ''.join(LINES).encode()
+        chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+        out = [
+            json.loads(line)
+            async for line in anonymizer.process_stream(_iterate(chunks))
+        ]
+
+        assert [o['status_code'] for o in out] == [200, 422, 400, 200]
+
+    async def test_oversized_line_is_dropped(self, anonymizer) -> None:
+        huge = '{"original_text": "' + 'a' * 500 + '"}\n'
+        body = (huge + LINES[0]).encode()
+
+        out = [
+            json.loads(line)
+            async for line in anonymizer.process_stream(_iterate([body]))
+        ]
+
+        assert [o['status_code'] for o in out] == [413, 200]
+
+    async def test_stream_route(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover-stream'),
+            content=''.join(LINES).encode(),
+            headers={'Content-Type': 'application/x-ndjson'},
+        )
+
+        assert res.status_code == 200
+        assert res.headers['content-type'].startswith('application/x-ndjson')
+        out = [json.loads(line) for line in res.text.splitlines()]
+        assert [o['status_code'] for o in out] == [200, 422, 400, 200]
+
+    async def test_stream_route_projects_fields(
+        self, app: FastAPI, client: AsyncClient
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('pii:remover-stream'),
+            params={'fields': 'cleaned_text'},
+            content=''.join(LINES).encode(),
+            headers={'Content-Type': 'application/x-ndjson'},
+        )
+
+        out = [json.loads(line) for line in res.text.splitlines()]
+        assert out[0]['result'] == {'cleaned_text': 'Mail [EMAIL_1]'}
+        assert out[1]['result'] is None
+        assert out[1]['error']
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from app.services.stub_ner import StubNer
+
+LEXICON = {'PER': ['John', 'John Smith'], 'LOC': ['Berlin']}
+
+
+class TestStubNer:
+    def test_lexicon_entities_have_pipeline_shape(self) -> None:
+        ner = StubNer(LEXICON)
+        text = 'John Smith moved to Berlin; Johnny stayed.'
+
+        assert ner(text) == [
+            {
+                'entity_group': 'PER',
+                'score': 1.0,
+                'word': 'John Smith',
+                'start': 0,
+                'end': 10,
+            },
+            {
+                'entity_group': 'LOC',
+                'score': 1.0,
+                'word': 'Berlin',
+                'start': 20,
+                'end': 26,
+            },
+        ]
+
+    def test_list_input_gives_one_list_per_text(self) -> None:
+        ner = StubNer(LEXICON)
+
+        result = ner(['Berlin', 'nothing here', 'John'])
+
+        assert [len(entities) for entities in result] == [1, 0, 1]
+        assert result == [ner('Berlin'), ner('nothing here'), ner('John')]
+
+    def test_default_pattern_finds_capitalized_pairs(self) -> None:
+        ner = StubNer()
+
+        entities = ner('We met Maria Garcia, not maria garcia.')
+
+        assert [(e['entity_group'], e['word']) for e in entities] == [
+            ('PER', 'Maria Garcia')
+        ]
+
+    def test_patterns_and_file(self, tmp_path) -> None:
+        path = tmp_path / 'stub.json'
+        path.write_text(
+            json.dumps(
+                {'lexicon': {'ORG': ['Acme']}, 'patterns': {'ID': r'\d{4}'}}
+            )
+        )
+        ner = StubNer.from_file(str(path))
+
+        entities = ner('Acme badge 1234')
+
+        assert [(e['entity_group'], e['word']) for e in entities] == [
+            ('ORG', 'Acme'),
+            ('ID', '1234'),
+        ]
+
+    @pytest.mark.parametrize(
+        'inputs, expected_ms', [('x' * 2000, 7.0), (['x' * 500] * 4, 7.0)]
+    )
+    def test_simulated_latency(self, monkeypatch, inputs, expected_ms) -> None:
+        sleeps: list[float] = []
+        monkeypatch.setattr('time.sleep', sleeps.append)
+        ner = StubNer(latency_ms=3.0, latency_ms_per_kchar=2.0)
+
+        ner(inputs)
+
+        assert sleeps == [pytest.approx(expected_ms / 1000)]
@@ -0,0 +1,47 @@
+import re
+
+from app.services.utils import TextUtils
+
+
+def entity(text: str, word: str, label: str) -> dict:
+    start = text.index(word)
+    return {'start': start, 'end': start + len(word), 'entity_group': label}
+
+
+class TestTextUtils:
+    def test_redact_entities_with_counter(self) -> None:
+        text = 'John met Jane and John in Paris.'
+        entities = [
+            entity(text, 'John', 'PER'),
+            entity(text, 'Jane', 'PER'),
+            entity(text, 'Paris', 'LOC'),
+            # Overlaps 'Paris' and is shorter, so it is dropped.
+            entity(text, 'Par', 'LOC'),
+            {'start': 18, 'end': 22, 'entity_group': 'PER'},
+        ]
+
+        redacted, counters, mapping = TextUtils.redact_entities_with_counter(
+            text, entities, 'model'
+        )
+
+        assert redacted == '[PER_1] met [PER_2] and [PER_3] in [LOC_1].'
+        assert counters == {'model:PER': 3, 'model:LOC': 1}
+        assert mapping == {
+            'model:PER_1': 'John',
+            'model:PER_2': 'Jane',
+            'model:PER_3': 'John',
+            'model:LOC_1': 'Paris',
+        }
+
+    def test_return_placeholder_with_counter(self) -> None:
+        text, counts, values = TextUtils.return_placeholder_with_counter(
+            'a1 b2 c3', 'regex', re.compile(r'\d'), 'DIGIT'
+        )
+
+        assert text == 'a[DIGIT_1] b[DIGIT_2] c[DIGIT_3]'
+        assert counts == {'regex:DIGIT': 3}
+        assert values == {
+            'regex:DIGIT_1': '1',
+            'regex:DIGIT_2': '2',
+            'regex:DIGIT_3': '3',
+        }
@@ -1,6 +1,144 @@
+import argparse
+import contextlib
+import signal
+import sys
+from pathlib import Path
+
+# The backend is not installed as a package; mirror PYTHONPATH=backend.
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+
+def clean(args: argparse.Namespace) -> None:
+    from app.core.config import NDJSON_CHUNK_SIZE
+    from app.services import (
+        html_service,
+        removal_service_model,
+        removal_service_regex,
+        result_cache,
+        validation_service,
+    )
+    from app.services.streaming import NdjsonAnonymizer
+
+    anonymizer = NdjsonAnonymizer(
+        clean_services=[removal_service_regex, removal_service_model],
+        validation_services=[validation_service],
+        html_service=html_service,
+        clean_html=args.clean_html,
+        cache=result_cache,
+        chunk_size=args.chunk_size or NDJSON_CHUNK_SIZE,
+    )
+
+    with contextlib.ExitStack() as stack:
+        source = (
+            sys.stdin.buffer
+            if args.input == '-'
+            else stack.enter_context(open(args.input, 'rb'))
+        )
+        target = (
+            sys.stdout
+            if args.output == '-'
+            else stack.enter_context(open(args.output, 'w', encoding='utf-8'))
+        )
+        for line in anonymizer.process_file(source):
+            target.write(line)
+
+
+def model_worker(args: argparse.Namespace) -> None:
+    from app.core.config import (
+        MODEL_WORKER_ADDRESS,
+        MODEL_WORKER_AUTHKEY,
+        MODEL_WORKER_BACKEND,
+        MODEL_WORKER_PROCESSES,
+    )
+    from app.services import model_rules
+    from app.services.inference import build_ner
+    from app.services.model_service import pipeline
+    from app.services.model_worker import ModelWorkerServer, default_address
+
+    if MODEL_WORKER_BACKEND == 'remote':
+        sys.exit('MODEL_WORKER_BACKEND cannot be remote.')
+    if not MODEL_WORKER_AUTHKEY:
+        sys.exit('Set MODEL_WORKER_AUTHKEY to a secret shared with the API.')
+
+    # Load every model before forking so the workers share the weights.
+    ners = {
+        rule.spec.model: build_ner(rule.spec, MODEL_WORKER_BACKEND, pipeline)
+        for rule in model_rules
+    }
+    server = ModelWorkerServer(
+        ners,
+        address=args.address or MODEL_WORKER_ADDRESS or default_address(),
+        authkey=MODEL_WORKER_AUTHKEY.encode(),
+        processes=args.processes or MODEL_WORKER_PROCESSES,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def build_denylist(args: argparse.Namespace) -> None:
+    from app.services.denylist import compile_denylist
+
+    denylist = compile_denylist(
+        args.input,
+        ignore_case=not args.case_sensitive,
+        compiled_path=args.output or '',
+    )
+    print(f'Compiled {len(denylist)} terms.', file=sys.stderr)
+
+
 def main():
-    print("Hello from anonify!")
+    parser = argparse.ArgumentParser(
+        prog='anonify', description='Anonify command line tools.'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    clean_parser = commands.add_parser(
+        'clean',
+        help='Anonymize a JSONL file of {"original_text": ...} records.',
+    )
+    clean_parser.add_argument(
+        'input', help="Input JSONL file or '-' for stdin."
+    )
+    clean_parser.add_argument(
+        '-o', '--output', default='-', help="Output file or '-' for stdout."
+    )
+    clean_parser.add_argument('--clean-html', action='store_true')
+    clean_parser.add_argument(
+        '--chunk-size', type=int, help='Records per batch (NDJSON_CHUNK_SIZE).'
+    )
+    clean_parser.set_defaults(func=clean)
+
+    worker_parser = commands.add_parser(
+        'model-worker',
+        help="Serve the NER models to API workers using the 'remote' backend.",
+    )
+    worker_parser.add_argument('--address', help='Unix socket path.')
+    worker_parser.add_argument('--processes', type=int)
+    worker_parser.set_defaults(func=model_worker)
+
+    denylist_parser = commands.add_parser(
+        'build-denylist',
+        help='Compile a deny list (DENYLIST_PATH) ahead of startup.',
+    )
+    denylist_parser.add_argument('input', help='Deny list, one term per line.')
+    denylist_parser.add_argument(
+        '-o', '--output', help='Compiled file; defaults to INPUT.automaton.'
+    )
+    denylist_parser.add_argument(
+        '--case-sensitive',
+        action='store_true',
+        help='Compile for DENYLIST_IGNORE_CASE=false.',
+    )
+    denylist_parser.set_defaults(func=build_denylist)
+
+    args = parser.parse_args()
+    args.func(args)
 
 
-if __name__ == "__main__":
+if __name__ == '__main__':
     main()